@@ -1,12 +1,27 @@
 from flask import Flask, request, jsonify, make_response
 from flask_cors import CORS
-import joblib
-import os
 import numpy as np
-import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
 
+from backend.config import (
+    ADMIN_TOKEN, ANALYSIS_ON_STARTUP, HISTORY_AUTO_RECORD, HISTORY_BACKPRESSURE, HISTORY_BATCH_SIZE, HISTORY_BLOCK_TIMEOUT,
+    HISTORY_DB_PATH, HISTORY_FLUSH_INTERVAL, HISTORY_QUEUE_SIZE, HISTORY_SPILL_PATH, MAX_BATCH_SIZE,
+    MAX_SWEEP_POINTS, PROFILE_ENABLED, PROFILE_INTERVAL, PROFILE_SAMPLE_RATE,
+)
+from backend.cross_validation import CANDIDATES, CrossValidationCache
+from backend.history_store import DEFAULT_PAGE_SIZE, HistoryStore
+from backend.history_writer import HistoryWriter
+from backend.inference import ensemble_risk_level
+from backend.metrics import Metrics, mark
+from backend.model_manager import ModelManager
+from backend.model_registry import MODEL_DISPLAY_NAMES, NEURAL_NETWORK, RANDOM_FOREST, ModelRegistry
+from backend.partial_dependence import PartialDependenceCache
+from backend.permutation_importance import PermutationImportanceCache
+from backend.profiler import SamplingProfiler
+from backend.utils.data_processing import parse_batch_records, parse_sweep_axes, sweep_matrix
+from backend.utils.schema import HEART_SCHEMA
+
 app = Flask(__name__)
 load_dotenv()  # Load environment variables from .env file
 
@@ -15,66 +30,137 @@ CORS(app, resources={
     r"/*": {
         "origins": ["http://localhost:3000"],
         "methods": ["GET", "POST", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["X-Next-Cursor"]
     }
 })
 
-# Get the directory where app.py is located
-base_dir = os.path.dirname(os.path.abspath(__file__))
+# Load the Random Forest and Neural Network models once at startup
+registry = ModelRegistry().load()
 
-# Construct absolute paths relative to the application directory
-model_path = os.path.join(base_dir, os.getenv('MODEL_PATH', 'model/heart_model.pkl').lstrip('./'))
-scaler_path = os.path.join(base_dir, os.getenv('SCALER_PATH', 'model/scaler.pkl').lstrip('./'))
+# Persistent prediction history and the write-behind queue that records scored predictions
+history_store = HistoryStore(HISTORY_DB_PATH)
+history_writer = HistoryWriter(
+    history_store,
+    max_size=HISTORY_QUEUE_SIZE,
+    batch_size=HISTORY_BATCH_SIZE,
+    flush_interval=HISTORY_FLUSH_INTERVAL,
+    policy=HISTORY_BACKPRESSURE,
+    block_timeout=HISTORY_BLOCK_TIMEOUT,
+    spill_path=HISTORY_SPILL_PATH
+)
 
-print(f"Looking for model at: {model_path}")
-print(f"Looking for scaler at: {scaler_path}")
+# Partial-dependence/ICE tables, computed in the background when the model version has none on disk
+partial_dependence_cache = PartialDependenceCache()
 
-# Initialize variables
-model = None
-scaler = None
+# Permutation importance of both models, computed on a process pool in the background
+permutation_importance_cache = PermutationImportanceCache()
 
-# Check if files exist and load them
-if os.path.exists(model_path):
-    try:
-        model = joblib.load(model_path)
-        print(f"Model loaded successfully from {model_path}")
-    except Exception as e:
-        print(f"Error loading model: {e}")
-else:
-    print(f"Model file not found at {model_path}")
+# Cross-validated metrics of the comparison candidates, evaluated on a process pool in the background
+cross_validation_cache = CrossValidationCache()
 
-if os.path.exists(scaler_path):
-    try:
-        scaler = joblib.load(scaler_path)
-        print(f"Scaler loaded successfully from {scaler_path}")
-    except Exception as e:
-        print(f"Error loading scaler: {e}")
-else:
-    print(f"Scaler file not found at {scaler_path}")
-
-# Feature names for the heart disease dataset
-feature_names = [
-    'age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
-    'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal'
-]
-
-# Feature descriptions for better understanding
-feature_descriptions = {
-    'age': 'Age in years',
-    'sex': 'Sex (1 = male, 0 = female)',
-    'cp': 'Chest pain type (0-3)',
-    'trestbps': 'Resting blood pressure (mm Hg)',
-    'chol': 'Serum cholesterol (mg/dl)',
-    'fbs': 'Fasting blood sugar > 120 mg/dl (1 = true, 0 = false)',
-    'restecg': 'Resting electrocardiographic results (0-2)',
-    'thalach': 'Maximum heart rate achieved',
-    'exang': 'Exercise induced angina (1 = yes, 0 = no)',
-    'oldpeak': 'ST depression induced by exercise relative to rest',
-    'slope': 'Slope of the peak exercise ST segment (0-2)',
-    'ca': 'Number of major vessels colored by fluoroscopy (0-3)',
-    'thal': 'Thalassemia (0-3)'
+# Results missing from disk are otherwise computed when their endpoint is first requested
+analysis_caches = (partial_dependence_cache, permutation_importance_cache, cross_validation_cache)
+if ANALYSIS_ON_STARTUP:
+    for cache in analysis_caches:
+        cache.refresh(registry)
+
+# Reloads the models when their artifacts change (or on POST /models/reload). A new
+# version is checked on a canary batch and swapped in atomically; each request reads
+# registry.current once, so requests in flight finish on the version they started with
+model_manager = ModelManager(registry)
+if ANALYSIS_ON_STARTUP:
+    for cache in analysis_caches:
+        model_manager.add_listener(cache.refresh)
+model_manager.start()
+
+# Per-route and per-stage latency histograms and request counters, served on /metrics
+metrics = Metrics()
+
+
+def collect_metrics():
+    """
+    Counters and gauges other components keep, read when /metrics is scraped
+    """
+    models = registry.current
+    yield 'heart_api_model_info', 'gauge', 'Version of the models being served', [({'version': models.version or ''}, 1)]
+    yield 'heart_api_models_loaded', 'gauge', 'Number of models being served', [({}, len(models.predictors))]
+    yield ('heart_api_model_reloads_total', 'counter', 'Model reloads by outcome',
+           [({'status': status}, count) for status, count in model_manager.reloads.items()])
+
+    cache = registry.cache.stats()
+    yield 'heart_api_prediction_cache_entries', 'gauge', 'Entries in the prediction cache', [({}, cache['size'])]
+    for key in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        yield f'heart_api_prediction_cache_{key}_total', 'counter', f'Prediction cache {key}', [({}, cache[key])]
+
+    queue = history_writer.stats()
+    yield 'heart_api_history_queue_depth', 'gauge', 'Records waiting in the history write-behind queue', [
+        ({}, queue['queued'] + queue['in_flight'])]
+    for key in ('submitted', 'written', 'dropped', 'spilled', 'failed'):
+        yield f'heart_api_history_records_{key}_total', 'counter', f'History records {key}', [({}, queue[key])]
+
+
+metrics.add_collector(collect_metrics)
+
+# Opt-in sampling profiler; toggled and downloaded through /profile
+profiler = SamplingProfiler(PROFILE_SAMPLE_RATE, PROFILE_INTERVAL, enabled=PROFILE_ENABLED)
+
+
+@app.before_request
+def start_request_timer():
+    rule = request.url_rule
+    route = rule.rule if rule is not None else 'unmatched'
+    metrics.start_request(route, request.method)
+    if profiler.enabled:
+        profiler.begin(route)
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Whatever ran after the last marked stage, mostly building the JSON response, counts as serialize
+    profiler.end()
+    metrics.finish_request(response.status_code)
+    return response
+
+
+@app.teardown_request
+def discard_request_timer(exception=None):
+    # Runs after every request; a no-op once after_request has recorded it, so only a request
+    # that failed before after_request ran is counted here, as a 500
+    profiler.end()
+    metrics.finish_request(500)
+
+def admin_authorized():
+    # Admin routes are open unless ADMIN_TOKEN is set
+    return not ADMIN_TOKEN or request.headers.get('Authorization') == f'Bearer {ADMIN_TOKEN}'
+
+# Confidence shown next to each model's prediction in the ensemble breakdown
+MODEL_CONFIDENCE = {
+    RANDOM_FOREST: 0.85,
+    NEURAL_NETWORK: 0.84
 }
 
+# Feature names for the heart disease dataset, in model input order, and what each one means
+feature_names = HEART_SCHEMA.names
+feature_descriptions = HEART_SCHEMA.descriptions
+
+def record_history(data, response_data, inputs):
+    """
+    Queue a scored prediction for the history store when the client asked for
+    it (or auto-recording is on); the request never waits on history I/O
+    """
+    if not (HISTORY_AUTO_RECORD or data.get('save_to_history')):
+        return
+    response_data['history_queued'] = history_writer.submit({
+        'date': response_data.get('timestamp') or datetime.now().isoformat(),
+        'prediction': response_data['prediction'],
+        'probability': response_data['probability'],
+        'risk_level': response_data['risk_level'],
+        'message': response_data.get('message'),
+        'model_version': response_data['model_version'],
+        'inputs': inputs
+    })
+
 # Add a root endpoint for basic testing
 @app.route('/', methods=['GET', 'OPTIONS'])
 def home():
@@ -85,11 +171,23 @@ def home():
         'message': 'Heart Disease Prediction API is running',
         'endpoints': {
             '/predict': 'POST - Make a heart disease prediction',
+            '/predict/batch': 'POST - Score a batch of patients (JSON array, CSV or NDJSON)',
+            '/predict/sweep': 'POST - Risk curve or grid over one or two features of a base patient',
             '/predict/ensemble': 'POST - Get ensemble prediction',
-            '/history': 'GET - Get prediction history, POST - Save prediction',
+            '/history': 'GET - Get prediction history (limit, cursor, start, end, risk_level), POST - Save prediction(s)',
+            '/history/<id>': 'GET - Get a history entry, DELETE - Delete a history entry',
+            '/history/queue': 'GET - Get write-behind history queue statistics',
             '/models/feature-importance': 'GET - Get feature importance data',
-            '/models/comparison': 'GET - Get model comparison data',
-            '/health-info': 'GET - Get health information'
+            '/models/comparison': 'GET - Cross-validated metrics of each candidate model',
+            '/models/partial-dependence': 'GET - Partial dependence (feature, ice=true for ICE curves)',
+            '/models/permutation-importance': 'GET - Permutation importance of each model (model)',
+            '/health-info': 'GET - Get health information',
+            '/cache/stats': 'GET - Get prediction cache statistics',
+            '/profile': 'GET - Profiler status, POST - Enable/disable sampling (enabled, sample_rate, interval_ms), DELETE - Reset',
+            '/profile/collapsed': 'GET - Sampled stacks in collapsed (flamegraph) format',
+            '/metrics': 'GET - Request latency, cache, queue and model metrics (Prometheus text format)',
+            '/models/reload': 'GET - Model version and reload status, POST - Reload changed model artifacts',
+            '/ready': 'GET - Readiness probe (200 once models are loaded)'
         }
     })
 
@@ -99,36 +197,161 @@ def predict():
     if request.method == 'OPTIONS':
         return make_response('', 200)
     
+    # The models this request is scored with, even if a reload swaps them meanwhile
+    models = registry.current
+
     # Check if model and scaler are loaded
-    if model is None or scaler is None:
+    if registry.get(RANDOM_FOREST, models) is None:
         return jsonify({
             'error': 'Model or scaler not loaded. Please check server logs.'
         }), 500
     
     # Handle the actual POST request
+    data = request.json
+    mark('parse')
     try:
-        data = request.json
-        # Only extract the expected features in the correct order
-        input_data = []
-        for feature in feature_names:
-            input_data.append(data.get(feature, 0))
-        
-        # Scale the input data
-        scaled_data = scaler.transform(pd.DataFrame([input_data], columns=feature_names))
+        # Every feature is required; the row comes back in model input order
+        input_data = HEART_SCHEMA.decode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    mark('validate')
 
+    try:
+        # Scale and score the row with a single forest evaluation (cached per model version)
+        result = registry.predict(RANDOM_FOREST, input_data, models)
+        mark('model')
         
-        # Make prediction
-        prediction = model.predict(scaled_data)
-        probability = model.predict_proba(scaled_data)[0][1]  # Probability of class 1
-        
-        return jsonify({
-            'prediction': int(prediction[0]),
-            'probability': float(probability),
-            'risk_level': 'High Risk' if probability > 0.7 else 'Moderate Risk' if probability > 0.3 else 'Low Risk',
+        inputs = dict(zip(feature_names, input_data.tolist()))
+        response_data = {
+            'prediction': result.prediction,
+            'probability': result.probability,
+            'risk_level': result.risk_level,
+            'model_version': models.version,
             'timestamp': datetime.now().isoformat(),
-            'inputs': {
-                feature: value for feature, value in zip(feature_names, input_data)
-            }
+            'inputs': inputs
+        }
+        record_history(data, response_data, inputs)
+        mark('history')
+        return jsonify(response_data)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict/batch', methods=['POST', 'OPTIONS'])
+def predict_batch():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    # The models this request is scored with, even if a reload swaps them meanwhile
+    models = registry.current
+    predictor = registry.get(RANDOM_FOREST, models)
+
+    # Check if model and scaler are loaded
+    if predictor is None:
+        return jsonify({
+            'error': 'Model or scaler not loaded. Please check server logs.'
+        }), 500
+
+    try:
+        records = parse_batch_records(request.get_data(), request.content_type)
+    except ValueError as e:
+        return jsonify({'error': f'Could not parse batch: {e}'}), 400
+    mark('parse')
+
+    if len(records) > MAX_BATCH_SIZE:
+        return jsonify({
+            'error': f'Batch of {len(records)} records exceeds the limit of {MAX_BATCH_SIZE}'
+        }), 413
+
+    try:
+        input_matrix, row_indices, errors = HEART_SCHEMA.decode_many(records)
+        mark('validate')
+
+        results = []
+        if row_indices:
+            # Scale every row in one vectorized pass and score the whole batch with a
+            # single predict_proba call; the class is the argmax of the probabilities
+            predictions, positive, risk_levels = predictor.predict_batch(input_matrix)
+            mark('model')
+
+            results = [
+                {
+                    'index': index,
+                    'prediction': int(prediction),
+                    'probability': float(probability),
+                    'risk_level': str(risk_level)
+                }
+                for index, prediction, probability, risk_level
+                in zip(row_indices, predictions, positive, risk_levels)
+            ]
+
+        return jsonify({
+            'count': len(records),
+            'scored': len(results),
+            'failed': len(errors),
+            'results': results,
+            'errors': errors,
+            'model_version': models.version,
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/predict/sweep', methods=['POST', 'OPTIONS'])
+def predict_sweep():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    # The models this request is scored with, even if a reload swaps them meanwhile
+    models = registry.current
+    predictor = registry.get(RANDOM_FOREST, models)
+
+    # Check if model and scaler are loaded
+    if predictor is None:
+        return jsonify({
+            'error': 'Model or scaler not loaded. Please check server logs.'
+        }), 500
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object with "axes" and "base"'}), 400
+    mark('parse')
+    try:
+        axes = parse_sweep_axes(data.get('axes'), HEART_SCHEMA)
+        base = data.get('base')
+        if isinstance(base, dict):
+            # The base patient may leave out a swept feature; it then starts at its first grid value
+            base = {**{feature_names[column]: values[0] for column, values in axes}, **base}
+        base_values = HEART_SCHEMA.decode(base)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    mark('validate')
+
+    points = int(np.prod([values.size for _, values in axes]))
+    if points > MAX_SWEEP_POINTS:
+        return jsonify({
+            'error': f'Sweep of {points} points exceeds the limit of {MAX_SWEEP_POINTS}'
+        }), 413
+
+    try:
+        # Every grid point is a row of one matrix, scaled and scored in a single pass
+        matrix = sweep_matrix(base_values, axes)
+        mark('grid')
+        _, positive, _ = predictor.predict_batch(matrix)
+        base_result = registry.predict(RANDOM_FOREST, base_values, models)
+        mark('model')
+
+        return jsonify({
+            'base': dict(zip(feature_names, base_values.tolist())),
+            'base_probability': base_result.probability,
+            'axes': [
+                {'feature': feature_names[column], 'values': values.tolist()}
+                for column, values in axes
+            ],
+            # Nested by axis: probabilities[i][j] is the point (axes[0][i], axes[1][j])
+            'probabilities': positive.reshape([values.size for _, values in axes]).tolist(),
+            'model_version': models.version
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -140,80 +363,85 @@ def history():
         return make_response('', 200)
         
     if request.method == 'GET':
-        # This would typically fetch from a database
-        # For now, return a sample response
-        sample_history = [
-            {
-                'id': '1',
-                'date': '2023-03-31T10:30:00',
-                'prediction': 1,
-                'probability': 0.85,
-                'risk_level': 'High Risk',
-                'inputs': {
-                    'age': 65,
-                    'sex': 1,
-                    'cp': 3,
-                    'trestbps': 140,
-                    'chol': 250,
-                    'fbs': 1,
-                    'restecg': 0,
-                    'thalach': 120,
-                    'exang': 1,
-                    'oldpeak': 2.5,
-                    'slope': 0,
-                    'ca': 2,
-                    'thal': 2
-                }
-            },
-            {
-                'id': '2',
-                'date': '2023-03-30T15:45:00',
-                'prediction': 0,
-                'probability': 0.25,
-                'risk_level': 'Low Risk',
-                'inputs': {
-                    'age': 42,
-                    'sex': 0,
-                    'cp': 0,
-                    'trestbps': 120,
-                    'chol': 180,
-                    'fbs': 0,
-                    'restecg': 0,
-                    'thalach': 160,
-                    'exang': 0,
-                    'oldpeak': 0.5,
-                    'slope': 1,
-                    'ca': 0,
-                    'thal': 1
-                }
-            }
-        ]
-        return jsonify(sample_history)
+        try:
+            records, next_cursor = history_store.list(
+                limit=request.args.get('limit', DEFAULT_PAGE_SIZE),
+                cursor=request.args.get('cursor'),
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                risk_level=request.args.get('risk_level')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # The body stays a plain list for existing clients; the cursor for the
+        # next (older) page is returned in a header
+        response = jsonify(records)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     elif request.method == 'POST':
         try:
-            data = request.json
-            # In a real app, you would save this to a database
-            # For now, just return success
-            return jsonify({'success': True, 'message': 'History saved successfully'})
+            data = request.get_json(silent=True)
+            if data is None:
+                return jsonify({'error': 'Expected a JSON history record or list of records'}), 400
+            records = data if isinstance(data, list) else [data]
+            for index, record in enumerate(records):
+                if not isinstance(record, dict):
+                    return jsonify({'error': f'History record {index} must be an object'}), 400
+                # Saved predictions come from the ensemble, which uses the finer risk bands
+                if record.get('risk_level') is None and record.get('probability') is not None:
+                    try:
+                        record['risk_level'] = ensemble_risk_level(float(record['probability']))
+                    except (TypeError, ValueError):
+                        return jsonify({'error': f'Invalid history record {index}: probability must be a number'}), 400
+            ids = history_store.add_many(records)
+
+            if isinstance(data, list):
+                return jsonify({'success': True, 'message': f'{len(ids)} history entries saved', 'ids': ids})
+            return jsonify({
+                'success': True,
+                'message': 'History saved successfully',
+                'id': ids[0],
+                'record': history_store.get(ids[0])
+            })
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     elif request.method == 'DELETE':
-        try:
-            # In a real app, you would delete from a database
-            # For now, just return success
-            return jsonify({'success': True, 'message': 'History entry deleted successfully'})
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        data = request.get_json(silent=True) or {}
+        record_id = request.args.get('id', data.get('id'))
+        if record_id is None:
+            return jsonify({'error': 'An id is required to delete a history entry'}), 400
+        return delete_history_item(str(record_id))
+
+@app.route('/history/queue', methods=['GET', 'OPTIONS'])
+def history_queue():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    return jsonify(history_writer.stats())
 
-@app.route('/history/<id>', methods=['DELETE', 'OPTIONS'])
+@app.route('/history/<id>', methods=['GET', 'DELETE', 'OPTIONS'])
 def delete_history_item(id):
     # Handle OPTIONS request for CORS preflight
     if request.method == 'OPTIONS':
         return make_response('', 200)
-        
+
+    if not id.isdigit():
+        return jsonify({'error': f'History entry {id} not found'}), 404
+
     try:
-        # In a real app, you would delete from a database
-        # For now, just return success
+        if request.method == 'GET':
+            record = history_store.get(int(id))
+            if record is None:
+                return jsonify({'error': f'History entry {id} not found'}), 404
+            return jsonify(record)
+
+        if not history_store.delete(int(id)):
+            return jsonify({'error': f'History entry {id} not found'}), 404
         return jsonify({'success': True, 'message': f'History entry {id} deleted successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -224,6 +452,8 @@ def feature_importance():
     if request.method == 'OPTIONS':
         return make_response('', 200)
         
+    predictor = registry.get(RANDOM_FOREST)
+    model = predictor.model if predictor is not None else None
     try:
         # If your model is a scikit-learn model with feature_importances_
         if hasattr(model, 'feature_importances_'):
@@ -252,48 +482,212 @@ def feature_importance():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/models/partial-dependence', methods=['GET', 'OPTIONS'])
+def partial_dependence():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    models = registry.current
+    if registry.get(RANDOM_FOREST, models) is None:
+        return jsonify({
+            'error': 'Model or scaler not loaded. Please check server logs.'
+        }), 500
+
+    tables = partial_dependence_cache.get(models.version)
+    mark('lookup')
+    if tables is None:
+        # Not computed for this model version yet; make sure a job is running
+        partial_dependence_cache.refresh(models)
+        return jsonify({'status': 'computing', 'model_version': models.version}), 202
+
+    feature = request.args.get('feature')
+    if feature is not None and feature not in tables:
+        return jsonify({'error': f'Unknown feature: {feature}'}), 404
+    include_ice = request.args.get('ice', 'false').lower() == 'true'
+
+    features_data = []
+    for name in ([feature] if feature else feature_names):
+        grid, average, ice = tables[name]
+        entry = {
+            'feature': name,
+            'description': feature_descriptions.get(name, ''),
+            'grid': grid.tolist(),
+            'average': average.tolist()
+        }
+        if include_ice:
+            # One curve per patient in the dataset, aligned with grid
+            entry['ice'] = ice.tolist()
+        features_data.append(entry)
+
+    return jsonify({'model_version': models.version, 'features': features_data})
+
+@app.route('/models/permutation-importance', methods=['GET', 'OPTIONS'])
+def permutation_importance():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    models = registry.current
+    if not models.predictors:
+        return jsonify({
+            'error': 'Models not loaded. Please check server logs.'
+        }), 500
+
+    result = permutation_importance_cache.get(models.version)
+    mark('lookup')
+    if result is None:
+        # Not computed for this model version yet; make sure a job is running
+        permutation_importance_cache.refresh(models)
+        return jsonify({'status': 'computing', 'model_version': models.version}), 202
+
+    name = request.args.get('model')
+    if name is not None and name not in result['models']:
+        return jsonify({'error': f'Unknown model: {name}'}), 404
+
+    models_data = []
+    for model_name in ([name] if name else result['models']):
+        scores = result['models'][model_name]
+        features_data = [
+            {
+                'feature': feature,
+                'importance': score['mean'],
+                'std': score['std'],
+                'description': feature_descriptions.get(feature, '')
+            }
+            for feature, score in scores['features'].items()
+        ]
+        # Sort by importance (descending)
+        features_data.sort(key=lambda x: x['importance'], reverse=True)
+        models_data.append({
+            'model': model_name,
+            'name': MODEL_DISPLAY_NAMES.get(model_name, model_name),
+            'baseline_score': scores['baseline'],
+            'features': features_data
+        })
+
+    return jsonify({
+        'model_version': models.version,
+        'metric': result['metric'],
+        'repeats': result['repeats'],
+        'n_samples': result['n_samples'],
+        'models': models_data
+    })
+
 @app.route('/models/comparison', methods=['GET', 'OPTIONS'])
 def model_comparison():
     # Handle OPTIONS request for CORS preflight
     if request.method == 'OPTIONS':
         return make_response('', 200)
         
-    # Sample data for model comparison
+    models = registry.current
+    result = cross_validation_cache.get(models.version)
+    mark('lookup')
+    if result is None:
+        # Not evaluated for this model version yet; make sure a job is running
+        cross_validation_cache.refresh(models)
+        return jsonify({'status': 'computing', 'model_version': models.version}), 202
+
     models_data = [
-        {
-            'name': 'Random Forest',
-            'accuracy': 0.85,
-            'precision': 0.83,
-            'recall': 0.82,
-            'f1_score': 0.82,
-            'auc': 0.90
-        },
-        {
-            'name': 'Logistic Regression',
-            'accuracy': 0.80,
-            'precision': 0.79,
-            'recall': 0.75,
-            'f1_score': 0.77,
-            'auc': 0.85
-        },
-        {
-            'name': 'Support Vector Machine',
-            'accuracy': 0.82,
-            'precision': 0.81,
-            'recall': 0.78,
-            'f1_score': 0.79,
-            'auc': 0.87
-        },
-        {
-            'name': 'Neural Network',
-            'accuracy': 0.84,
-            'precision': 0.82,
-            'recall': 0.81,
-            'f1_score': 0.81,
-            'auc': 0.89
-        }
+        {'model': name, 'name': display_name, **result['models'][name]}
+        for name, display_name in CANDIDATES.items()
+        if name in result['models']
     ]
-    return jsonify(models_data)
+    return jsonify({
+        'model_version': models.version,
+        'folds': result['folds'],
+        'n_samples': result['n_samples'],
+        'models': models_data
+    })
+
+@app.route('/models/reload', methods=['GET', 'POST', 'OPTIONS'])
+def reload_models():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    if request.method == 'GET':
+        return jsonify(model_manager.status())
+
+    if not admin_authorized():
+        return jsonify({'error': 'A valid admin token is required to reload the models'}), 401
+
+    # Loads and validates next to the serving models; other requests are not held up
+    result = model_manager.reload()
+    return jsonify(result), 422 if result['status'] == 'rejected' else 200
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profile', methods=['GET', 'POST', 'DELETE', 'OPTIONS'])
+def profile():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    if not admin_authorized():
+        return jsonify({'error': 'A valid admin token is required to use the profiler'}), 401
+    if request.method == 'GET':
+        return jsonify(profiler.status())
+
+    if request.method == 'DELETE':
+        profiler.reset()
+        return jsonify(profiler.status())
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object of profiler settings'}), 400
+    # Only JSON booleans: bool() would read the string "false" as true
+    for key in ('enabled', 'reset'):
+        if data.get(key) is not None and not isinstance(data[key], bool):
+            return jsonify({'error': f'"{key}" must be true or false'}), 400
+    try:
+        interval_ms = data.get('interval_ms')
+        profiler.configure(
+            enabled=data.get('enabled'),
+            sample_rate=None if data.get('sample_rate') is None else float(data['sample_rate']),
+            interval=None if interval_ms is None else float(interval_ms) / 1000
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if data.get('reset'):
+        profiler.reset()
+    return jsonify(profiler.status())
+
+@app.route('/profile/collapsed', methods=['GET'])
+def profile_collapsed():
+    # The stacks reveal code paths and request routes, so they are as protected as the controls
+    if not admin_authorized():
+        return jsonify({'error': 'A valid admin token is required to use the profiler'}), 401
+    # Render with e.g. flamegraph.pl profile.txt > profile.svg, or load into speedscope
+    response = app.response_class(profiler.collapsed(), mimetype='text/plain')
+    response.headers['Content-Disposition'] = 'attachment; filename=profile.collapsed.txt'
+    return response
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Readiness probe: only healthy once the primary model is loaded
+    models = registry.current
+    if registry.get(RANDOM_FOREST, models) is None:
+        return jsonify({'status': 'not ready', 'models': sorted(models.predictors)}), 503
+    return jsonify({
+        'status': 'ready',
+        'models': sorted(models.predictors),
+        'model_version': models.version
+    })
+
+@app.route('/cache/stats', methods=['GET', 'OPTIONS'])
+def cache_stats():
+    # Handle OPTIONS request for CORS preflight
+    if request.method == 'OPTIONS':
+        return make_response('', 200)
+
+    stats = registry.cache.stats()
+    stats['model_version'] = registry.version
+    return jsonify(stats)
 
 @app.route('/health-info', methods=['GET', 'OPTIONS'])
 def health_info():
@@ -363,47 +757,37 @@ def predict_ensemble():
     if request.method == 'OPTIONS':
         return make_response('', 200)
     
+    # The models this request is scored with, even if a reload swaps them meanwhile
+    models = registry.current
+
     # Check if model and scaler are loaded
-    if model is None or scaler is None:
+    if registry.get(RANDOM_FOREST, models) is None:
         return jsonify({
             'error': 'Model or scaler not loaded. Please check server logs.'
         }), 500
     
+    data = request.json
+    mark('parse')
     try:
-        data = request.json
-        # Only extract the expected features in the correct order
-        input_data = []
-        for feature in feature_names:
-            input_data.append(data.get(feature, 0))
-        
-        # Scale the input data
-        scaled_data = scaler.transform(pd.DataFrame([input_data], columns=feature_names))
+        # Every feature is required; the row comes back in model input order
+        input_data = HEART_SCHEMA.decode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    mark('validate')
 
+    try:
+        # Evaluate the Random Forest and Neural Network concurrently
+        results = registry.predict_all(input_data, models=models)
+        mark('model')
+        rf_result = results[RANDOM_FOREST]
+        nn_result = results.get(NEURAL_NETWORK)
         
-        # Make prediction with main model (Random Forest)
-        rf_prediction = model.predict(scaled_data)[0]
-        rf_probability = model.predict_proba(scaled_data)[0][1]
-        
-        # Simulate Neural Network prediction (in a real app, you'd load a separate model)
-        # Here we're adding a small random variation to the main model's prediction
-        nn_probability = max(0.0, min(1.0, rf_probability + np.random.normal(-0.05, 0.05)))
-        nn_prediction = 1 if nn_probability > 0.5 else 0
-        
-        # Calculate ensemble prediction (weighted average)
-        ensemble_probability = (rf_probability * 0.6) + (nn_probability * 0.4)  # 60/40 weight
+        # Calculate ensemble prediction (weighted average of the loaded models)
+        ensemble_probability = registry.ensemble_probability(results)
         ensemble_prediction = 1 if ensemble_probability > 0.5 else 0
         
         # Determine risk level
-       # Determine risk level
-        if ensemble_probability < 0.2:
-            risk_level = "Low Risk"
-        elif ensemble_probability < 0.4:
-            risk_level = "Moderate Risk"
-        elif ensemble_probability < 0.7:
-            risk_level = "High Risk"
-        else:
-            risk_level = "Very High Risk"
-
+        risk_level = ensemble_risk_level(ensemble_probability)
         
         # Create appropriate message
         if ensemble_prediction == 1:
@@ -414,31 +798,30 @@ def predict_ensemble():
         # Create model predictions array for frontend display
         model_predictions = [
             {
-                'model_name': 'Random Forest',
-                'prediction': int(rf_prediction),
-                'probability': float(rf_probability),
-                'confidence': 0.85
-            },
-            {
-                'model_name': 'Neural Network',
-                'prediction': int(nn_prediction),
-                'probability': float(nn_probability),
-                'confidence': 0.84
+                'model_name': MODEL_DISPLAY_NAMES[name],
+                'prediction': result.prediction,
+                'probability': result.probability,
+                'confidence': MODEL_CONFIDENCE[name]
             }
+            for name, result in results.items()
         ]
         
-        return jsonify({
+        response_data = {
             'prediction': int(ensemble_prediction),
             'probability': float(ensemble_probability),
             'risk_level': risk_level,
             'message': message,
-            'rf_prediction': int(rf_prediction),
-            'rf_probability': float(rf_probability),
-            'nn_prediction': int(nn_prediction),
-            'nn_probability': float(nn_probability),
+            'rf_prediction': rf_result.prediction,
+            'rf_probability': rf_result.probability,
+            'nn_prediction': nn_result.prediction if nn_result else None,
+            'nn_probability': nn_result.probability if nn_result else None,
             'model_predictions': model_predictions,
+            'model_version': models.version,
             'timestamp': datetime.now().isoformat()
-        })
+        }
+        record_history(data, response_data, dict(zip(feature_names, input_data.tolist())))
+        mark('history')
+        return jsonify(response_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -448,45 +831,47 @@ def explain_prediction():
     if request.method == 'OPTIONS':
         return make_response('', 200)
     
+    # The models this request is scored with, even if a reload swaps them meanwhile
+    models = registry.current
+    predictor = registry.get(RANDOM_FOREST, models)
+
     # Check if model and scaler are loaded
-    if model is None or scaler is None:
+    if predictor is None:
         return jsonify({
             'error': 'Model or scaler not loaded. Please check server logs.'
         }), 500
     
+    data = request.json
+    mark('parse')
     try:
-        data = request.json
-        # Only extract the expected features in the correct order
-        input_data = []
-        for feature in feature_names:
-            input_data.append(data.get(feature, 0))
-        
-        # Scale the input data
-        scaled_data = scaler.transform(pd.DataFrame([input_data], columns=feature_names))
+        # Every feature is required; the row comes back in model input order
+        input_data = HEART_SCHEMA.decode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    mark('validate')
 
+    try:
+        # Score the patient and attribute the probability to each feature with TreeSHAP
+        explanation = registry.explain(RANDOM_FOREST, input_data, models)
+        mark('explain')
+        if explanation is None:
+            return jsonify({
+                'error': 'Explanations are not available for the loaded model. Please check server logs.'
+            }), 500
+        result = explanation.prediction
+        probability = result.probability
         
-        # Make prediction
-        prediction = model.predict(scaled_data)
-        probability = model.predict_proba(scaled_data)[0][1]
-        
-        # Get feature importance for this prediction
-        if hasattr(model, 'feature_importances_'):
-            importances = model.feature_importances_
-        elif hasattr(model, 'coef_'):
-            importances = np.abs(model.coef_[0])
-        else:
-            importances = [0.08, 0.12, 0.15, 0.05, 0.07, 0.03, 0.04, 0.10, 0.09, 0.08, 0.06, 0.07, 0.06]
+        # Global importance is still reported alongside the per-patient contribution
+        importances = predictor.model.feature_importances_
         
-        # Combine feature values with their importance
         feature_contributions = []
-        for feature, value, importance in zip(feature_names, input_data, importances):
-            # Calculate contribution (simplified approach)
-            contribution = float(value * importance)
+        for feature, value, importance, contribution in zip(
+                feature_names, input_data.tolist(), importances, explanation.contributions):
             feature_contributions.append({
                 'feature': feature,
                 'value': value,
                 'importance': float(importance),
-                'contribution': contribution,
+                'contribution': float(contribution),
                 'description': feature_descriptions.get(feature, '')
             })
         
@@ -497,14 +882,19 @@ def explain_prediction():
         top_features = feature_contributions[:3]
         explanation_text = f"The model predicts {'a high' if probability > 0.7 else 'a medium' if probability > 0.3 else 'a low'} risk of heart disease. "
         explanation_text += "The most important factors in this prediction are: "
-        explanation_text += ", ".join([f"{f['feature']} ({f['description']})" for f in top_features])
+        explanation_text += ", ".join([
+            f"{f['feature']} ({f['description']}, {'raises' if f['contribution'] > 0 else 'lowers'} the risk)"
+            for f in top_features
+        ])
         
         return jsonify({
-            'prediction': int(prediction[0]),
-            'probability': float(probability),
-            'risk_level': 'High Risk' if probability > 0.7 else 'Moderate Risk' if probability > 0.3 else 'Low Risk',
+            'prediction': result.prediction,
+            'probability': result.probability,
+            'risk_level': result.risk_level,
+            'base_value': explanation.expected_value,
             'explanation': explanation_text,
-            'feature_contributions': feature_contributions
+            'feature_contributions': feature_contributions,
+            'model_version': models.version
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
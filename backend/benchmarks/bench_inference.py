@@ -0,0 +1,73 @@
+"""
+Micro-benchmark for single-row inference.
+
+Compares the original per-request path (DataFrame + scaler.transform +
+model.predict + model.predict_proba) with the shared Predictor, which scales
+into a preallocated row buffer and evaluates the forest once.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_inference
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backend.dataset import load_dataset
+from backend.inference import Predictor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BACKEND_DIR, 'model', 'heart_model.pkl')
+SCALER_PATH = os.path.join(BACKEND_DIR, 'model', 'scaler.pkl')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+def time_calls(func, rows, iterations):
+    """
+    Call func once per row and return the per-call latencies in microseconds
+    """
+    timings = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        func(row)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    scaler = joblib.load(SCALER_PATH)
+    feature_names = list(scaler.feature_names_in_)
+    rows = load_dataset(DATASET_PATH).matrix(feature_names).tolist()
+
+    def legacy(values):
+        scaled = scaler.transform(pd.DataFrame([values], columns=feature_names))
+        prediction = model.predict(scaled)
+        probability = model.predict_proba(scaled)[0][1]
+        return int(prediction[0]), float(probability)
+
+    predictor = Predictor(model, scaler)
+
+    print(f"{'path':<12}{'p50 (us)':>12}{'p99 (us)':>12}")
+    results = {}
+    for name, func in (('legacy', legacy), ('predictor', predictor.predict_one)):
+        time_calls(func, rows, args.warmup)
+        timings = time_calls(func, rows, args.iterations)
+        results[name] = np.percentile(timings, [50, 99])
+        print(f"{name:<12}{results[name][0]:>12.1f}{results[name][1]:>12.1f}")
+
+    speedup = results['legacy'] / results['predictor']
+    print(f"speedup: p50 {speedup[0]:.2f}x, p99 {speedup[1]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Load test for the preforking production server.
+
+Starts `python -m backend.serve` with an increasing number of workers, waits
+for /ready, then drives POST /predict from several client processes over
+keep-alive connections and reports the sustained throughput per worker count.
+
+Run from the project root:
+    python -m backend.benchmarks.load_test --workers 1 2 4 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PATIENTS = [
+    {'age': 52, 'sex': 1, 'cp': 0, 'trestbps': 125, 'chol': 212, 'fbs': 0, 'restecg': 1,
+     'thalach': 168, 'exang': 0, 'oldpeak': 1.0, 'slope': 2, 'ca': 2, 'thal': 3},
+    {'age': 63, 'sex': 1, 'cp': 3, 'trestbps': 145, 'chol': 233, 'fbs': 1, 'restecg': 0,
+     'thalach': 150, 'exang': 0, 'oldpeak': 2.3, 'slope': 0, 'ca': 0, 'thal': 1},
+]
+
+
+def wait_until_ready(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request('GET', '/ready')
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def client(args):
+    """
+    Send requests over one keep-alive connection until the deadline; returns latencies
+    """
+    host, port, path, deadline, seed = args
+    rng = np.random.default_rng(seed)
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    latencies = []
+    while time.time() < deadline:
+        patient = dict(PATIENTS[len(latencies) % len(PATIENTS)])
+        # Vary the age so the prediction cache does not answer every request
+        patient['age'] = int(rng.integers(29, 78))
+        body = json.dumps(patient)
+        start = time.perf_counter()
+        connection.request('POST', path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status != 200:
+            raise RuntimeError(f'{path} returned {response.status}')
+    return latencies
+
+
+def run_load(host, port, path, clients, duration):
+    deadline = time.time() + duration
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client, [(host, port, path, deadline, seed) for seed in range(clients)])
+    latencies = np.concatenate([np.asarray(r) for r in results]) * 1000
+    return len(latencies) / duration, np.percentile(latencies, [50, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--clients', type=int, default=None, help='client processes (default 2 x workers)')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--path', default='/predict')
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    host = '127.0.0.1'
+    print(f"{'workers':>8}{'clients':>9}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'backend.serve', '--workers', str(workers),
+             '--threads', str(args.threads), '--bind', f'{host}:{args.port}'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            env=dict(os.environ, PREDICTION_CACHE_SIZE='0'))
+        try:
+            if not wait_until_ready(host, args.port):
+                raise RuntimeError(f'Server with {workers} worker(s) did not become ready')
+            clients = args.clients or 2 * workers
+            throughput, (p50, p99) = run_load(host, args.port, args.path, clients, args.duration)
+            print(f"{workers:>8}{clients:>9}{throughput:>10.1f}{p50:>9.2f}{p99:>9.2f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
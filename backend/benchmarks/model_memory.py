@@ -0,0 +1,102 @@
+"""
+Per-process memory of the loaded serving models, with and without mmap.
+
+Starts N independent (spawned, not forked) processes that each load the model
+registry, waits until all of them have loaded, and reports from
+/proc/<pid>/smaps_rollup how much each one grew while loading:
+  rss      resident pages added by the load
+  private  of which anonymous/private (a full copy per process)
+  pss      proportional set size after all N loaded; shared pages are split N ways
+
+Run from the project root (Linux only):
+    python -m backend.benchmarks.model_memory --processes 4
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import time
+
+
+def memory_kb():
+    """
+    Return the smaps_rollup counters of this process in kB
+    """
+    counters = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                counters[parts[0].rstrip(':')] = int(parts[1])
+    return counters
+
+
+def private_kb(counters):
+    return counters.get('Private_Clean', 0) + counters.get('Private_Dirty', 0)
+
+
+def load_worker(mmap, raw, barrier, results):
+    # Settings are read when backend.config is imported, so set them first
+    os.environ['MMAP_MODELS'] = 'true' if mmap else 'false'
+    os.environ['RAW_FEATURE_MODELS'] = 'true' if raw else 'false'
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    import numpy as np
+
+    # Import the libraries the models unpickle into before measuring
+    for module in ('sklearn.ensemble', 'sklearn.neural_network'):
+        importlib.import_module(module)
+
+    from backend.model_registry import ModelRegistry
+
+    before = memory_kb()
+    start = time.perf_counter()
+    registry = ModelRegistry().load()
+    # Score every row once so the mapped pages the models touch are resident
+    for predictor in registry.predictors.values():
+        predictor.predict_batch(np.random.default_rng(0).uniform(0, 300, size=(1024, 13)))
+    load_seconds = time.perf_counter() - start
+    after = memory_kb()
+
+    barrier.wait()
+    shared = memory_kb()
+    results.put({
+        'load_ms': load_seconds * 1000,
+        'rss': after['Rss'] - before['Rss'],
+        'private': private_kb(after) - private_kb(before),
+        'pss': shared['Pss'] - before['Pss'],
+    })
+    barrier.wait()
+
+
+def measure(processes, mmap, raw):
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(processes)
+    results = context.Queue()
+    workers = [context.Process(target=load_worker, args=(mmap, raw, barrier, results))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    rows = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return {key: sum(row[key] for row in rows) / len(rows) for key in rows[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--sklearn', action='store_true',
+                        help='load the sklearn pickles instead of the raw-feature exports')
+    args = parser.parse_args()
+
+    raw = not args.sklearn
+    print(f"{args.processes} processes, {'raw-feature' if raw else 'sklearn'} artifacts; per-process averages")
+    print(f"{'mode':<8}{'load ms':>10}{'rss kB':>10}{'private kB':>12}{'pss kB':>10}")
+    for mmap in (False, True):
+        result = measure(args.processes, mmap, raw)
+        print(f"{'mmap' if mmap else 'copy':<8}{result['load_ms']:>10.1f}{result['rss']:>10.0f}"
+              f"{result['private']:>12.0f}{result['pss']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
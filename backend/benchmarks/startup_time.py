@@ -0,0 +1,136 @@
+"""
+Cold-start time of the API process.
+
+Starts a fresh interpreter with `python -X importtime` that imports
+backend.app (which also loads the models), several times, and reports:
+  wall      time from process start to backend.app being imported (median)
+  import    cumulative time of `import backend.app` as reported by importtime
+  modules   the slowest top-level imports, and which heavy packages
+            (pandas, sklearn, scipy, tensorflow, matplotlib, seaborn) were
+            loaded at all; the lightweight runtime needs none of them
+
+The interpreter exits with os._exit right after the import, so the wall time
+does not include waiting for background threads. With ANALYSIS_ON_STARTUP the
+app starts analysis jobs that import in threads while backend.app is still
+being imported, which skews the nesting importtime reports, so backend.app
+is looked up by name rather than at the top level.
+
+The 1 s target applies to the lightweight runtime (--mode lightweight, the
+default): RAW_FEATURE_MODELS and USE_COMPILED_MLP are set for the child
+process, so the forest is unpickled as a CompiledForest and the MLP is read
+from its .npz export, and the API starts without sklearn or pandas. Those
+artifacts are generated; export them first with `python -m backend.raw_models`
+and `python -m backend.compiled_mlp`. With --mode default the models are the
+sklearn pickles the app serves when neither flag is set; unpickling them
+imports sklearn (and with it pandas and SciPy), which alone takes longer than
+the target, so that mode is only reported unless --target is given.
+
+Exits with status 1 if the median wall time is over the target or, in the
+lightweight mode, if a heavy package was imported.
+
+Run from the project root:
+    python -m backend.benchmarks.startup_time --runs 5
+    python -m backend.benchmarks.startup_time --mode default
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from backend.config import NN_COMPILED_PATH, RF_RAW_MODEL_PATH
+
+# Serving settings of each mode, set in the environment of the measured process
+MODES = {
+    'lightweight': {'RAW_FEATURE_MODELS': 'true', 'USE_COMPILED_MLP': 'true'},
+    'default': {'RAW_FEATURE_MODELS': 'false', 'USE_COMPILED_MLP': 'false'},
+}
+# Seconds; the startup target of the lightweight runtime
+LIGHTWEIGHT_TARGET = 1.0
+
+HEAVY_PACKAGES = ('pandas', 'sklearn', 'scipy', 'tensorflow', 'matplotlib', 'seaborn')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """
+    Return [(module, cumulative microseconds, nesting depth)] in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, module = match.groups()
+            rows.append((module, int(cumulative), (len(indent) - 1) // 2))
+    return rows
+
+
+def cold_start(module, env):
+    """
+    Import module in a new interpreter; return (wall seconds, importtime rows)
+    """
+    start = time.perf_counter()
+    # os._exit: do not wait for background threads and process pools started by the import
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import os, {module}; os._exit(0)'],
+                             env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+    return wall, parse_importtime(process.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='backend.app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    parser.add_argument('--mode', choices=sorted(MODES), default='lightweight',
+                        help='serving runtime to start (default: lightweight)')
+    parser.add_argument('--target', type=float, default=None,
+                        help=f'seconds (default: {LIGHTWEIGHT_TARGET} in the lightweight mode, none otherwise)')
+    args = parser.parse_args()
+    target = LIGHTWEIGHT_TARGET if args.target is None and args.mode == 'lightweight' else args.target
+
+    if args.mode == 'lightweight':
+        missing = [path for path in (RF_RAW_MODEL_PATH, NN_COMPILED_PATH) if not os.path.exists(path)]
+        if missing:
+            sys.exit(f"Missing {', '.join(missing)}; run python -m backend.raw_models "
+                     f"and python -m backend.compiled_mlp first")
+
+    env = dict(os.environ, **MODES[args.mode])
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.getcwd(), env.get('PYTHONPATH')]))
+    # The first run warms the OS page cache; report the median of the others
+    cold_start(args.module, env)
+    runs = [cold_start(args.module, env) for _ in range(args.runs)]
+    wall = statistics.median(run[0] for run in runs)
+    rows = runs[-1][1]
+    index, (_, total, top) = next((index, row) for index, row in enumerate(rows) if row[0] == args.module)
+
+    print(f"{args.module} ({args.mode} runtime): wall {wall * 1000:.0f} ms (median of {args.runs}), "
+          f"import {total / 1000:.0f} ms")
+    print(f"\nSlowest imports directly under {args.module}:")
+    children = [(module, cumulative) for module, cumulative, depth in rows[:index] if depth == top + 1]
+    for module, cumulative in sorted(children, key=lambda row: -row[1])[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {module}")
+
+    print("\nHeavy packages loaded:")
+    loaded = {module: cumulative for module, cumulative, _ in rows if module in HEAVY_PACKAGES}
+    for package in HEAVY_PACKAGES:
+        status = f"{loaded[package] / 1000:.1f} ms" if package in loaded else 'not imported'
+        print(f"  {package:<12}{status}")
+
+    if target is None:
+        return
+    passed = wall <= target
+    if args.mode == 'lightweight' and loaded:
+        print(f"\nFAIL: the lightweight runtime imported {', '.join(sorted(loaded))}")
+        sys.exit(1)
+    print(f"\n{'PASS' if passed else 'FAIL'}: target {target:.2f} s")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark suite for the scoring, explanation and history paths.
+
+Drives the Flask app through its test client and calls the inference code
+directly, with synthetic patients drawn from the per-feature distributions
+of dataset/heart.csv:
+  predict_one            Predictor.predict_one, one row per call (Random Forest)
+  http_predict           POST /predict
+  http_ensemble          POST /predict/ensemble
+  http_explain           POST /predict/explain
+  predict_batch_<n>      Predictor.predict_batch on n rows
+  http_batch_<n>         POST /predict/batch with n records (up to MAX_BATCH_SIZE)
+  history_write_<n>      HistoryStore.add_many of n records, 1000 per call
+  history_read_<n>       GET /history pages walked by cursor over those n records
+
+Every scenario reports p50/p95/p99 latency per call in milliseconds,
+throughput (calls or rows per second) and the peak RSS of the process after
+it ran. The app is imported with the prediction cache and the model watcher
+off and a temporary history database, so every request runs the models and
+nothing is left behind; startup analysis jobs are awaited before measuring.
+
+Results are written as JSON to --output. They are compared with --baseline:
+a scenario regresses if its p95 latency grew, or its throughput fell, by
+more than --tolerance (latency changes under --min-delta-ms are noise).
+Regressions are listed and the exit status is 1. --save-baseline stores
+the results as the new baseline instead. Baselines only compare runs on
+the same machine.
+
+Run from the project root:
+    python -m backend.benchmarks.suite --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), 'dataset', 'heart.csv')
+
+# Histories are written in calls of this many records
+HISTORY_WRITE_BATCH = 1000
+
+
+def synthetic_patients(n, seed=0, path=DATASET_PATH):
+    """
+    Return (feature names, n x 13 matrix) of patients whose features are drawn
+    independently from each column's distribution in the dataset. Columns
+    with many distinct values are jittered by 5% of their spread, clipped to
+    the observed range and rounded like the originals.
+    """
+    # Imported here: backend.config reads the environment that import_app sets up
+    from backend.dataset import load_dataset
+
+    data, _, features = load_dataset(path).features()
+    rng = np.random.default_rng(seed)
+
+    patients = np.empty((n, len(features)))
+    for index in range(len(features)):
+        observed = data[:, index]
+        values = rng.choice(observed, size=n)
+        if len(np.unique(observed)) > 10:
+            values = np.clip(values + rng.normal(0.0, 0.05 * observed.std(), size=n), observed.min(), observed.max())
+            decimals = 0 if np.all(observed == np.round(observed)) else 1
+            values = np.round(values, decimals)
+        patients[:, index] = values
+    return features, patients
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is in kB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(timings, rows_per_call=1):
+    """
+    Latency percentiles (ms) and throughput for per-call timings in seconds
+    """
+    timings = np.asarray(timings)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+    return {
+        'calls': len(timings),
+        'rows_per_call': rows_per_call,
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'throughput': round(float(len(timings) * rows_per_call / timings.sum()), 1),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def time_calls(func, args, warmup=0):
+    """
+    Call func(arg) for every arg and return the per-call times in seconds
+    """
+    for arg in args[:warmup]:
+        func(arg)
+    timings = np.empty(len(args))
+    for index, arg in enumerate(args):
+        start = time.perf_counter()
+        func(arg)
+        timings[index] = time.perf_counter() - start
+    return timings
+
+
+def repeats_for(rows):
+    # Enough calls for stable percentiles without running 10^6-row batches 20 times
+    return max(3, min(20, 100000 // rows))
+
+
+def import_app(history_db_path):
+    # Settings are read when backend.config is first imported, so set them before any backend import
+    os.environ['PREDICTION_CACHE_SIZE'] = '0'
+    os.environ['MODEL_RELOAD_INTERVAL'] = '0'
+    os.environ['HISTORY_DB_PATH'] = history_db_path
+    import backend.app as app_module
+
+    # Analysis jobs started at import would compete with the measurements
+    for cache in (app_module.partial_dependence_cache, app_module.permutation_importance_cache,
+                  app_module.cross_validation_cache):
+        cache.wait()
+    return app_module
+
+
+def run_suite(requests, sizes, seed=0):
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as tmp_dir:
+        app_module = import_app(os.path.join(tmp_dir, 'app_history.db'))
+        feature_names, patients = synthetic_patients(max([requests] + list(sizes)), seed)
+        records = [dict(zip(feature_names, row)) for row in patients[:requests].tolist()]
+        from backend.config import MAX_BATCH_SIZE
+        from backend.history_store import HistoryStore
+        from backend.model_registry import RANDOM_FOREST
+
+        client = app_module.app.test_client()
+        predictor = app_module.registry.get(RANDOM_FOREST)
+
+        def scenario(name, result):
+            results[name] = result
+            print(f"{name:<26}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+                  f"{result['throughput']:>14.1f}{result['peak_rss_mb'] or 0:>10.1f}")
+
+        print(f"{'scenario':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per second':>14}{'RSS MB':>10}")
+        rows = patients[:requests].tolist()
+        scenario('predict_one', summarize(time_calls(predictor.predict_one, rows, warmup=50)))
+        for name, path in (('http_predict', '/predict'), ('http_ensemble', '/predict/ensemble'),
+                           ('http_explain', '/predict/explain')):
+            scenario(name, summarize(time_calls(lambda record: client.post(path, json=record), records, warmup=20)))
+
+        for size in sorted(sizes):
+            matrix = np.ascontiguousarray(patients[:size])
+            scenario(f'predict_batch_{size}',
+                     summarize(time_calls(predictor.predict_batch, [matrix] * repeats_for(size), warmup=1), size))
+            if size <= MAX_BATCH_SIZE:
+                body = [dict(zip(feature_names, row)) for row in patients[:size].tolist()]
+                scenario(f'http_batch_{size}', summarize(
+                    time_calls(lambda batch: client.post('/predict/batch', json=batch), [body] * repeats_for(size),
+                               warmup=1), size))
+
+        for size in sorted(sizes):
+            store = HistoryStore(os.path.join(tmp_dir, f'history_{size}.db'))
+            history = [{
+                'date': datetime.fromtimestamp(1.7e9 + index).isoformat(),
+                'prediction': index % 2,
+                'probability': 0.5,
+                'risk_level': 'Moderate Risk',
+                'model_version': 'benchmark',
+                'inputs': record,
+            } for index, record in enumerate(
+                dict(zip(feature_names, row)) for row in patients[:size].tolist())]
+            chunks = [history[start:start + HISTORY_WRITE_BATCH] for start in range(0, size, HISTORY_WRITE_BATCH)]
+            scenario(f'history_write_{size}', summarize(time_calls(store.add_many, chunks), HISTORY_WRITE_BATCH))
+
+            # Serve this history from the app and walk it page by page from the newest record
+            app_module.history_store = store
+            cursor = [None]
+
+            def read_page(_):
+                response = client.get('/history', query_string={'limit': 100, 'cursor': cursor[0]})
+                cursor[0] = response.headers.get('X-Next-Cursor')
+
+            scenario(f'history_read_{size}', summarize(time_calls(read_page, range(min(requests, size // 100))), 100))
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """
+    Return a list of regression messages for scenarios present in both runs
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if (result['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+                and result['p95_ms'] - previous['p95_ms'] > min_delta_ms):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.3f} -> {result['p95_ms']:.3f} ms")
+        if result['throughput'] < previous['throughput'] / (1 + tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']:.1f} -> {result['throughput']:.1f}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='calls per single-row scenario')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='rows for the batch and history scenarios')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='ignore smaller p95 increases')
+    args = parser.parse_args()
+
+    results = run_suite(args.requests, args.sizes, args.seed)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'requests': args.requests,
+            'sizes': sorted(args.sizes),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\nREGRESSIONS against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Flat, array-based evaluator for a fitted RandomForestClassifier.
+
+All trees of the forest are concatenated into contiguous NumPy arrays
+(feature index, threshold, left/right child, leaf class distribution) and
+evaluated level by level for every (row, tree) pair at once. This avoids
+sklearn's per-call validation and per-tree dispatch, which dominate the cost
+of scoring a 13-feature row. Once enough pairs have reached a leaf they are
+dropped from the next levels, so a batch costs roughly the depth of the
+leaves it reaches rather than max_depth levels for every pair.
+"""
+import numpy as np
+
+# Rows evaluated per traversal block; keeps the (rows, trees) index arrays cache-resident
+BLOCK_ROWS = 512
+
+# Finished pairs are dropped once at most this fraction of the pairs still descends;
+# compacting at every level costs more than advancing the few that finished
+COMPACT_FRACTION = 0.6
+# Below this many (row, tree) pairs, e.g. a single row, checking for finished pairs costs more than it saves
+COMPACT_MIN_PAIRS = 2000
+
+
+class CompiledForest:
+    """
+    Drop-in replacement for RandomForestClassifier.predict_proba/predict.
+
+    Leaves point to themselves and have an infinite threshold, so a pair
+    that is advanced past its leaf stays there, and the thresholds gathered
+    for a level also tell which pairs are done.
+    """
+
+    def __init__(self, feature, threshold, children_left, children_right, value, roots,
+                 max_depth, classes, n_features, feature_importances=None, input_dtype=np.float32,
+                 node_weight=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.feature_importances_ = feature_importances
+        # Weighted training samples reaching each node (the "cover" used by TreeSHAP)
+        self.node_weight = node_weight
+        # Inputs are cast to this dtype before comparing; float32 matches sklearn
+        self.input_dtype = input_dtype
+        # Interleaved (left, right) children so a step is a single gather on 2 * node + go_right
+        self._children = np.ascontiguousarray(np.stack([children_left, children_right], axis=1).ravel())
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        """
+        Flatten the trees of a fitted sklearn forest into one set of arrays
+        """
+        features, thresholds, lefts, rights, values, weights, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves and compare against feature 0
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Normalize leaf counts to class probabilities, as predict_proba does per tree
+            leaf_value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = leaf_value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(leaf_value / normalizer)
+            weights.append(np.asarray(tree.weighted_n_node_samples, dtype=np.float64))
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            children_left=np.ascontiguousarray(np.concatenate(lefts)),
+            children_right=np.ascontiguousarray(np.concatenate(rights)),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+            n_features=forest.n_features_in_,
+            feature_importances=np.asarray(forest.feature_importances_),
+            node_weight=np.ascontiguousarray(np.concatenate(weights)),
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """
+        Return the leaf index (into the flat arrays) reached by each row in each tree
+        """
+        # sklearn evaluates trees on float32 inputs; cast the same way so that
+        # values lying exactly on a split threshold go the same direction
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] <= BLOCK_ROWS:
+            return self._apply_block(X)
+        return np.concatenate([
+            self._apply_block(X[start:start + BLOCK_ROWS])
+            for start in range(0, X.shape[0], BLOCK_ROWS)
+        ])
+
+    def _apply_block(self, X):
+        flat_X = X.ravel()
+        n_trees = len(self.roots)
+        # Current node and row offset of the (row, tree) pairs still traversed
+        nodes = np.tile(self.roots, X.shape[0])
+        row_offsets = np.repeat(np.arange(X.shape[0], dtype=np.int64) * X.shape[1], n_trees)
+        # After the first compaction: the node of every pair, and the positions in it of those still traversed
+        leaves, pairs = None, None
+        for _ in range(self.max_depth):
+            thresholds = self.threshold.take(nodes)
+            if nodes.size >= COMPACT_MIN_PAIRS:
+                descending = thresholds != np.inf
+                compact = np.count_nonzero(descending) <= COMPACT_FRACTION * nodes.size
+            else:
+                compact = False
+            if compact:
+                keep = np.flatnonzero(descending)
+                if pairs is None:
+                    leaves, pairs = nodes, keep
+                else:
+                    leaves[pairs] = nodes
+                    pairs = pairs.take(keep)
+                nodes, row_offsets, thresholds = nodes.take(keep), row_offsets.take(keep), thresholds.take(keep)
+                if not nodes.size:
+                    break
+            go_right = ~(flat_X.take(row_offsets + self.feature.take(nodes)) <= thresholds)
+            nodes = self._children.take(nodes * 2 + go_right)
+        # After max_depth levels every pair has reached its leaf
+        if pairs is None:
+            return nodes.reshape(X.shape[0], n_trees)
+        leaves[pairs] = nodes
+        return leaves.reshape(X.shape[0], n_trees)
+
+    def predict_proba(self, X):
+        """
+        Average the leaf class distributions over all trees
+        """
+        leaves = self.apply(X)
+        # One class at a time: gathering (rows, trees, classes) at once costs several times more
+        return np.stack([column.take(leaves).mean(axis=1) for column in self.value.T], axis=1)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
@@ -0,0 +1,199 @@
+"""
+NumPy forward pass for a fitted MLPClassifier.
+
+The weights and biases of every layer are exported to a small uncompressed
+.npz (no pickle, so loading it needs neither sklearn nor joblib), with the
+StandardScaler folded into the first layer so the model takes raw features:
+W' = W / scale and b' = b - (mean / scale) @ W.
+
+A single row is scored through per-thread activation buffers that are reused
+across calls. Each buffer ends in a constant 1 and each layer's bias is
+stored as an extra weight row, so a layer is one matmul into the next buffer
+plus an in-place activation, and the output probability is computed on a
+Python float. Batches are evaluated in blocks of BLOCK_ROWS rows through
+buffers allocated once per call. This skips sklearn's per-call input
+validation and dispatch, which cost far more than the few small matmuls.
+"""
+import math
+import threading
+
+import numpy as np
+
+from backend.utils.files import atomic_path
+
+# Rows evaluated per block in batch scoring; keeps the activation buffers cache-resident
+BLOCK_ROWS = 4096
+
+HIDDEN_ACTIVATIONS = ('identity', 'logistic', 'tanh', 'relu')
+
+
+def _logistic(x):
+    # 1 / (1 + exp(-x)) in place, as scipy.special.expit computes it
+    with np.errstate(over='ignore'):
+        np.negative(x, out=x)
+        np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+
+
+def _activate(x, activation):
+    if activation == 'relu':
+        np.maximum(x, 0.0, out=x)
+    elif activation == 'tanh':
+        np.tanh(x, out=x)
+    elif activation == 'logistic':
+        _logistic(x)
+
+
+class CompiledMLP:
+    """
+    Drop-in replacement for MLPClassifier.predict_proba/predict
+    """
+
+    def __init__(self, weights, biases, activation, out_activation, classes):
+        if activation not in HIDDEN_ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+        if out_activation not in ('logistic', 'softmax'):
+            raise ValueError(f"Unsupported output activation: {out_activation}")
+        self.weights = [np.ascontiguousarray(w, dtype=np.float64) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float64) for b in biases]
+        self.activation = activation
+        self.out_activation = out_activation
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = self.weights[0].shape[0]
+        # [W; b] per layer, for inputs with a trailing 1
+        self._augmented = [np.ascontiguousarray(np.vstack([w, b])) for w, b in zip(self.weights, self.biases)]
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Thread-local buffers cannot be pickled; every process allocates its own
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @classmethod
+    def from_sklearn(cls, mlp, scaler=None):
+        """
+        Copy the layers of a fitted MLPClassifier, folding in the scaler it was trained with
+        """
+        weights = [np.array(w, dtype=np.float64) for w in mlp.coefs_]
+        biases = [np.array(b, dtype=np.float64) for b in mlp.intercepts_]
+        if scaler is not None:
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            biases[0] = biases[0] - (mean / scale) @ weights[0]
+            weights[0] = weights[0] / scale[:, None]
+        return cls(weights, biases, mlp.activation, mlp.out_activation_, mlp.classes_)
+
+    def save(self, path):
+        arrays = {
+            'activation': np.array(self.activation),
+            'out_activation': np.array(self.out_activation),
+            'classes': self.classes_,
+        }
+        for layer, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weight_{layer}'] = w
+            arrays[f'bias_{layer}'] = b
+        with atomic_path(path) as temporary_path, open(temporary_path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as archive:
+            n_layers = sum(1 for key in archive.files if key.startswith('weight_'))
+            return cls(
+                weights=[archive[f'weight_{layer}'] for layer in range(n_layers)],
+                biases=[archive[f'bias_{layer}'] for layer in range(n_layers)],
+                activation=str(archive['activation']),
+                out_activation=str(archive['out_activation']),
+                classes=archive['classes'],
+            )
+
+    def _allocate(self, rows):
+        return [np.empty((rows, w.shape[1]), dtype=np.float64) for w in self.weights]
+
+    def _row_buffers(self):
+        """
+        Per-thread (1, units + 1) input and hidden-layer buffers whose last column is 1
+        """
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = [np.ones((1, w.shape[0]), dtype=np.float64) for w in self._augmented]
+            self._local.buffers = buffers
+        return buffers
+
+    def _predict_proba_row(self, x):
+        buffers = self._row_buffers()
+        buffers[0][0, :-1] = x
+        for w, inputs, outputs in zip(self._augmented, buffers, buffers[1:]):
+            # A single row of the buffer without its trailing 1 is contiguous, so dot can write into it
+            hidden = outputs[:, :-1]
+            np.dot(inputs, w, out=hidden)
+            _activate(hidden, self.activation)
+        output = np.dot(buffers[-1], self._augmented[-1])
+        if self.out_activation != 'logistic':
+            return self._probabilities(output)
+
+        z = float(output[0, 0])
+        if z >= 0.0:
+            positive = 1.0 / (1.0 + math.exp(-z))
+        else:
+            exp_z = math.exp(z)
+            positive = exp_z / (1.0 + exp_z)
+        return np.array([[1.0 - positive, positive]])
+
+    def _forward(self, X, buffers):
+        """
+        Run X through every layer into buffers; returns the output-layer pre-activations
+        """
+        activations = X
+        last = len(self.weights) - 1
+        for layer, (w, b, out) in enumerate(zip(self.weights, self.biases, buffers)):
+            out = out[:X.shape[0]]
+            np.dot(activations, w, out=out)
+            out += b
+            if layer != last:
+                _activate(out, self.activation)
+            activations = out
+        return activations
+
+    def _probabilities(self, output):
+        if self.out_activation == 'logistic':
+            # Binary: one output unit giving the positive-class probability
+            positive = output.copy()
+            _logistic(positive)
+            return np.hstack([1.0 - positive, positive])
+        probabilities = output - output.max(axis=1, keepdims=True)
+        np.exp(probabilities, out=probabilities)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return probabilities
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 1:
+            return self._predict_proba_row(X[0])
+
+        buffers = self._allocate(min(X.shape[0], BLOCK_ROWS))
+        return np.concatenate([
+            self._probabilities(self._forward(X[start:start + BLOCK_ROWS], buffers))
+            for start in range(0, X.shape[0], BLOCK_ROWS)
+        ])
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+if __name__ == "__main__":
+    import joblib
+
+    from backend.config import NN_COMPILED_PATH, NN_MODEL_PATH, SCALER_NN_PATH
+
+    compiled = CompiledMLP.from_sklearn(joblib.load(NN_MODEL_PATH), joblib.load(SCALER_NN_PATH))
+    compiled.save(NN_COMPILED_PATH)
+    print(f"Compiled MLP saved at: {NN_COMPILED_PATH}")
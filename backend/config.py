@@ -1,4 +1,5 @@
 import os
+from dotenv import load_dotenv
 
 # Flask configuration
 DEBUG = True
@@ -8,19 +9,122 @@ HOST = '0.0.0.0'
 # Get the absolute path to the backend directory
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Load environment overrides from backend/.env regardless of the working directory
+load_dotenv(os.path.join(BACKEND_DIR, '.env'))
+
 # Get the project root directory (one level up from backend)
 PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
 
-# Model paths
-MODEL_DIR = os.path.join(PROJECT_ROOT, 'model')
-RF_MODEL_PATH = os.path.join(MODEL_DIR, 'heart_model.pkl')
+# Model paths (trained artifacts live in backend/model)
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+# MODEL_PATH / SCALER_PATH in .env are relative to the backend directory
+RF_MODEL_PATH = os.path.join(BACKEND_DIR, os.path.normpath(os.getenv('MODEL_PATH', 'model/heart_model.pkl')))
 NN_MODEL_PATH = os.path.join(MODEL_DIR, 'nn_model.pkl')
-SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
+SCALER_PATH = os.path.join(BACKEND_DIR, os.path.normpath(os.getenv('SCALER_PATH', 'model/scaler.pkl')))
 SCALER_NN_PATH = os.path.join(MODEL_DIR, 'scaler_nn.pkl')
 
+# Raw-feature models with the scaler folded in (written by raw_models.py)
+RF_RAW_MODEL_PATH = os.path.join(MODEL_DIR, 'heart_model_raw.pkl')
+NN_RAW_MODEL_PATH = os.path.join(MODEL_DIR, 'nn_model_raw.pkl')
+# MLP weights with the scaler folded in, for the NumPy runtime in compiled_mlp.py
+NN_COMPILED_PATH = os.path.join(MODEL_DIR, 'nn_model.npz')
+
+# Prediction settings
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 100000))  # Maximum records per /predict/batch call
+MAX_SWEEP_POINTS = int(os.getenv('MAX_SWEEP_POINTS', 40000))  # Maximum grid points per /predict/sweep call
+# Serve the Random Forest from the flat array evaluator in compiled_forest.py instead of sklearn
+USE_COMPILED_FOREST = os.getenv('USE_COMPILED_FOREST', 'false').lower() == 'true'
+# Serve the MLP from the NumPy forward pass in compiled_mlp.py instead of sklearn.
+# Together with RAW_FEATURE_MODELS this is the lightweight runtime: the API process
+# imports neither sklearn nor pandas and starts within the 1 s target of
+# benchmarks/startup_time.py, which applies to that runtime only. Both default to off
+# because their artifacts are exported from the trained sklearn models.
+USE_COMPILED_MLP = os.getenv('USE_COMPILED_MLP', 'false').lower() == 'true'
+# Serve the raw-feature models from raw_models.py, which take unscaled inputs directly
+RAW_FEATURE_MODELS = os.getenv('RAW_FEATURE_MODELS', 'false').lower() == 'true'
+# Memory-map the NumPy arrays of uncompressed joblib artifacts instead of copying
+# them into each process, so every process shares one page-cache copy
+MMAP_MODELS = os.getenv('MMAP_MODELS', 'true').lower() == 'true'
+MODEL_MMAP_MODE = 'r' if MMAP_MODELS else None
+
+# Ensemble settings: per-model weights (normalized over the loaded models) and
+# the number of threads used to evaluate the models concurrently
+ENSEMBLE_WEIGHTS = {
+    'random_forest': float(os.getenv('ENSEMBLE_RF_WEIGHT', 0.6)),
+    'neural_network': float(os.getenv('ENSEMBLE_NN_WEIGHT', 0.4)),
+}
+ENSEMBLE_WORKERS = int(os.getenv('ENSEMBLE_WORKERS', 2))
+
+# Hot reload (model_manager.py): seconds between checks of the model artifacts
+# for changes (0 disables the watcher; POST /models/reload still works), and the
+# canary batch from the dataset a new model set must score before it is served
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 5))
+CANARY_ROWS = int(os.getenv('CANARY_ROWS', 64))
+CANARY_MIN_ACCURACY = float(os.getenv('CANARY_MIN_ACCURACY', 0.7))
+# Bearer token required by POST /models/reload when set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Sampling profiler (profiler.py), toggled at runtime through POST /profile: the
+# fraction of requests profiled and the seconds between stack samples
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.05))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.002))
+
+# In-process cache of inference results (0 entries disables it)
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 4096))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', 300))  # Seconds
+
+# Prediction history database (SQLite in WAL mode)
+HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', os.path.join(BACKEND_DIR, 'data', 'history.db'))
+
+# Write-behind queue that records scored predictions without blocking the request.
+# HISTORY_AUTO_RECORD saves every prediction; otherwise clients opt in per request
+# with "save_to_history": true. HISTORY_BACKPRESSURE is drop_oldest, spill or block; block is the
+# only one that can make a scoring request wait.
+HISTORY_AUTO_RECORD = os.getenv('HISTORY_AUTO_RECORD', 'false').lower() == 'true'
+HISTORY_QUEUE_SIZE = int(os.getenv('HISTORY_QUEUE_SIZE', 10000))
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 0.5))  # Seconds
+HISTORY_BACKPRESSURE = os.getenv('HISTORY_BACKPRESSURE', 'drop_oldest')
+HISTORY_BLOCK_TIMEOUT = float(os.getenv('HISTORY_BLOCK_TIMEOUT', 1.0))  # Seconds
+HISTORY_SPILL_PATH = os.getenv('HISTORY_SPILL_PATH', os.path.join(BACKEND_DIR, 'data', 'history_spill.ndjson'))
+
 # Dataset paths
 DATASET_DIR = os.path.join(PROJECT_ROOT, 'dataset')
 DATASET_PATH = os.path.join(DATASET_DIR, 'heart.csv')
+# Columnar copies of the CSV datasets (dataset.py), one directory per source file hash
+DATASET_CACHE_DIR = os.getenv('DATASET_CACHE_DIR', os.path.join(BACKEND_DIR, 'data', 'datasets'))
+
+# Start the partial-dependence, permutation importance and cross-validation jobs when the app
+# starts and whenever the models change. Off by default: the jobs import sklearn into the API
+# process, so results not cached yet are computed when their endpoint is first requested
+ANALYSIS_ON_STARTUP = os.getenv('ANALYSIS_ON_STARTUP', 'false').lower() == 'true'
+
+# Partial-dependence/ICE tables (partial_dependence.py), cached per model version
+PD_CACHE_DIR = os.getenv('PD_CACHE_DIR', os.path.join(BACKEND_DIR, 'data', 'partial_dependence'))
+PD_GRID_SIZE = int(os.getenv('PD_GRID_SIZE', 20))  # Grid points per continuous feature
+
+# Permutation importance (permutation_importance.py), cached per model version
+PERMUTATION_CACHE_DIR = os.getenv('PERMUTATION_CACHE_DIR', os.path.join(BACKEND_DIR, 'data', 'permutation_importance'))
+PERMUTATION_REPEATS = int(os.getenv('PERMUTATION_REPEATS', 10))  # Shuffles per feature
+PERMUTATION_WORKERS = int(os.getenv('PERMUTATION_WORKERS', os.cpu_count() or 1))  # Pool processes
+PERMUTATION_SEED = int(os.getenv('PERMUTATION_SEED', 42))
+
+# Cross-validated comparison metrics (cross_validation.py), cached per model version
+CV_CACHE_DIR = os.getenv('CV_CACHE_DIR', os.path.join(BACKEND_DIR, 'data', 'cross_validation'))
+CV_FOLDS = int(os.getenv('CV_FOLDS', 5))
+CV_WORKERS = int(os.getenv('CV_WORKERS', os.cpu_count() or 1))  # Pool processes
+
+# Hyperparameter search (python -m backend.train_models --tune); -1 runs trials on all cores
+TUNING_WORKERS = int(os.getenv('TUNING_WORKERS', -1))
+# Memoized stages of the training pipeline (train_models.py)
+TRAINING_CACHE_DIR = os.getenv('TRAINING_CACHE_DIR', os.path.join(BACKEND_DIR, 'data', 'training_cache'))
+
+# Production server (serve.py): preforked workers sharing the preloaded models
+SERVER_BIND = os.getenv('SERVER_BIND', f'{HOST}:{PORT}')
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', 4))  # Threads per worker
+SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', 30))  # Seconds
 
 # Logging configuration
 LOG_DIR = os.path.join(BACKEND_DIR, 'logs')
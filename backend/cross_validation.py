@@ -0,0 +1,161 @@
+"""
+Cross-validated metrics for the model comparison page.
+
+Runs stratified k-fold cross-validation of the Random Forest, Logistic
+Regression, SVM and MLP configurations on dataset/heart.csv. Each candidate
+is a StandardScaler + classifier pipeline, so the scaler is fitted on the
+training folds only, and the Random Forest and MLP use the hyperparameters
+train_models.py trains the serving models with.
+
+Every (model, fold) pair is fitted and scored on a process pool whose
+workers receive the dataset and the fold indices once. Per-fold metrics are
+averaged and stored as JSON under the registry version, i.e. the hash of the
+served artifacts, and the hash of the dataset (see versioned_cache.py), so
+/models/comparison reads them instead of recomputing, and retraining the
+models or editing the dataset triggers a new evaluation.
+
+Run from the project root to precompute the metrics for the current models:
+    python -m backend.cross_validation
+"""
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.config import CV_CACHE_DIR, CV_FOLDS, CV_WORKERS, DATASET_CACHE_DIR, DATASET_PATH
+from backend.dataset import load_dataset
+from backend.versioned_cache import VersionedCache
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1_score', 'auc')
+
+# Candidates in display order: key -> display name
+CANDIDATES = {
+    'random_forest': 'Random Forest',
+    'logistic_regression': 'Logistic Regression',
+    'svm': 'Support Vector Machine',
+    'neural_network': 'Neural Network',
+}
+
+
+def candidate_pipeline(name):
+    """
+    Return an unfitted StandardScaler + classifier pipeline for a candidate
+    """
+    # sklearn is only needed by the evaluation workers, not by the API process
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.svm import SVC
+
+    from backend.train_models import neural_network, random_forest
+
+    factories = {
+        'random_forest': random_forest,
+        'logistic_regression': lambda: LogisticRegression(max_iter=1000),
+        'svm': lambda: SVC(random_state=42),
+        'neural_network': neural_network,
+    }
+    return make_pipeline(StandardScaler(), factories[name]())
+
+# Per-worker state set by _init_worker
+_X = None
+_y = None
+_folds = None
+
+
+def _init_worker(X, y, folds):
+    global _X, _y, _folds
+    _X, _y, _folds = X, y, folds
+
+
+def _evaluate_fold(job):
+    """
+    Fit one candidate on the training part of a fold and score the held-out part
+    """
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    name, fold = job
+    train, test = _folds[fold]
+    model = candidate_pipeline(name)
+    model.fit(_X[train], _y[train])
+
+    predicted = model.predict(_X[test])
+    # SVC has no probabilities without an extra internal CV; its margin ranks just as well
+    if hasattr(model, 'predict_proba'):
+        scores = model.predict_proba(_X[test])[:, 1]
+    else:
+        scores = model.decision_function(_X[test])
+    return {
+        'accuracy': accuracy_score(_y[test], predicted),
+        'precision': precision_score(_y[test], predicted, zero_division=0),
+        'recall': recall_score(_y[test], predicted),
+        'f1_score': f1_score(_y[test], predicted),
+        'auc': roc_auc_score(_y[test], scores),
+    }
+
+
+def cross_validate(X, y, names=tuple(CANDIDATES), n_folds=CV_FOLDS, workers=CV_WORKERS):
+    """
+    Return {name: {metric: mean, metric_std: std}} over stratified folds
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    folds = list(StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X, y))
+    jobs = [(name, fold) for name in names for fold in range(n_folds)]
+
+    # spawn: the pool may be started from a thread of a process that later forks
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(X, y, folds)) as executor:
+        scores = list(executor.map(_evaluate_fold, jobs))
+
+    results = {}
+    for index, name in enumerate(names):
+        fold_scores = scores[index * n_folds:(index + 1) * n_folds]
+        results[name] = {}
+        for metric in METRICS:
+            values = np.array([fold[metric] for fold in fold_scores])
+            results[name][metric] = float(values.mean())
+            results[name][f'{metric}_std'] = float(values.std())
+    return results
+
+
+class CrossValidationCache(VersionedCache):
+    """
+    Per-model-version cross-validated metrics of every comparison candidate
+    """
+
+    name = 'cross_validation'
+    extension = '.json'
+
+    def __init__(self, cache_dir=CV_CACHE_DIR, dataset_path=DATASET_PATH, n_folds=CV_FOLDS, workers=CV_WORKERS,
+                 dataset_cache_dir=DATASET_CACHE_DIR):
+        super().__init__(cache_dir, dataset_path, dataset_cache_dir)
+        self.n_folds = n_folds
+        self.workers = workers
+
+    def compute(self, predictors):
+        # The candidates are retrained per fold; the served models only key the result
+        X, y, _ = load_dataset(self.dataset_path, self.dataset_cache_dir).features()
+        return {
+            'folds': self.n_folds,
+            'n_samples': len(y),
+            'models': cross_validate(X, y, n_folds=self.n_folds, workers=self.workers)
+        }
+
+    def dump(self, result, f):
+        f.write(json.dumps(result).encode('utf-8'))
+
+    def load(self, f):
+        return json.loads(f.read().decode('utf-8'))
+
+
+if __name__ == "__main__":
+    from backend.model_registry import ModelRegistry
+
+    registry = ModelRegistry().load()
+    cache = CrossValidationCache()
+    cache.refresh(registry)
+    cache.wait()
+    print(f"Cross-validation metrics: {cache.path(registry.version)}")
@@ -0,0 +1,253 @@
+"""
+Columnar cache of the CSV datasets.
+
+The first time a CSV is loaded it is parsed once, in chunks of CHUNK_ROWS
+lines, and every column is written as its own .npy file in the narrowest
+dtype that holds all of its values exactly. Whole-number columns get the
+smallest integer type that fits: uint8 for the categorical codes and age,
+uint16 for cholesterol. Other columns become float32 when that is lossless.
+A decimal like 2.3 has no exact float32 value, so such columns stay float64.
+Models trained on the cache therefore see exactly the values the CSV holds.
+Blank cells and the usual NA markers are read as NaN, which keeps their
+column in floating point; any other text that is not a number is an error.
+
+Later loads memory-map the column files. They parse nothing and infer
+nothing, and they read only the pages a caller touches. Every process
+loading the same dataset shares those pages.
+
+The cache directory is named after the CSV's absolute path and its SHA-256,
+so an edited file is converted again and files that share a name never
+touch each other's copies. A file's hash is remembered together with its
+size and modification time, so an unchanged file is not read again just to
+hash it. Conversions run one at a time per process, are written to a
+temporary directory of their own and renamed into place, and superseded
+copies of the same file are removed.
+
+Loading needs only NumPy, so the API process can read the canary batch
+without pandas. Dataset.to_frame() imports pandas for the training code that
+wants a DataFrame.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from itertools import islice
+
+import numpy as np
+
+from backend.config import DATASET_CACHE_DIR, DATASET_PATH
+from backend.utils.hashing import file_sha256
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+# CSV lines parsed at a time when converting; bounds memory on cohorts of millions of rows
+CHUNK_ROWS = 200000
+
+METADATA_FILE = 'columns.json'
+
+# Integer dtypes tried in order for columns whose values are all whole numbers
+INTEGER_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.int32)
+
+# Cells read as missing (NaN), besides blank ones; the markers pandas.read_csv recognizes most often
+MISSING_VALUES = 'NA,N/A,NaN,nan,NULL,null'
+
+# Serializes hashing and conversion; the analysis jobs started with the app load the dataset concurrently
+_lock = threading.Lock()
+
+
+def compact_dtype(values):
+    """
+    Narrowest dtype that represents every value of a float64 column exactly
+    """
+    finite = values[np.isfinite(values)]
+    if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+        low, high = (finite.min(), finite.max()) if len(finite) else (0, 0)
+        for dtype in INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+    with np.errstate(over='ignore'):
+        narrowed = values.astype(np.float32)
+    if np.array_equal(narrowed, values, equal_nan=True):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+class Dataset:
+    """
+    Named columns of a dataset, in CSV order, memory-mapped from the cache
+    """
+
+    def __init__(self, columns, source=None):
+        self.columns = dict(columns)
+        self.names = list(self.columns)
+        self.source = source
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def matrix(self, names=None, dtype=np.float64):
+        """
+        Return the named columns (default: all) as a contiguous (rows, columns) array
+        """
+        names = self.names if names is None else list(names)
+        matrix = np.empty((len(self), len(names)), dtype=dtype)
+        for index, name in enumerate(names):
+            matrix[:, index] = self.columns[name]
+        return matrix
+
+    def features(self, target='target'):
+        """
+        Return (X, y, feature_names): every other column as float64, and the target column
+        """
+        feature_names = [name for name in self.names if name != target]
+        return self.matrix(feature_names), np.array(self.columns[target]), feature_names
+
+    def to_frame(self):
+        # pandas is only imported by the training and analysis code that wants a DataFrame
+        import pandas as pd
+
+        return pd.DataFrame({name: np.array(column) for name, column in self.columns.items()})
+
+
+def _parse_chunk(path, names, lines, first_line):
+    """
+    Parse CSV lines into a float64 (rows, columns) array; missing cells become NaN
+    """
+    try:
+        parsed = np.loadtxt(lines, delimiter=',', dtype=np.float64, ndmin=2)
+    except ValueError:
+        # Slower, but reads blank cells as NaN instead of failing on them; the training code drops those rows
+        parsed = np.genfromtxt(lines, delimiter=',', dtype=np.float64, missing_values=MISSING_VALUES,
+                               filling_values=np.nan, usemask=True, autostrip=True, ndmin=2)
+    if parsed.shape[1] != len(names):
+        raise ValueError(f"{path} has {len(names)} column names but {parsed.shape[1]} values per row")
+    if not np.ma.isMaskedArray(parsed):
+        return parsed
+    # A NaN that was not a missing cell is text that is not a number
+    invalid = np.isnan(parsed.data) & ~np.ma.getmaskarray(parsed)
+    if invalid.any():
+        row, column = np.argwhere(invalid)[0]
+        raise ValueError(f"{path} line {first_line + row}: column {names[column]!r} "
+                         f"is not numeric: {lines[row].rstrip()!r}")
+    return parsed.filled(np.nan)
+
+
+def _read_csv_columns(path):
+    """
+    Parse a numeric CSV with a header row into (names, list of float64 columns)
+    """
+    chunks = []
+    with open(path) as f:
+        names = [name.strip() for name in f.readline().strip().split(',')]
+        # Line numbers count from 1 and the header is line 1
+        first_line = 2
+        while True:
+            lines = list(islice(f, CHUNK_ROWS))
+            if not lines:
+                break
+            chunks.append(_parse_chunk(path, names, lines, first_line))
+            first_line += len(lines)
+    if not chunks:
+        return names, [np.empty(0) for _ in names]
+    columns = [np.concatenate([chunk[:, index] for chunk in chunks]) for index in range(len(names))]
+    return names, columns
+
+
+def _cache_name(path):
+    """
+    Prefix of the cache entries of a source file: its name and a hash of its absolute path
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]}"
+
+
+def source_sha256(path, cache_dir=DATASET_CACHE_DIR):
+    """
+    SHA-256 of a source file, rehashed only when its size or modification time changed
+    """
+    with _lock:
+        return _source_sha256(path, cache_dir)
+
+
+def _source_sha256(path, cache_dir):
+    stat = os.stat(path)
+    record_path = os.path.join(cache_dir, f"{_cache_name(path)}.source.json")
+    try:
+        with open(record_path) as f:
+            record = json.load(f)
+        if (record['path'], record['size'], record['mtime_ns']) == (os.path.abspath(path), stat.st_size,
+                                                                     stat.st_mtime_ns):
+            return record['sha256']
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    sha256 = file_sha256(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    descriptor, temporary_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(descriptor, 'w') as f:
+        json.dump({'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                   'sha256': sha256}, f)
+    os.replace(temporary_path, record_path)
+    return sha256
+
+
+def convert(path, directory, sha256):
+    """
+    Write the columns of a CSV to directory as compact .npy files
+    """
+    logger.info(f"Converting {path} to a columnar cache in {directory}")
+    names, columns = _read_csv_columns(path)
+    temporary_directory = tempfile.mkdtemp(dir=os.path.dirname(directory), suffix='.tmp')
+    try:
+        metadata = {'source': os.path.abspath(path), 'sha256': sha256, 'rows': len(columns[0]), 'columns': []}
+        for index, (name, values) in enumerate(zip(names, columns)):
+            dtype = compact_dtype(values)
+            np.save(os.path.join(temporary_directory, f"{index:04d}.npy"), values.astype(dtype))
+            metadata['columns'].append({'name': name, 'dtype': dtype.name})
+        # Written last: a directory without it was never completed
+        with open(os.path.join(temporary_directory, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        try:
+            os.rename(temporary_directory, directory)
+        except OSError:
+            # Another process converted the same file first; its copy is identical
+            if not os.path.exists(os.path.join(directory, METADATA_FILE)):
+                raise
+    finally:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+def load_dataset(path=DATASET_PATH, cache_dir=DATASET_CACHE_DIR, mmap_mode='r'):
+    """
+    Return the Dataset of a CSV, converting it into the cache first if this
+    version of the file has not been converted yet
+    """
+    name = _cache_name(path)
+    with _lock:
+        sha256 = _source_sha256(path, cache_dir)
+        directory = os.path.join(cache_dir, f"{name}-{sha256[:16]}")
+        metadata_path = os.path.join(directory, METADATA_FILE)
+
+        if not os.path.exists(metadata_path):
+            convert(path, directory, sha256)
+            # Copies of earlier versions of this file are no longer reachable
+            for entry in os.listdir(cache_dir):
+                stale = os.path.join(cache_dir, entry)
+                if re.fullmatch(re.escape(name) + r'-[0-9a-f]{16}', entry) and stale != directory:
+                    shutil.rmtree(stale, ignore_errors=True)
+
+    with open(metadata_path) as f:
+        metadata = json.load(f)
+    return Dataset(
+        ((column['name'], np.load(os.path.join(directory, f"{index:04d}.npy"), mmap_mode=mmap_mode))
+         for index, column in enumerate(metadata['columns'])),
+        source=metadata['source'],
+    )
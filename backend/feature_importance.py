@@ -1,9 +1,13 @@
 import joblib
 import numpy as np
-import pandas as pd
+import os
 
-# Load the Random Forest model (which has feature_importances_)
-model = joblib.load("model/heart_model.pkl")
+from backend.config import MODEL_MMAP_MODE, RF_MODEL_PATH, RF_RAW_MODEL_PATH
+
+# Load the Random Forest model (which has feature_importances_), preferring the
+# raw-feature CompiledForest whose arrays can be memory-mapped
+model = joblib.load(RF_RAW_MODEL_PATH if os.path.exists(RF_RAW_MODEL_PATH) else RF_MODEL_PATH,
+                    mmap_mode=MODEL_MMAP_MODE)
 
 # Feature names
 feature_names = [
@@ -0,0 +1,5 @@
+# gunicorn settings for the production server; see serve.py.
+# Run from the project root: gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+from backend.serve import server_options
+
+globals().update(server_options())
@@ -0,0 +1,246 @@
+"""
+Persistent prediction history backed by SQLite in WAL mode.
+
+Reads use one connection per thread and keyset (cursor) pagination over the
+(ts, id) index, so listing stays fast with millions of rows. Writes use
+group commit: concurrent saves are queued and whichever thread holds the
+writer lock commits every queued record in a single transaction, so a burst
+of saves shares one WAL append instead of serializing on it.
+"""
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    date TEXT NOT NULL,
+    prediction INTEGER,
+    probability REAL,
+    risk_level TEXT,
+    message TEXT,
+    model_version TEXT,
+    inputs TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts, id);
+CREATE INDEX IF NOT EXISTS idx_predictions_risk_ts ON predictions (risk_level, ts, id);
+"""
+
+INSERT = """
+INSERT INTO predictions (ts, date, prediction, probability, risk_level, message, model_version, inputs)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+COLUMNS = 'id, ts, date, prediction, probability, risk_level, message, model_version, inputs'
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+def parse_timestamp(value):
+    """
+    Convert an ISO-8601 string or epoch number into epoch seconds
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    # datetime.fromisoformat only accepts a trailing Z from Python 3.11
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def encode_cursor(ts, record_id):
+    return base64.urlsafe_b64encode(f"{ts!r}:{record_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        ts, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(ts), int(record_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+class _PendingWrite:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ids = []
+        self.error = None
+        self.done = threading.Event()
+
+
+class HistoryStore:
+    """
+    Stores scored predictions and serves paginated, time-filtered queries
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.close()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # In WAL mode NORMAL only syncs at checkpoints and stays crash-safe
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _connection(self):
+        """
+        Return this thread's connection, reopening it after a fork
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _to_row(record):
+        date = record.get('date') or record.get('timestamp') or datetime.now().isoformat()
+        inputs = record.get('inputs', record.get('input_data'))
+        return (
+            parse_timestamp(date),
+            date,
+            None if record.get('prediction') is None else int(record['prediction']),
+            None if record.get('probability') is None else float(record['probability']),
+            record.get('risk_level'),
+            record.get('message'),
+            record.get('model_version'),
+            None if inputs is None else json.dumps(inputs),
+        )
+
+    @staticmethod
+    def _to_record(row):
+        return {
+            'id': str(row['id']),
+            'date': row['date'],
+            'prediction': row['prediction'],
+            'probability': row['probability'],
+            'risk_level': row['risk_level'],
+            'message': row['message'],
+            'model_version': row['model_version'],
+            'inputs': None if row['inputs'] is None else json.loads(row['inputs']),
+        }
+
+    def add(self, record):
+        return self.add_many([record])[0]
+
+    def add_many(self, records):
+        """
+        Insert records and return their ids; raises ValueError, and inserts
+        nothing, if any record is not an object or has an invalid field.
+
+        The caller's rows are queued; the first thread to take the writer lock
+        commits everything queued so far in one transaction.
+        """
+        rows = []
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError(f"History record {index} must be an object")
+            try:
+                rows.append(self._to_row(record))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid history record {index}: {e}")
+        pending = _PendingWrite(rows)
+        with self._pending_lock:
+            self._pending.append(pending)
+
+        with self._write_lock:
+            if not pending.done.is_set():
+                with self._pending_lock:
+                    batch, self._pending = self._pending, []
+                self._write_batch(batch)
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.ids
+
+    def _write_batch(self, batch):
+        connection = self._connection()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            for pending in batch:
+                for row in pending.rows:
+                    pending.ids.append(str(connection.execute(INSERT, row).lastrowid))
+            connection.execute('COMMIT')
+        except Exception as e:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            logger.error(f"Error writing {len(batch)} history batch(es): {e}")
+            for pending in batch:
+                pending.ids = []
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    def get(self, record_id):
+        row = self._connection().execute(
+            f"SELECT {COLUMNS} FROM predictions WHERE id = ?", (record_id,)).fetchone()
+        return None if row is None else self._to_record(row)
+
+    def list(self, limit=DEFAULT_PAGE_SIZE, cursor=None, start=None, end=None, risk_level=None):
+        """
+        Return (records, next_cursor), newest first.
+
+        start/end bound the timestamp (inclusive); cursor continues from the
+        last record of the previous page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = [], []
+        if risk_level:
+            clauses.append('risk_level = ?')
+            params.append(risk_level)
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(parse_timestamp(start))
+        if end is not None:
+            clauses.append('ts <= ?')
+            params.append(parse_timestamp(end))
+        if cursor:
+            clauses.append('(ts, id) < (?, ?)')
+            params.extend(decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM predictions {where} ORDER BY ts DESC, id DESC LIMIT ?",
+            params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['ts'], rows[-1]['id'])
+        return [self._to_record(row) for row in rows], next_cursor
+
+    def delete(self, record_id):
+        with self._write_lock:
+            cursor = self._connection().execute('DELETE FROM predictions WHERE id = ?', (record_id,))
+        return cursor.rowcount > 0
+
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0]
@@ -0,0 +1,321 @@
+"""
+Write-behind queue for recording scored predictions in the history store.
+
+Scoring routes hand records to a bounded in-memory queue and return without
+waiting on SQLite. A background thread drains the queue in batches, flushing
+when batch_size records are waiting or flush_interval seconds have passed.
+
+When the queue is full the backpressure policy decides what happens:
+  drop_oldest  discard the oldest queued record to make room (the default)
+  spill        hand the record to a second thread that appends it to an
+               NDJSON file, re-ingested once the queue has drained
+  block        wait up to block_timeout seconds for space, then drop the
+               record; the only policy that makes a scoring request wait
+
+Under the spill policy a batch the store fails to write is spilled too;
+under the others it is counted as failed.
+
+Each process spills to its own file, spill_path with its pid before the
+extension, so preforked workers never move each other's files. A worker
+also re-ingests the files of workers that have exited. Lines that cannot be
+decoded (e.g. the torn last line of a crashed process) are moved to a
+.rejected file next to the spill file instead of stopping the drain.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+BACKPRESSURE_POLICIES = ('block', 'drop_oldest', 'spill')
+
+
+class HistoryWriter:
+    """
+    Bounded queue drained into a HistoryStore by a background thread
+    """
+
+    def __init__(self, store, max_size=10000, batch_size=500, flush_interval=0.5,
+                 policy='drop_oldest', block_timeout=1.0, spill_path=None):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy {policy!r}; expected one of {BACKPRESSURE_POLICIES}")
+        if policy == 'spill' and not spill_path:
+            raise ValueError('The spill policy requires a spill_path')
+
+        self.store = store
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+
+        self._queue = deque()
+        # Records waiting for the spill thread, and how many it is appending
+        self._spill_queue = deque()
+        self._spilling = 0
+        self._condition = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._in_flight = 0
+        self._closed = False
+        self._thread = None
+        self._spill_thread = None
+        self._pid = None
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed = 0
+
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # Started lazily (and restarted after a fork) so that preforked
+        # workers each run their own writer thread
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue.clear()
+            self._spill_queue.clear()
+            self._in_flight = self._spilling = 0
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+            if self.policy == 'spill':
+                self._spill_thread = threading.Thread(target=self._run_spill, name='history-spill', daemon=True)
+                self._spill_thread.start()
+
+    def submit(self, record):
+        """
+        Queue a record for writing. Returns False if it was dropped.
+        """
+        with self._condition:
+            if self._closed:
+                return False
+            self._ensure_started()
+            self.submitted += 1
+
+            if len(self._queue) >= self.max_size:
+                if self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == 'spill':
+                    # The file is written by the spill thread, never by the request
+                    self._spill_queue.append(record)
+                    self._condition.notify_all()
+                    return True
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self._closed:
+                            self.dropped += 1
+                            return False
+                        self._condition.wait(remaining)
+
+            self._queue.append(record)
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+            return True
+
+    def _spill_file(self, pid=None):
+        root, extension = os.path.splitext(self.spill_path)
+        return f"{root}.{pid or os.getpid()}{extension}"
+
+    def _spill_files(self):
+        """
+        This process's spill file, then those left by processes that have exited
+        """
+        yield self._spill_file()
+        if os.name != 'posix':
+            return
+        root, extension = os.path.splitext(self.spill_path)
+        directory = os.path.dirname(os.path.abspath(self.spill_path))
+        pattern = re.escape(os.path.basename(root)) + r'\.(\d+)' + re.escape(extension)
+        for entry in sorted(os.listdir(directory)):
+            match = re.fullmatch(pattern, entry)
+            if match and int(match.group(1)) != os.getpid() and not _is_running(int(match.group(1))):
+                yield os.path.join(directory, entry)
+
+    def _spill(self, records):
+        with self._spill_lock:
+            with open(self._spill_file(), 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+        self.spilled += len(records)
+
+    def _take_batch(self):
+        """
+        Wait until a batch is due and pop it from the queue
+        """
+        with self._condition:
+            deadline = time.monotonic() + self.flush_interval
+            while not self._closed and len(self._queue) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._in_flight = count
+            # Wake producers blocked on a full queue
+            self._condition.notify_all()
+            return batch
+
+    def _write(self, batch):
+        try:
+            self.store.add_many(batch)
+            self.written += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} queued history records: {e}")
+            if self.policy == 'spill':
+                self._spill(batch)
+            else:
+                self.failed += len(batch)
+
+    def _drain_spill_file(self):
+        """
+        Re-ingest one spill file once the in-memory queue has caught up.
+        Returns False if there was nothing to drain.
+        """
+        if not self.spill_path:
+            return False
+        draining_path = f"{self._spill_file()}.draining"
+        # A draining file left by an interrupted drain of this process is resumed first
+        if not os.path.exists(draining_path):
+            for path in self._spill_files():
+                try:
+                    with self._spill_lock:
+                        os.replace(path, draining_path)
+                    break
+                except FileNotFoundError:
+                    # Nothing spilled, or another worker claimed an exited worker's file first
+                    continue
+            else:
+                return False
+
+        with open(draining_path, encoding='utf-8') as f:
+            batch = []
+            for line in f:
+                try:
+                    batch.append(json.loads(line))
+                except ValueError:
+                    self._reject(line)
+                    continue
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+            if batch:
+                self._write(batch)
+        os.remove(draining_path)
+        return True
+
+    def _reject(self, line):
+        logger.error(f"Skipping undecodable line in the history spill file: {line[:200]!r}")
+        with open(f"{self.spill_path}.rejected", 'a', encoding='utf-8') as f:
+            f.write(line if line.endswith('\n') else line + '\n')
+        self.failed += 1
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._take_batch()
+                if batch:
+                    self._write(batch)
+                elif self.policy == 'spill':
+                    self._drain_spill_file()
+            except Exception as e:
+                # Keep the writer alive; a failed drain is retried on the next idle pass
+                logger.error(f"History writer error: {e}")
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+                if self._closed and not self._queue:
+                    return
+
+    def _run_spill(self):
+        while True:
+            with self._condition:
+                while not self._spill_queue and not self._closed:
+                    self._condition.wait()
+                if not self._spill_queue:
+                    return
+                records = list(self._spill_queue)
+                self._spill_queue.clear()
+                self._spilling = len(records)
+
+            try:
+                self._spill(records)
+            except Exception as e:
+                logger.error(f"Error spilling {len(records)} history records: {e}")
+                self.failed += len(records)
+
+            with self._condition:
+                self._spilling = 0
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Block until every queued record has been written or spilled. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._in_flight or self._spill_queue or self._spilling:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining if remaining is not None else self.flush_interval)
+        return True
+
+    def close(self, timeout=10.0):
+        """
+        Stop accepting records and flush what is queued; called at interpreter exit
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+            if self._spill_thread is not None:
+                self._spill_thread.join(timeout)
+        if self.policy == 'spill':
+            try:
+                while self._drain_spill_file():
+                    pass
+            except Exception as e:
+                logger.error(f"Error draining the history spill file: {e}")
+
+    def stats(self):
+        with self._condition:
+            return {
+                'queued': len(self._queue),
+                'spill_queued': len(self._spill_queue) + self._spilling,
+                'in_flight': self._in_flight,
+                'max_size': self.max_size,
+                'policy': self.policy,
+                'submitted': self.submitted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'spilled': self.spilled,
+                'failed': self.failed,
+            }
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
@@ -0,0 +1,128 @@
+"""
+Shared inference core for the scoring routes.
+
+Every route scores through a Predictor so the model is evaluated exactly once
+per request: the predicted class is derived from the predict_proba output
+instead of running model.predict as a second pass over the forest.
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from backend.metrics import mark
+
+Prediction = namedtuple('Prediction', ['prediction', 'probability', 'risk_level'])
+# Per-feature TreeSHAP contributions; expected_value + sum(contributions) == probability
+Explanation = namedtuple('Explanation', ['prediction', 'expected_value', 'contributions'])
+
+
+def risk_level(probability):
+    """
+    Map a heart disease probability to the risk band shown by /predict
+    """
+    if probability > 0.7:
+        return 'High Risk'
+    if probability > 0.3:
+        return 'Moderate Risk'
+    return 'Low Risk'
+
+
+def risk_levels(probabilities):
+    """
+    Vectorized risk_level for an array of probabilities
+    """
+    return np.where(probabilities > 0.7, 'High Risk',
+                    np.where(probabilities > 0.3, 'Moderate Risk', 'Low Risk'))
+
+
+def ensemble_risk_level(probability):
+    """
+    Map an ensemble probability to the finer risk band used by /predict/ensemble
+    """
+    if probability < 0.2:
+        return 'Low Risk'
+    if probability < 0.4:
+        return 'Moderate Risk'
+    if probability < 0.7:
+        return 'High Risk'
+    return 'Very High Risk'
+
+
+class Predictor:
+    """
+    Scores patients with a fitted classifier and the StandardScaler it was
+    trained with.
+
+    Single rows are written into a preallocated float64 buffer (one per
+    thread) and scaled in place, so no DataFrame or temporary arrays are
+    built per request.
+    """
+
+    def __init__(self, model, scaler, n_features=13):
+        self.model = model
+        self.n_features = n_features
+        self._mean = None if scaler is None else np.asarray(scaler.mean_, dtype=np.float64)
+        self._scale = None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64)
+        self._classes = np.asarray(model.classes_)
+        self._positive_column = int(np.flatnonzero(self._classes == 1)[0])
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Thread-local buffers cannot be pickled; worker processes allocate their own
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _row_buffer(self):
+        buffer = getattr(self._local, 'row', None)
+        if buffer is None:
+            buffer = np.empty((1, self.n_features), dtype=np.float64)
+            self._local.row = buffer
+        return buffer
+
+    def scale(self, matrix):
+        """
+        Return a scaled copy of an (n, n_features) matrix
+        """
+        if self._mean is None:
+            return np.asarray(matrix, dtype=np.float64)
+        return (matrix - self._mean) / self._scale
+
+    def predict_proba_row(self, values):
+        """
+        Return the class probabilities for a single row of raw feature values
+        """
+        row = self._row_buffer()
+        row[0, :] = values
+        if self._mean is not None:
+            np.subtract(row, self._mean, out=row)
+            np.divide(row, self._scale, out=row)
+        mark('scale')
+        return self.model.predict_proba(row)[0]
+
+    def predict_one(self, values):
+        """
+        Score a single row of raw feature values with one forest evaluation
+        """
+        probabilities = self.predict_proba_row(values)
+        prediction = self._classes[np.argmax(probabilities)]
+        probability = float(probabilities[self._positive_column])
+        return Prediction(int(prediction), probability, risk_level(probability))
+
+    def predict_batch(self, matrix):
+        """
+        Score an (n, n_features) matrix of raw feature values.
+
+        Returns (predictions, probabilities, risk_levels) as arrays.
+        """
+        scaled = self.scale(matrix)
+        mark('scale')
+        probabilities = self.model.predict_proba(scaled)
+        predictions = self._classes.take(np.argmax(probabilities, axis=1))
+        positive = probabilities[:, self._positive_column]
+        return predictions, positive, risk_levels(positive)
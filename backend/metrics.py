@@ -0,0 +1,243 @@
+"""
+Request metrics exported in the Prometheus text format on /metrics.
+
+Each request gets a RequestTimer that splits its latency into stages (parse,
+validate, cache, scale, model, explain, serialize, ...). A stage is the time
+since the previous mark, so the stages of a request add up to its total.
+Code deeper in the call stack, e.g. Predictor, marks stages through mark(),
+which finds the timer of the current request in a thread-local and does
+nothing outside a request.
+
+Recording never takes a lock. Every thread writes into its own shard: plain
+lists of bucket counts, updated in place, and registered once when the
+thread records its first value. When a thread exits its shard is folded
+into the totals of exited threads, so servers that start a thread per
+request (Werkzeug's threaded mode) keep one shard per live thread. A scrape
+sums those totals and the shards of the live threads. A mark costs about a
+microsecond: a perf_counter call, a bisect over the bucket bounds and two
+list updates.
+
+Values that other components already count, such as cache and history-queue
+statistics and the model version, are read by collectors at scrape time
+rather than being updated per request.
+
+Every gunicorn worker keeps its own metrics, so /metrics reports the worker
+that answers the scrape; the worker label tells them apart.
+"""
+import itertools
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+# Upper bounds in seconds; a final +Inf bucket is implied
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+REQUEST_DURATION = 'heart_api_request_duration_seconds'
+STAGE_DURATION = 'heart_api_stage_duration_seconds'
+REQUESTS = 'heart_api_requests_total'
+
+_HELP = {
+    REQUEST_DURATION: 'Time from the start of a request until its response was built',
+    STAGE_DURATION: 'Time spent in each stage of a request',
+    REQUESTS: 'Requests served, by route, method and status',
+}
+_LABELS = {
+    REQUEST_DURATION: ('route', 'method'),
+    STAGE_DURATION: ('route', 'stage'),
+    REQUESTS: ('route', 'method', 'status'),
+}
+
+# The timer of the request being served by each thread
+_current = threading.local()
+
+
+def mark(stage):
+    """
+    End a stage of the current request, if the calling thread is serving one
+    """
+    timer = getattr(_current, 'timer', None)
+    if timer is not None:
+        timer.mark(stage)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestTimer:
+    """
+    Latency of one request, recorded into the shard of the thread serving it
+    """
+
+    __slots__ = ('metrics', 'route', 'method', 'start', 'last')
+
+    def __init__(self, metrics, route, method):
+        self.metrics = metrics
+        self.route = route
+        self.method = method
+        self.start = self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.metrics.observe(STAGE_DURATION, (self.route, stage), now - self.last)
+        self.last = now
+
+    def finish(self, status):
+        self.mark('serialize')
+        self.metrics.observe(REQUEST_DURATION, (self.route, self.method), self.last - self.start)
+        self.metrics.increment(REQUESTS, (self.route, self.method, status))
+
+
+class _ShardOwner:
+    """
+    Kept in a thread's thread-local only; it is collected when the thread exits
+    """
+
+
+def _add(histograms, counters, shard_histograms, shard_counters):
+    # Another thread may add a key while we read; copying the items is atomic under the GIL
+    for key, values in list(shard_histograms.items()):
+        merged = histograms.setdefault(key, [0] * len(values))
+        for index, value in enumerate(values):
+            merged[index] += value
+    for key, value in list(shard_counters.items()):
+        counters[key] = counters.get(key, 0) + value
+
+
+class Metrics:
+    """
+    Per-thread sharded histograms and counters, plus collectors read at scrape time
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = {}  # Shards of live threads by id
+        self._retired = ({}, {})  # Totals of the threads that have exited
+        self._shard_ids = itertools.count()
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = ({}, {})  # (histograms, counters)
+            shard_id = next(self._shard_ids)
+            self._local.shard = shard
+            self._local.owner = owner = _ShardOwner()
+            with self._lock:
+                self._shards[shard_id] = shard
+            weakref.finalize(owner, self._retire, shard_id)
+        return shard
+
+    def _retire(self, shard_id):
+        with self._lock:
+            shard = self._shards.pop(shard_id, None)
+            if shard is not None:
+                _add(*self._retired, *shard)
+
+    def observe(self, name, labels, seconds):
+        """
+        Add a value to histogram name; labels is a tuple of label values
+        """
+        histograms = self._shard()[0]
+        key = (name, labels)
+        values = histograms.get(key)
+        if values is None:
+            # One count per bucket (not cumulative) followed by the sum
+            values = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        values[bisect_left(self.buckets, seconds)] += 1
+        values[-1] += seconds
+
+    def increment(self, name, labels, amount=1):
+        counters = self._shard()[1]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def start_request(self, route, method):
+        """
+        Start timing a request on the calling thread and return its timer
+        """
+        timer = RequestTimer(self, route, method)
+        _current.timer = timer
+        return timer
+
+    def finish_request(self, status):
+        """
+        Record the request being timed on the calling thread, if any
+        """
+        timer = getattr(_current, 'timer', None)
+        if timer is not None:
+            _current.timer = None
+            timer.finish(status)
+
+    def add_collector(self, collector):
+        """
+        Register a callable yielding (name, type, help, [(labels dict, value)])
+        for every metric it reports; it is called on every scrape
+        """
+        self._collectors.append(collector)
+
+    def _merged(self):
+        histograms, counters = {}, {}
+        # Held throughout so that a shard is not counted both live and retired by a thread exiting meanwhile
+        with self._lock:
+            _add(histograms, counters, *self._retired)
+            for shard in self._shards.values():
+                _add(histograms, counters, *shard)
+        return histograms, counters
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format
+        """
+        histograms, counters = self._merged()
+        worker = str(os.getpid())
+        lines = []
+
+        for name in (REQUEST_DURATION, STAGE_DURATION):
+            lines.append(f'# HELP {name} {_HELP[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            names = ('worker',) + _LABELS[name]
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(names + ("le",), (worker,) + labels + (le,))} '
+                                 f'{cumulative}')
+                lines.append(f'{name}_sum{_format_labels(names, (worker,) + labels)} {values[-1]!r}')
+                lines.append(f'{name}_count{_format_labels(names, (worker,) + labels)} {cumulative}')
+
+        lines.append(f'# HELP {REQUESTS} {_HELP[REQUESTS]}')
+        lines.append(f'# TYPE {REQUESTS} counter')
+        names = ('worker',) + _LABELS[REQUESTS]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == REQUESTS:
+                lines.append(f'{REQUESTS}{_format_labels(names, (worker,) + labels)} {value}')
+
+        for collector in self._collectors:
+            for name, kind, description, samples in collector():
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    labels = {'worker': worker, **labels}
+                    lines.append(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} '
+                                 f'{_format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -2,11 +2,19 @@ import joblib
 import numpy as np
 import os
 
-# Load both models
-rf_model = joblib.load("model/heart_model.pkl")
-rf_scaler = joblib.load("model/scaler.pkl")
-nn_model = joblib.load("model/neural_network_model.pkl")
-nn_scaler = joblib.load("model/scaler_nn.pkl")
+from backend.config import MODEL_MMAP_MODE, NN_RAW_MODEL_PATH, RF_RAW_MODEL_PATH
+
+# Load both models, preferring the raw-feature exports that already include their scaler
+# (their arrays are memory-mapped and shared with the API processes)
+if os.path.exists(RF_RAW_MODEL_PATH) and os.path.exists(NN_RAW_MODEL_PATH):
+    rf_model = joblib.load(RF_RAW_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+    nn_model = joblib.load(NN_RAW_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+    rf_scaler = nn_scaler = None
+else:
+    rf_model = joblib.load("model/heart_model.pkl")
+    rf_scaler = joblib.load("model/scaler.pkl")
+    nn_model = joblib.load("model/neural_network_model.pkl")
+    nn_scaler = joblib.load("model/scaler_nn.pkl")
 
 def get_comparison_prediction(features):
     """
@@ -16,12 +24,12 @@ def get_comparison_prediction(features):
     features_array = np.array(features).reshape(1, -1)
     
     # Get Random Forest prediction
-    rf_scaled = rf_scaler.transform(features_array)
+    rf_scaled = features_array if rf_scaler is None else rf_scaler.transform(features_array)
     rf_prediction = int(rf_model.predict(rf_scaled)[0])
     rf_probability = float(rf_model.predict_proba(rf_scaled)[0][1])
     
     # Get Neural Network prediction
-    nn_scaled = nn_scaler.transform(features_array)
+    nn_scaled = features_array if nn_scaler is None else nn_scaler.transform(features_array)
     nn_prediction = int(nn_model.predict(nn_scaled)[0])
     nn_probability = float(nn_model.predict_proba(nn_scaled)[0][1])
     
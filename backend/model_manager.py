@@ -0,0 +1,213 @@
+"""
+Hot reload of the serving models.
+
+A ModelManager reloads the registry when the artifacts it serves change on
+disk (a watcher thread compares their size and modification time every
+MODEL_RELOAD_INTERVAL seconds) or when asked to through POST /models/reload.
+
+A reload loads the new artifacts into a separate ModelSet while the current
+one keeps serving, scores a canary batch of dataset/heart.csv with every
+model, and installs the set only if all the models that are served now
+loaded again and scored the canary sensibly. Installing is a single
+reference assignment (ModelRegistry.swap): requests that started earlier
+keep the ModelSet they read and finish on the old version, and no request
+waits on the reload. Listeners, such as the per-version analysis caches,
+are then told about the new set.
+
+train_models.py and raw_models.py replace artifacts by renaming complete
+files over them, and the watcher only reloads once the files have stopped
+changing between two checks, so a half-written export is never loaded.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from backend.config import CANARY_MIN_ACCURACY, CANARY_ROWS, DATASET_PATH, MODEL_RELOAD_INTERVAL
+from backend.dataset import load_dataset
+from backend.model_registry import artifact_paths
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def artifact_signature():
+    """
+    (path, mtime, size) of every serving artifact; None for missing files
+    """
+    signature = []
+    for path in artifact_paths():
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def load_canary(path=DATASET_PATH, rows=CANARY_ROWS):
+    """
+    Return (X, y) for rows evenly spaced over the dataset, features in dataset order
+    """
+    X, y, _ = load_dataset(path).features()
+    selected = np.unique(np.linspace(0, len(y) - 1, num=min(rows, len(y))).astype(int))
+    return np.ascontiguousarray(X[selected]), y[selected].astype(int)
+
+
+class ModelManager:
+    """
+    Reloads a ModelRegistry from disk, validating new models before serving them
+    """
+
+    def __init__(self, registry, poll_interval=MODEL_RELOAD_INTERVAL, canary_path=DATASET_PATH,
+                 canary_rows=CANARY_ROWS, min_accuracy=CANARY_MIN_ACCURACY):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.canary_path = canary_path
+        self.canary_rows = canary_rows
+        self.min_accuracy = min_accuracy
+        self.last_reload = None
+        self.reloads = {'reloaded': 0, 'unchanged': 0, 'rejected': 0}
+        self._listeners = []
+        self._canary = None
+        self._reload_lock = threading.Lock()
+        self._signature = artifact_signature()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """
+        Call callback(models) with every ModelSet that gets installed
+        """
+        self._listeners.append(callback)
+
+    def canary(self):
+        if self._canary is None:
+            self._canary = load_canary(self.canary_path, self.canary_rows)
+        return self._canary
+
+    def validate(self, models, previous=None):
+        """
+        Return the reasons not to serve a ModelSet; an empty list means it can be served
+        """
+        if not models.predictors:
+            return ['No model could be loaded']
+        errors = [f"{name} is served now but failed to load"
+                  for name in (previous.predictors if previous else ()) if name not in models.predictors]
+
+        X, y = self.canary()
+        for name, predictor in models.predictors.items():
+            try:
+                predictions, probabilities, _ = predictor.predict_batch(X)
+            except Exception as e:
+                errors.append(f"{name} failed on the canary batch: {e}")
+                continue
+            if probabilities.shape != (len(X),) or not np.all((probabilities >= 0) & (probabilities <= 1)):
+                errors.append(f"{name} returned invalid probabilities on the canary batch")
+                continue
+            accuracy = float(np.mean(predictions == y))
+            if accuracy < self.min_accuracy:
+                errors.append(f"{name} canary accuracy {accuracy:.3f} is below {self.min_accuracy:.3f}")
+        return errors
+
+    def reload(self):
+        """
+        Load the artifacts on disk and serve them if they validate.
+
+        Returns a status dict whose 'status' is 'reloaded', 'unchanged' or
+        'rejected' (with 'errors'); the current models keep serving unless
+        it is 'reloaded'.
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            self._signature = artifact_signature()
+            previous = self.registry.current
+            try:
+                models = self.registry.build()
+                errors = [] if models.version == previous.version else self.validate(models, previous)
+            except Exception as e:
+                models, errors = None, [f"Error loading models: {e}"]
+
+            status = {
+                'previous_version': previous.version,
+                'at': datetime.now().isoformat(timespec='seconds'),
+            }
+            if errors:
+                status.update(status='rejected', model_version=previous.version, errors=errors)
+                logger.error(f"Rejected model reload; still serving version {previous.version}: {'; '.join(errors)}")
+            elif models.version == previous.version:
+                status.update(status='unchanged', model_version=previous.version)
+            else:
+                self.registry.swap(models)
+                status.update(status='reloaded', model_version=models.version)
+                logger.info(f"Now serving model version {models.version} (was {previous.version})")
+                for callback in self._listeners:
+                    try:
+                        callback(models)
+                    except Exception as e:
+                        logger.error(f"Error notifying {callback} of model version {models.version}: {e}")
+            status['seconds'] = round(time.perf_counter() - start, 3)
+            self.reloads[status['status']] += 1
+            self.last_reload = status
+            return dict(status)
+
+    def check(self):
+        """
+        Reload if the artifacts changed and have not changed since the last
+        check; returns the reload status, or None if nothing was reloaded
+        """
+        signature = artifact_signature()
+        if signature == self._signature:
+            self._pending = None
+            return None
+        if signature != self._pending:
+            # Still being written, or changed just now; load it once it has settled
+            self._pending = signature
+            return None
+        self._pending = None
+        return self.reload()
+
+    def start(self):
+        """
+        Start the watcher thread; does nothing if watching is disabled or it is running
+        """
+        # Spawned pool workers re-import the main module; only the serving process watches
+        if multiprocessing.current_process().name != 'MainProcess' or self.poll_interval <= 0:
+            return None
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching model artifacts for changes every {self.poll_interval:g}s")
+        return self._thread
+
+    def stop(self):
+        """
+        Stop the watcher thread, e.g. before forking worker processes
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error checking model artifacts: {e}")
+
+    def status(self):
+        return {
+            'model_version': self.registry.version,
+            'models': sorted(self.registry.predictors),
+            'watching': self._thread is not None and self._thread.is_alive(),
+            'poll_interval': self.poll_interval,
+            'last_reload': self.last_reload,
+            'reloads': dict(self.reloads),
+        }
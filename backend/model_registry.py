@@ -0,0 +1,265 @@
+"""
+Registry of the serving models.
+
+Loads the Random Forest and the MLP (with their scalers) once at startup and
+scores a row against several models concurrently. NumPy and sklearn release
+the GIL inside tree traversal and matrix products, so a thread pool brings
+ensemble latency close to the slowest model instead of the sum of both.
+
+Artifacts are opened with joblib's mmap_mode, so the arrays of a CompiledForest
+or MLP are mapped read-only from the page cache rather than copied into every
+process. sklearn's own trees copy their nodes when unpickled, which is why the
+raw-feature export stores the forest as a CompiledForest. With
+USE_COMPILED_MLP the MLP is served from the NumPy runtime in compiled_mlp.py,
+loaded from its .npz export when present, so serving imports no sklearn.
+
+Tree models also get a TreeExplainer, whose per-leaf path tables are built
+once per load and reused by every explanation.
+
+The loaded models, explainers and version form one immutable ModelSet, and
+a reload builds a new ModelSet before installing it with a single reference
+assignment (see model_manager.py). Every scoring method reads the current
+set once or takes the set a request started with, so a request never mixes
+models from two versions.
+
+Results are memoized in a PredictionCache keyed on the registry version,
+which changes (and clears the cache) whenever the models are reloaded.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from backend.compiled_forest import CompiledForest
+from backend.compiled_mlp import CompiledMLP
+from backend.config import (
+    ENSEMBLE_WEIGHTS, ENSEMBLE_WORKERS, MODEL_MMAP_MODE, NN_COMPILED_PATH, NN_MODEL_PATH, NN_RAW_MODEL_PATH,
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, RAW_FEATURE_MODELS, RF_MODEL_PATH, RF_RAW_MODEL_PATH,
+    SCALER_NN_PATH, SCALER_PATH, USE_COMPILED_FOREST, USE_COMPILED_MLP,
+)
+from backend.inference import Explanation, Predictor
+from backend.metrics import mark
+from backend.prediction_cache import PredictionCache, canonical_features
+from backend.tree_shap import TreeExplainer
+from backend.utils.hashing import combined_sha256
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+RANDOM_FOREST = 'random_forest'
+NEURAL_NETWORK = 'neural_network'
+
+# Display names used in API responses
+MODEL_DISPLAY_NAMES = {
+    RANDOM_FOREST: 'Random Forest',
+    NEURAL_NETWORK: 'Neural Network',
+}
+
+
+# The models served together and the version identifying their artifacts
+ModelSet = namedtuple('ModelSet', ['predictors', 'explainers', 'version'])
+
+
+def _load_artifact(path, description, mmap_mode=MODEL_MMAP_MODE):
+    if not os.path.exists(path):
+        logger.warning(f"{description} not found at {path}")
+        return None
+    try:
+        if path.endswith('.npz'):
+            artifact = CompiledMLP.load(path)
+        else:
+            artifact = joblib.load(path, mmap_mode=mmap_mode)
+        logger.info(f"{description} loaded from {path}")
+        return artifact
+    except Exception as e:
+        logger.error(f"Error loading {description} from {path}: {e}")
+        return None
+
+
+def _model_sources():
+    """
+    Return (name, model path, scaler path) for each serving model; raw-feature
+    models have the scaler folded in and need no scaler
+    """
+    if RAW_FEATURE_MODELS:
+        sources = [
+            (RANDOM_FOREST, RF_RAW_MODEL_PATH, None),
+            (NEURAL_NETWORK, NN_RAW_MODEL_PATH, None),
+        ]
+    else:
+        sources = [
+            (RANDOM_FOREST, RF_MODEL_PATH, SCALER_PATH),
+            (NEURAL_NETWORK, NN_MODEL_PATH, SCALER_NN_PATH),
+        ]
+    if USE_COMPILED_MLP and os.path.exists(NN_COMPILED_PATH):
+        # The exported weights take raw features, so loading them needs no sklearn
+        sources[1] = (NEURAL_NETWORK, NN_COMPILED_PATH, None)
+    return sources
+
+
+def artifact_paths():
+    """
+    Paths of the artifacts the serving models are loaded from
+    """
+    return [path for _, model_path, scaler_path in _model_sources() for path in (model_path, scaler_path) if path]
+
+
+class ModelRegistry:
+    """
+    Holds one Predictor per loaded model and evaluates them in parallel
+    """
+
+    def __init__(self, weights=None, max_workers=ENSEMBLE_WORKERS, cache=None):
+        self.current = ModelSet({}, {}, None)
+        self.weights = dict(weights or ENSEMBLE_WEIGHTS)
+        self.cache = cache if cache is not None else PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ensemble')
+
+    @property
+    def predictors(self):
+        return self.current.predictors
+
+    @property
+    def explainers(self):
+        return self.current.explainers
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def load(self):
+        """
+        Load every serving model and start serving them
+        """
+        self.swap(self.build())
+        return self
+
+    def build(self):
+        """
+        Load every serving model into a new ModelSet without serving it;
+        models that fail to load are left out
+        """
+        predictors = {}
+        explainers = {}
+        paths = []
+        for name, model_path, scaler_path in _model_sources():
+            description = MODEL_DISPLAY_NAMES[name]
+            model = _load_artifact(model_path, f"{description} model")
+            scaler = _load_artifact(scaler_path, f"{description} scaler") if scaler_path else None
+            if model is None or (scaler_path and scaler is None):
+                continue
+
+            if name == RANDOM_FOREST and USE_COMPILED_FOREST and not isinstance(model, CompiledForest):
+                model = CompiledForest.from_sklearn(model)
+                logger.info(f"Serving {description} from compiled forest ({model.n_estimators} trees)")
+            if name == NEURAL_NETWORK and USE_COMPILED_MLP and not isinstance(model, CompiledMLP):
+                model, scaler = CompiledMLP.from_sklearn(model, scaler), None
+                logger.info(f"Serving {description} from compiled MLP; export {NN_COMPILED_PATH} "
+                            f"with python -m backend.compiled_mlp to load it without sklearn")
+            predictors[name] = Predictor(model, scaler)
+            paths.extend(path for path in (model_path, scaler_path) if path)
+
+            if name == RANDOM_FOREST:
+                try:
+                    explainers[name] = TreeExplainer(model)
+                except ValueError as e:
+                    logger.warning(f"Explanations disabled for {description}: {e}")
+
+        # The version identifies the exact artifacts being served
+        version = combined_sha256(paths)[:12] if paths else None
+        logger.info(f"Model registry loaded {sorted(predictors)} (version {version})")
+        return ModelSet(predictors, explainers, version)
+
+    def swap(self, models):
+        """
+        Serve a ModelSet from now on and return the previous one. Requests
+        holding the previous set finish on it
+        """
+        previous, self.current = self.current, models
+        if previous.version != models.version:
+            self.cache.clear()
+        return previous
+
+    def get(self, name, models=None):
+        return (models or self.current).predictors.get(name)
+
+    @staticmethod
+    def _cache_key(models, name, features, kind='prediction'):
+        return (models.version, kind, name, features)
+
+    def predict(self, name, values, models=None):
+        """
+        Score one row of raw feature values with a single model, using the cache
+        """
+        return self.predict_all(values, [name], models)[name]
+
+    def predict_all(self, values, names=None, models=None):
+        """
+        Score one row of raw feature values with each named model concurrently.
+
+        Cached results are reused; only the misses are evaluated. Returns a dict
+        of model name -> Prediction for the models that are loaded. models
+        defaults to the current ModelSet.
+        """
+        models = models or self.current
+        predictors = models.predictors
+        names = [name for name in (names or predictors) if name in predictors]
+        features = canonical_features(values)
+
+        results = {}
+        misses = []
+        for name in names:
+            cached = self.cache.get(self._cache_key(models, name, features))
+            if cached is None:
+                misses.append(name)
+            else:
+                results[name] = cached
+        mark('cache')
+
+        if len(misses) == 1:
+            results[misses[0]] = predictors[misses[0]].predict_one(features)
+        elif misses:
+            futures = {
+                name: self._executor.submit(predictors[name].predict_one, features)
+                for name in misses
+            }
+            results.update((name, future.result()) for name, future in futures.items())
+
+        for name in misses:
+            self.cache.put(self._cache_key(models, name, features), results[name])
+        return {name: results[name] for name in names}
+
+    def explain(self, name, values, models=None):
+        """
+        Score one row with a tree model and return its TreeSHAP Explanation,
+        or None if the model has no explainer
+        """
+        models = models or self.current
+        explainer = models.explainers.get(name)
+        if explainer is None:
+            return None
+        features = canonical_features(values)
+        key = self._cache_key(models, name, features, kind='explanation')
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        prediction = self.predict(name, features, models)
+        mark('model')
+        model_input = models.predictors[name].scale(np.asarray([features], dtype=np.float64))
+        explanation = Explanation(prediction, explainer.expected_value, explainer.shap_values(model_input)[0])
+        self.cache.put(key, explanation)
+        return explanation
+
+    def ensemble_probability(self, results):
+        """
+        Weighted average of the positive-class probabilities, renormalized over
+        the models that produced a result
+        """
+        total_weight = sum(self.weights.get(name, 0.0) for name in results)
+        if total_weight <= 0:
+            return sum(result.probability for result in results.values()) / len(results)
+        return sum(self.weights.get(name, 0.0) * result.probability
+                   for name, result in results.items()) / total_weight
@@ -0,0 +1,101 @@
+"""
+Partial-dependence and ICE curves for the Random Forest, cached on disk.
+
+For every feature a grid of values is chosen (the distinct values of a
+categorical feature, otherwise quantiles between the 5th and 95th
+percentile), every patient in dataset/heart.csv is re-scored with the
+feature set to each grid value (the ICE curves), and the curves are averaged
+(partial dependence). All 13 features are scored as one batch.
+
+Tables are stored as compressed .npz files per model version and dataset
+(see versioned_cache.py) and served from memory.
+
+Run from the project root to precompute the table for the current models:
+    python -m backend.partial_dependence
+"""
+import numpy as np
+
+from backend.config import DATASET_CACHE_DIR, DATASET_PATH, PD_CACHE_DIR, PD_GRID_SIZE
+from backend.dataset import load_dataset
+from backend.model_registry import RANDOM_FOREST
+from backend.versioned_cache import VersionedCache
+
+# Grid quantiles for continuous features, as in sklearn's partial_dependence
+GRID_PERCENTILES = (0.05, 0.95)
+
+
+def feature_grid(column, grid_size=PD_GRID_SIZE):
+    """
+    Distinct values for low-cardinality features, otherwise evenly spaced quantiles
+    """
+    values = np.unique(column)
+    if values.size <= grid_size:
+        return values
+    return np.unique(np.quantile(column, np.linspace(*GRID_PERCENTILES, grid_size)))
+
+
+def compute_partial_dependence(predictor, data, feature_names, grid_size=PD_GRID_SIZE):
+    """
+    Return {feature: (grid, average, ice)} where ice has one curve per row of data
+    """
+    grids = [feature_grid(data[:, column], grid_size) for column in range(len(feature_names))]
+
+    # One block of len(data) * len(grid) rows per feature, scored in a single batch
+    blocks = []
+    for column, grid in enumerate(grids):
+        block = np.repeat(data, grid.size, axis=0)
+        block[:, column] = np.tile(grid, len(data))
+        blocks.append(block)
+    _, probabilities, _ = predictor.predict_batch(np.concatenate(blocks))
+
+    tables = {}
+    offset = 0
+    for feature, grid in zip(feature_names, grids):
+        size = len(data) * grid.size
+        ice = probabilities[offset:offset + size].reshape(len(data), grid.size)
+        tables[feature] = (grid, ice.mean(axis=0), ice.astype(np.float32))
+        offset += size
+    return tables
+
+
+class PartialDependenceCache(VersionedCache):
+    """
+    Per-model-version partial-dependence tables of the Random Forest
+    """
+
+    name = 'partial_dependence'
+    extension = '.npz'
+
+    def __init__(self, cache_dir=PD_CACHE_DIR, dataset_path=DATASET_PATH, grid_size=PD_GRID_SIZE,
+                 dataset_cache_dir=DATASET_CACHE_DIR):
+        super().__init__(cache_dir, dataset_path, dataset_cache_dir)
+        self.grid_size = grid_size
+
+    def compute(self, predictors):
+        data, _, feature_names = load_dataset(self.dataset_path, self.dataset_cache_dir).features()
+        return compute_partial_dependence(predictors[RANDOM_FOREST], data, feature_names, self.grid_size)
+
+    def dump(self, tables, f):
+        arrays = {'feature_names': np.array(list(tables))}
+        for feature, (grid, average, ice) in tables.items():
+            arrays[f'grid_{feature}'] = grid
+            arrays[f'average_{feature}'] = average
+            arrays[f'ice_{feature}'] = ice
+        np.savez_compressed(f, **arrays)
+
+    def load(self, f):
+        with np.load(f) as archive:
+            return {
+                feature: (archive[f'grid_{feature}'], archive[f'average_{feature}'], archive[f'ice_{feature}'])
+                for feature in (str(name) for name in archive['feature_names'])
+            }
+
+
+if __name__ == "__main__":
+    from backend.model_registry import ModelRegistry
+
+    registry = ModelRegistry().load()
+    cache = PartialDependenceCache()
+    cache.refresh(registry)
+    cache.wait()
+    print(f"Partial dependence table: {cache.path(registry.version)}")
@@ -0,0 +1,148 @@
+"""
+Model-agnostic permutation importance for every registered model.
+
+The importance of a feature is the drop in ROC AUC on the held-out split of
+dataset/heart.csv (the same 80/20 split train_models.py evaluates on) when
+that feature's column is shuffled, averaged over PERMUTATION_REPEATS
+shuffles. Because only predictions are needed, the Random Forest and the
+Neural Network get directly comparable importances.
+
+Each (model, feature, repeat) job runs on a process pool. Every worker
+receives the models and the evaluation matrix once, allocates one working
+copy of the matrix, and for each job shuffles a single column of that copy in
+place, scores it and restores the column, so no matrix is allocated per job.
+Shuffles are seeded by (feature, repeat), which makes results independent of
+how jobs are scheduled and gives every model the same permutations.
+
+Results are stored as JSON per model version and dataset (see versioned_cache.py).
+
+Run from the project root to precompute the results for the current models:
+    python -m backend.permutation_importance
+"""
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.config import (
+    DATASET_CACHE_DIR, DATASET_PATH, PERMUTATION_CACHE_DIR, PERMUTATION_REPEATS, PERMUTATION_SEED, PERMUTATION_WORKERS,
+)
+from backend.dataset import load_dataset
+from backend.versioned_cache import VersionedCache
+
+METRIC = 'roc_auc'
+
+# Per-worker state set by _init_worker
+_predictors = None
+_X = None
+_y = None
+_work = None
+
+
+def _score(predictor, X, y):
+    from sklearn.metrics import roc_auc_score
+
+    _, probabilities, _ = predictor.predict_batch(X)
+    return roc_auc_score(y, probabilities)
+
+
+def _init_worker(predictors, X, y):
+    global _predictors, _X, _y, _work
+    _predictors, _X, _y = predictors, X, y
+    # The one matrix each worker shuffles in place
+    _work = X.copy()
+
+
+def _permuted_score(job):
+    name, column, repeat, seed = job
+    rng = np.random.default_rng([seed, column, repeat])
+    _work[:, column] = _X[rng.permutation(len(_X)), column]
+    try:
+        return _score(_predictors[name], _work, _y)
+    finally:
+        _work[:, column] = _X[:, column]
+
+
+def evaluation_split(dataset_path=DATASET_PATH, dataset_cache_dir=DATASET_CACHE_DIR):
+    """
+    Return (X_test, y_test, feature_names) for the held-out split used in training
+    """
+    # sklearn is only needed while computing, not by the API process
+    from sklearn.model_selection import train_test_split
+
+    X, y, feature_names = load_dataset(dataset_path, dataset_cache_dir).features()
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_test, y_test, feature_names
+
+
+def compute_permutation_importance(predictors, X, y, feature_names, repeats=PERMUTATION_REPEATS,
+                                   workers=PERMUTATION_WORKERS, seed=PERMUTATION_SEED):
+    """
+    Return {model: {'baseline': score, 'features': {feature: {'mean', 'std'}}}}
+    for a {model name: Predictor} mapping
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    jobs = [(name, column, repeat, seed)
+            for name in predictors for column in range(len(feature_names)) for repeat in range(repeats)]
+
+    # spawn: the pool may be started from a thread of a process that later forks
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(predictors, X, y)) as executor:
+        scores = list(executor.map(_permuted_score, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+    scores = np.asarray(scores).reshape(len(predictors), len(feature_names), repeats)
+    results = {}
+    for name, model_scores in zip(predictors, scores):
+        baseline = _score(predictors[name], X, y)
+        drops = baseline - model_scores
+        results[name] = {
+            'baseline': float(baseline),
+            'features': {
+                feature: {'mean': float(drop.mean()), 'std': float(drop.std())}
+                for feature, drop in zip(feature_names, drops)
+            }
+        }
+    return results
+
+
+class PermutationImportanceCache(VersionedCache):
+    """
+    Per-model-version permutation importances of every registered model
+    """
+
+    name = 'permutation_importance'
+    extension = '.json'
+
+    def __init__(self, cache_dir=PERMUTATION_CACHE_DIR, dataset_path=DATASET_PATH,
+                 repeats=PERMUTATION_REPEATS, workers=PERMUTATION_WORKERS, dataset_cache_dir=DATASET_CACHE_DIR):
+        super().__init__(cache_dir, dataset_path, dataset_cache_dir)
+        self.repeats = repeats
+        self.workers = workers
+
+    def compute(self, predictors):
+        X, y, feature_names = evaluation_split(self.dataset_path, self.dataset_cache_dir)
+        return {
+            'metric': METRIC,
+            'repeats': self.repeats,
+            'n_samples': len(y),
+            'models': compute_permutation_importance(predictors, X, y, feature_names,
+                                                     self.repeats, self.workers)
+        }
+
+    def dump(self, result, f):
+        f.write(json.dumps(result).encode('utf-8'))
+
+    def load(self, f):
+        return json.loads(f.read().decode('utf-8'))
+
+
+if __name__ == "__main__":
+    from backend.model_registry import ModelRegistry
+
+    registry = ModelRegistry().load()
+    cache = PermutationImportanceCache()
+    cache.refresh(registry)
+    cache.wait()
+    print(f"Permutation importance: {cache.path(registry.version)}")
@@ -0,0 +1,94 @@
+"""
+Bounded in-process LRU/TTL cache of inference results.
+
+The Risk Simulator and prediction form send many identical or near-identical
+rows, and most of the 13 inputs are small integer codes, so repeat rates are
+high. Keys combine the model version with the canonicalized feature tuple, so
+results from a previous model can never be served after a reload.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+def canonical_features(values, decimals=6):
+    """
+    Canonicalize raw feature values into a hashable tuple.
+
+    Values are converted to float and rounded so that 52, 52.0 and "52" (or
+    2.3 and 2.3000000001) share a cache entry; adding 0.0 folds -0.0 into 0.0.
+    """
+    return tuple(round(float(value), decimals) + 0.0 for value in values)
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ttl seconds
+    """
+
+    def __init__(self, max_size=4096, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self.ttl and expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry, e.g. after the models are reloaded
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,165 @@
+"""
+Opt-in sampling profiler for the request paths.
+
+While enabled, a sample_rate fraction of requests is marked as profiled
+when it starts. A background thread wakes every interval seconds, reads the
+current frame of each thread serving a profiled request
+(sys._current_frames) and counts its call stack. The request itself runs
+unmodified: nothing is traced per call, so the overhead is bounded by the
+sampling interval rather than by how many Python calls a request makes, and
+time spent in NumPy or sklearn's native code is attributed to the Python
+frame that called it.
+
+Stacks are aggregated in the collapsed format flamegraph.pl, speedscope and
+inferno read: one line per distinct stack, frames from the route down to the
+sampled function separated by semicolons, followed by the number of samples.
+Frames above Flask's dispatch_request (the server and Flask machinery) are
+dropped, and the route is the root frame.
+
+While disabled, a request costs one attribute check. The sampler thread is
+started on the first profiled request (and again after a fork) and stops
+when profiling is disabled. Every gunicorn worker profiles its own requests.
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of a fraction of requests into collapsed-stack counts
+    """
+
+    def __init__(self, sample_rate=0.01, interval=0.005, enabled=False):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.enabled = enabled
+        self.samples = 0
+        self.requests = 0
+        self.since = time.time()
+        self._stacks = {}
+        self._labels = {}
+        self._active = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def configure(self, enabled=None, sample_rate=None, interval=None):
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError('sample_rate must be between 0 and 1')
+            self.sample_rate = sample_rate
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError('interval must be positive')
+            self.interval = interval
+        if enabled is not None:
+            self.enabled = enabled
+            # Let an idle sampler notice it should stop
+            self._wake.set()
+            logger.info(f"Sampling profiler {'enabled' if enabled else 'disabled'} "
+                        f"(sample rate {self.sample_rate:g}, interval {self.interval * 1000:g} ms)")
+
+    def reset(self):
+        with self._lock:
+            self._stacks = {}
+            self.samples = 0
+            self.requests = 0
+            self.since = time.time()
+
+    def begin(self, route):
+        """
+        Decide whether the request starting on this thread is profiled
+        """
+        if random.random() >= self.sample_rate:
+            return False
+        self._ensure_started()
+        self._active[threading.get_ident()] = route
+        self.requests += 1
+        self._wake.set()
+        return True
+
+    def end(self):
+        self._active.pop(threading.get_ident(), None)
+
+    def _ensure_started(self):
+        # Started lazily (and restarted after a fork) so that preforked workers each sample their own threads
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads of the parent process do not exist here
+                self._pid = os.getpid()
+                self._active = {}
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _collapse(self, frame, route):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name == 'dispatch_request' and 'flask' in code.co_filename:
+                break
+            labels.append(self._label(code))
+            frame = frame.f_back
+        labels.append(route)
+        return ';'.join(reversed(labels))
+
+    def sample(self):
+        """
+        Count the current stack of every thread serving a profiled request
+        """
+        active = list(self._active.items())
+        if not active:
+            return 0
+        frames = sys._current_frames()
+        collapsed = [self._collapse(frames[ident], route) for ident, route in active if ident in frames]
+        with self._lock:
+            for stack in collapsed:
+                self._stacks[stack] = self._stacks.get(stack, 0) + 1
+            self.samples += len(collapsed)
+        return len(collapsed)
+
+    def _run(self):
+        while self.enabled:
+            if not self._active:
+                # Idle until a profiled request starts or profiling is disabled
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            self.sample()
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        """
+        Return the aggregated stacks as 'frame;frame;... count' lines, busiest first
+        """
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: -item[1])
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'interval_ms': self.interval * 1000,
+                'profiled_requests': self.requests,
+                'samples': self.samples,
+                'stacks': len(self._stacks),
+                'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.since)),
+            }
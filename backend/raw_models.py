@@ -0,0 +1,136 @@
+"""
+Export "raw-feature" model artifacts with the StandardScaler folded in.
+
+A tree only compares one feature against a threshold, so a split on the
+scaled value (x - mean) / scale <= t is the same split as x <= t * scale + mean
+on the raw value. For the MLP the scaling is affine and is absorbed into the
+first layer: W' = W / scale and b' = b - (mean / scale) @ W.
+
+The Random Forest is exported as a CompiledForest because sklearn casts
+inputs to float32, which cannot reproduce the float64 scaling of raw values
+that fall within float32 rounding of a split.
+
+The exported models take unscaled inputs directly, so serving skips the
+scaler.transform call and can never pair a model with the wrong scaler.
+"""
+import copy
+
+import joblib
+import numpy as np
+
+from backend.compiled_forest import CompiledForest
+from backend.config import (
+    DATASET_PATH, NN_MODEL_PATH, NN_RAW_MODEL_PATH, RF_MODEL_PATH, RF_RAW_MODEL_PATH,
+    SCALER_NN_PATH, SCALER_PATH,
+)
+from backend.dataset import load_dataset
+from backend.utils.files import atomic_path
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def _fold_thresholds(thresholds, features, mean, scale):
+    """
+    Convert scaled split thresholds to raw feature units.
+
+    The original pipeline scales in float64 and then sklearn casts to float32
+    before comparing, and trained thresholds often sit exactly on a float32
+    training value, so t * scale + mean is not precise enough. Instead the
+    largest float64 raw value that still goes left is found by bisection,
+    which makes every raw input take the same branch as before folding.
+    """
+    feature_mean = mean[features]
+    feature_scale = scale[features]
+
+    def goes_left(raw):
+        return ((raw - feature_mean) / feature_scale).astype(np.float32) <= thresholds
+
+    estimate = thresholds * feature_scale + feature_mean
+    margin = (np.abs(thresholds) + 1.0) * feature_scale * 1e-5
+    low, high = estimate - margin, estimate + margin
+    # The bisection needs a value going left and one going right around every threshold
+    unbracketed = ~goes_left(low) | goes_left(high)
+    if unbracketed.any():
+        raise ValueError(f"Cannot fold {np.count_nonzero(unbracketed)} split threshold(s) into raw units "
+                         f"(features {sorted(set(features[unbracketed].tolist()))})")
+
+    while True:
+        middle = low + (high - low) / 2
+        unresolved = (middle > low) & (middle < high)
+        if not unresolved.any():
+            return low
+        left = goes_left(middle)
+        low = np.where(unresolved & left, middle, low)
+        high = np.where(unresolved & ~left, middle, high)
+
+
+def fold_scaler_into_forest(forest, scaler):
+    """
+    Compile a fitted tree ensemble into a CompiledForest whose split thresholds
+    are expressed in raw (unscaled) feature units and compared in float64
+    """
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    compiled = CompiledForest.from_sklearn(forest)
+
+    internal = np.isfinite(compiled.threshold)
+    compiled.threshold[internal] = _fold_thresholds(
+        compiled.threshold[internal], compiled.feature[internal], mean, scale)
+    compiled.input_dtype = np.float64
+    return compiled
+
+
+def fold_scaler_into_mlp(mlp, scaler):
+    """
+    Return a copy of a fitted MLPClassifier whose first layer applies the scaling
+    """
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    folded = copy.deepcopy(mlp)
+
+    weights = mlp.coefs_[0]
+    folded.coefs_[0] = weights / scale[:, None]
+    folded.intercepts_[0] = mlp.intercepts_[0] - (mean / scale) @ weights
+    return folded
+
+
+def _max_probability_difference(model, scaler, raw_model, raw_features):
+    expected = model.predict_proba(scaler.transform(raw_features))
+    actual = raw_model.predict_proba(raw_features.values)
+    return float(np.abs(expected - actual).max())
+
+
+def export_raw_models():
+    """
+    Fold the saved scalers into the saved RF and MLP models and write the
+    raw-feature artifacts next to them
+    """
+    raw_features = load_dataset(DATASET_PATH).to_frame().drop(columns=['target'])
+    exported = {}
+
+    for name, model_path, scaler_path, raw_path, fold in (
+        ('RandomForest', RF_MODEL_PATH, SCALER_PATH, RF_RAW_MODEL_PATH, fold_scaler_into_forest),
+        ('Neural Network', NN_MODEL_PATH, SCALER_NN_PATH, NN_RAW_MODEL_PATH, fold_scaler_into_mlp),
+    ):
+        model = joblib.load(model_path)
+        scaler = joblib.load(scaler_path)
+        raw_model = fold(model, scaler)
+
+        difference = _max_probability_difference(model, scaler, raw_model, raw_features)
+        logger.info(f"{name}: max probability difference after folding the scaler: {difference:.2e}")
+
+        logger.info(f"Saving raw-feature {name} model to {raw_path}")
+        # Written uncompressed so that its arrays can be memory-mapped on load
+        with atomic_path(raw_path) as temporary_path:
+            joblib.dump(raw_model, temporary_path, compress=0)
+        exported[name] = raw_path
+
+    return exported
+
+
+if __name__ == "__main__":
+    paths = export_raw_models()
+    print("Raw-feature models saved at:")
+    for name, path in paths.items():
+        print(f"{name}: {path}")
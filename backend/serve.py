@@ -0,0 +1,95 @@
+"""
+Production entry point: a preforking gunicorn server.
+
+The app (and with it every model artifact) is imported once in the master
+process before the workers are forked, so the workers share the model memory
+copy-on-write. The heap is frozen after loading so the garbage collector
+does not touch, and thereby copy, the shared pages in each worker. Models
+hot-reloaded later (model_manager.py) are loaded by every worker on its own.
+
+Run from the project root:
+    python -m backend.serve
+or equivalently:
+    gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+"""
+import gc
+
+from gunicorn.app.base import BaseApplication
+
+from backend.config import SERVER_BIND, SERVER_THREADS, SERVER_TIMEOUT, SERVER_WORKERS
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded and before any worker is
+    # forked, under both entry points (python -m backend.serve and gunicorn -c)
+    from backend.app import (
+        cross_validation_cache, model_manager, partial_dependence_cache, permutation_importance_cache,
+    )
+
+    # Let startup analysis jobs finish so no thread is running at fork time; the
+    # workers restart the model watcher, the master only forks and never reloads
+    model_manager.stop()
+    partial_dependence_cache.wait()
+    permutation_importance_cache.wait()
+    cross_validation_cache.wait()
+
+    # Move everything allocated while loading the models out of the GC's
+    # generations so that collections in the workers never write to those pages
+    gc.freeze()
+    logger.info(f"Master ready with models preloaded; forking {server.cfg.workers} worker(s)")
+
+
+def post_fork(server, worker):
+    from backend.app import model_manager
+
+    # Threads do not survive fork; every worker watches for new models and reloads its own copy
+    model_manager.start()
+    logger.info(f"Worker {worker.pid} started")
+
+
+class PreforkServer(BaseApplication):
+    """
+    gunicorn application that preloads backend.app in the master
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from backend.app import app
+
+        return app
+
+
+def server_options(workers=SERVER_WORKERS, threads=SERVER_THREADS, bind=SERVER_BIND):
+    return {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': True,
+        'timeout': SERVER_TIMEOUT,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run the API under a preforking gunicorn server')
+    parser.add_argument('--workers', type=int, default=SERVER_WORKERS)
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS)
+    parser.add_argument('--bind', default=SERVER_BIND)
+    args = parser.parse_args()
+
+    PreforkServer(server_options(args.workers, args.threads, args.bind)).run()
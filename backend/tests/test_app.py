@@ -0,0 +1,229 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from backend.model_registry import NEURAL_NETWORK, RANDOM_FOREST, ModelRegistry
+from backend.utils.schema import HEART_SCHEMA
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def api():
+    from backend import app as api
+
+    yield api
+    api.model_manager.stop()
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+
+@pytest.fixture(scope='module')
+def patients():
+    with open(DATASET_PATH) as f:
+        columns = f.readline().strip().split(',')
+    data = np.loadtxt(DATASET_PATH, delimiter=',', skiprows=1)
+    return [dict(zip(columns, row)) for row in data[:20].tolist()]
+
+
+def patient(record):
+    return {name: record[name] for name in HEART_SCHEMA.names}
+
+
+def test_sweep_scores_every_grid_point(api, client, patients):
+    base = patient(patients[0])
+    response = client.post('/predict/sweep', json={
+        'base': base,
+        'axes': [{'feature': 'age', 'values': [40, 55, 70]}, {'feature': 'sex', 'values': [0, 1]}],
+    })
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [axis['feature'] for axis in body['axes']] == ['age', 'sex']
+    assert np.shape(body['probabilities']) == (3, 2)
+    for i, age in enumerate([40, 55, 70]):
+        for j, sex in enumerate([0, 1]):
+            values = HEART_SCHEMA.decode(dict(base, age=age, sex=sex))
+            expected = api.registry.predict(RANDOM_FOREST, values).probability
+            assert body['probabilities'][i][j] == pytest.approx(expected)
+    assert body['base_probability'] == pytest.approx(
+        api.registry.predict(RANDOM_FOREST, HEART_SCHEMA.decode(base)).probability)
+
+
+def test_sweep_base_may_leave_out_the_swept_feature(client, patients):
+    base = patient(patients[0])
+    del base['chol']
+    response = client.post('/predict/sweep', json={
+        'base': base, 'axes': [{'feature': 'chol', 'min': 150, 'max': 350, 'steps': 5}]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['axes'][0]['values'] == [150, 200, 250, 300, 350]
+    assert body['base']['chol'] == 150
+    assert len(body['probabilities']) == 5
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'axes',
+    {'base': None, 'axes': [{'feature': 'age', 'values': [40]}]},
+    {'axes': [{'feature': 'height', 'values': [170]}]},
+    {'axes': [{'feature': 'age', 'values': [500]}]},
+])
+def test_malformed_sweeps_are_rejected(client, patients, body):
+    if isinstance(body, dict) and 'base' not in body:
+        body = dict(body, base=patient(patients[0]))
+
+    response = client.post('/predict/sweep', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_sweep_without_a_json_body_is_rejected(client):
+    response = client.post('/predict/sweep', data='not json', content_type='text/plain')
+
+    assert response.status_code == 400
+
+
+def test_oversized_sweeps_are_rejected(client, patients):
+    response = client.post('/predict/sweep', json={
+        'base': patient(patients[0]),
+        'axes': [{'feature': 'chol', 'min': 150, 'max': 350, 'steps': 201},
+                 {'feature': 'trestbps', 'min': 100, 'max': 180, 'steps': 201}],
+    })
+
+    assert response.status_code == 413
+
+
+def test_batch_scores_valid_rows_and_reports_invalid_ones(api, client, patients):
+    records = [patient(record) for record in patients[:4]]
+    records[1] = dict(records[1], cp=7)
+    del records[2]['age']
+
+    response = client.post('/predict/batch', json=records)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['count'], body['scored'], body['failed']) == (4, 2, 2)
+    assert [error['index'] for error in body['errors']] == [1, 2]
+    assert body['errors'][0]['error'] == 'cp must be between 0 and 3, got 7'
+    assert [result['index'] for result in body['results']] == [0, 3]
+    for result in body['results']:
+        expected = api.registry.predict(RANDOM_FOREST, HEART_SCHEMA.decode(records[result['index']]))
+        assert result['probability'] == pytest.approx(expected.probability)
+        assert result['prediction'] == expected.prediction
+        assert result['risk_level'] == expected.risk_level
+
+
+def test_batch_accepts_json_csv_and_ndjson_bodies(client, patients):
+    records = [patient(record) for record in patients[:5]]
+    csv_body = ','.join(HEART_SCHEMA.names) + '\n' + '\n'.join(
+        ','.join(repr(record[name]) for name in HEART_SCHEMA.names) for record in records) + '\n'
+    ndjson_body = '\n'.join(json.dumps(record) for record in records) + '\n'
+
+    responses = [
+        client.post('/predict/batch', json=records),
+        client.post('/predict/batch', json={'records': records}),
+        client.post('/predict/batch', data=csv_body, content_type='text/csv'),
+        client.post('/predict/batch', data=ndjson_body, content_type='application/x-ndjson'),
+    ]
+
+    assert [response.status_code for response in responses] == [200] * 4
+    expected = responses[0].get_json()['results']
+    assert len(expected) == 5
+    for response in responses[1:]:
+        assert response.get_json()['results'] == expected
+
+
+def test_batch_reports_undecodable_ndjson_lines_per_row(client, patients):
+    lines = json.dumps(patient(patients[0])) + '\n{"age": \n' + json.dumps(patient(patients[1])) + '\n'
+
+    response = client.post('/predict/batch', data=lines, content_type='application/x-ndjson')
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [result['index'] for result in body['results']] == [0, 2]
+    assert body['errors'][0]['index'] == 1 and body['errors'][0]['error'].startswith('Invalid JSON on line 2')
+
+
+def test_batch_rejects_unparseable_bodies(client):
+    assert client.post('/predict/batch', data='[{"age": ', content_type='application/json').status_code == 400
+    assert client.post('/predict/batch', json={'age': 52}).status_code == 400
+
+
+def test_batch_row_limit(api, client, patients, monkeypatch):
+    monkeypatch.setattr(api, 'MAX_BATCH_SIZE', 3)
+    records = [patient(record) for record in patients[:4]]
+
+    response = client.post('/predict/batch', json=records)
+
+    assert response.status_code == 413
+    assert 'limit of 3' in response.get_json()['error']
+    assert client.post('/predict/batch', json=records[:3]).status_code == 200
+
+
+def test_ensemble_combines_the_weighted_member_probabilities(api, client, patients):
+    record = patient(patients[0])
+
+    response = client.post('/predict/ensemble', json=record)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    values = HEART_SCHEMA.decode(record)
+    members = {name: predictor.predict_one(values) for name, predictor in api.registry.predictors.items()}
+    assert body['rf_probability'] == pytest.approx(members[RANDOM_FOREST].probability)
+    assert body['nn_probability'] == pytest.approx(members[NEURAL_NETWORK].probability)
+    weights = api.registry.weights
+    expected = sum(weights[name] * result.probability for name, result in members.items()) / sum(
+        weights[name] for name in members)
+    assert body['probability'] == pytest.approx(expected)
+    assert body['prediction'] == int(expected > 0.5)
+
+
+def test_ready_only_once_the_models_are_loaded(api, client, monkeypatch):
+    # A registry that has not loaded its models yet, as while a worker starts
+    monkeypatch.setattr(api, 'registry', ModelRegistry())
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json() == {'status': 'not ready', 'models': []}
+
+    api.registry.load()
+    response = client.get('/ready')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'ready'
+    assert body['models'] == [NEURAL_NETWORK, RANDOM_FOREST]
+    assert body['model_version'] == api.registry.version
+
+
+@pytest.mark.parametrize('settings', [{'enabled': 'false'}, {'enabled': 1}, {'reset': 'yes'}, ['enabled']])
+def test_profiler_settings_must_be_json_booleans(api, client, monkeypatch, settings):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', '')
+    api.profiler.configure(enabled=False)
+
+    response = client.post('/profile', json=settings)
+
+    assert response.status_code == 400
+    assert not api.profiler.enabled
+
+
+def test_profiler_is_toggled_with_json_booleans(api, client, monkeypatch):
+    monkeypatch.setattr(api, 'ADMIN_TOKEN', '')
+    sample_rate = api.profiler.sample_rate
+    try:
+        response = client.post('/profile', json={'enabled': True, 'sample_rate': 0.5})
+        assert response.status_code == 200 and api.profiler.enabled
+        assert api.profiler.sample_rate == 0.5
+
+        assert client.post('/profile', json={'enabled': False}).status_code == 200
+        assert not api.profiler.enabled
+    finally:
+        api.profiler.configure(enabled=False, sample_rate=sample_rate)
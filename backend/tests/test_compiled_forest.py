@@ -0,0 +1,62 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.compiled_forest import CompiledForest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BACKEND_DIR, 'model', 'heart_model.pkl')
+SCALER_PATH = os.path.join(BACKEND_DIR, 'model', 'scaler.pkl')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def forest():
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def scaled_dataset():
+    scaler = joblib.load(SCALER_PATH)
+    data = pd.read_csv(DATASET_PATH)
+    return scaler.transform(data[list(scaler.feature_names_in_)])
+
+
+def test_batch_matches_sklearn(forest, scaled_dataset):
+    compiled = CompiledForest.from_sklearn(forest)
+
+    np.testing.assert_allclose(compiled.predict_proba(scaled_dataset),
+                               forest.predict_proba(scaled_dataset), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(scaled_dataset), forest.predict(scaled_dataset))
+
+
+def test_leaves_match_sklearn(forest, scaled_dataset):
+    compiled = CompiledForest.from_sklearn(forest)
+
+    # Blocks of many rows drop finished (row, tree) pairs as they go; single rows do not
+    for rows in (scaled_dataset, scaled_dataset[:1]):
+        np.testing.assert_array_equal(compiled.apply(rows), forest.apply(rows) + compiled.roots)
+
+
+def test_single_rows_match_sklearn(forest, scaled_dataset):
+    compiled = CompiledForest.from_sklearn(forest)
+
+    for row in scaled_dataset[::50]:
+        np.testing.assert_allclose(compiled.predict_proba(row),
+                                   forest.predict_proba(row.reshape(1, -1)), rtol=0, atol=1e-12)
+
+
+def test_values_on_split_thresholds_match_sklearn(forest):
+    compiled = CompiledForest.from_sklearn(forest)
+    rng = np.random.default_rng(0)
+
+    # Place every feature exactly on one of the forest's thresholds for that feature
+    rows = np.empty((200, forest.n_features_in_))
+    for feature in range(forest.n_features_in_):
+        thresholds = compiled.threshold[(compiled.feature == feature) & np.isfinite(compiled.threshold)]
+        rows[:, feature] = rng.choice(thresholds, size=len(rows))
+
+    np.testing.assert_allclose(compiled.predict_proba(rows), forest.predict_proba(rows), rtol=0, atol=1e-12)
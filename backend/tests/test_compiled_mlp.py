@@ -0,0 +1,73 @@
+import os
+import pickle
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.compiled_mlp import CompiledMLP
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BACKEND_DIR, 'model', 'nn_model.pkl')
+SCALER_PATH = os.path.join(BACKEND_DIR, 'model', 'scaler_nn.pkl')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def mlp():
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def scaler():
+    return joblib.load(SCALER_PATH)
+
+
+@pytest.fixture(scope='module')
+def dataset(scaler):
+    data = pd.read_csv(DATASET_PATH)
+    return data[list(scaler.feature_names_in_)].to_numpy(dtype=np.float64)
+
+
+def test_batch_matches_sklearn_on_raw_features(mlp, scaler, dataset):
+    compiled = CompiledMLP.from_sklearn(mlp, scaler)
+    scaled = scaler.transform(dataset)
+
+    np.testing.assert_allclose(compiled.predict_proba(dataset), mlp.predict_proba(scaled), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(dataset), mlp.predict(scaled))
+
+
+def test_single_rows_match_sklearn(mlp, scaler, dataset):
+    compiled = CompiledMLP.from_sklearn(mlp, scaler)
+    expected = mlp.predict_proba(scaler.transform(dataset))
+
+    for row, probabilities in zip(dataset[::50], expected[::50]):
+        np.testing.assert_allclose(compiled.predict_proba(row), probabilities.reshape(1, -1), rtol=0, atol=1e-12)
+
+
+def test_batches_larger_than_a_block(mlp, scaler, dataset, monkeypatch):
+    compiled = CompiledMLP.from_sklearn(mlp, scaler)
+    expected = compiled.predict_proba(dataset)
+
+    monkeypatch.setattr('backend.compiled_mlp.BLOCK_ROWS', 64)
+    np.testing.assert_allclose(compiled.predict_proba(dataset), expected, rtol=0, atol=1e-12)
+
+
+def test_save_load_roundtrip(mlp, scaler, dataset, tmp_path):
+    compiled = CompiledMLP.from_sklearn(mlp, scaler)
+    path = tmp_path / 'nn_model.npz'
+    compiled.save(path)
+    loaded = CompiledMLP.load(path)
+
+    assert loaded.activation == mlp.activation
+    np.testing.assert_array_equal(loaded.classes_, mlp.classes_)
+    np.testing.assert_array_equal(loaded.predict_proba(dataset), compiled.predict_proba(dataset))
+
+
+def test_pickled_copy_gets_its_own_buffers(mlp, scaler, dataset):
+    compiled = CompiledMLP.from_sklearn(mlp, scaler)
+    compiled.predict_proba(dataset[0])
+    copy = pickle.loads(pickle.dumps(compiled))
+
+    np.testing.assert_array_equal(copy.predict_proba(dataset[0]), compiled.predict_proba(dataset[0]))
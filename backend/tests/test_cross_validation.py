@@ -0,0 +1,58 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from backend.cross_validation import CrossValidationCache, cross_validate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    data = pd.read_csv(DATASET_PATH).sample(300, random_state=0)
+    return data.drop(columns=['target']).to_numpy(dtype=np.float64), data['target'].to_numpy()
+
+
+def test_metrics_match_sequential_cross_validation(dataset):
+    X, y = dataset
+    results = cross_validate(X, y, names=('logistic_regression',), n_folds=3, workers=2)
+
+    accuracies, aucs = [], []
+    for train, test in StratifiedKFold(n_splits=3, shuffle=True, random_state=42).split(X, y):
+        model = make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)).fit(X[train], y[train])
+        accuracies.append(accuracy_score(y[test], model.predict(X[test])))
+        aucs.append(roc_auc_score(y[test], model.predict_proba(X[test])[:, 1]))
+
+    metrics = results['logistic_regression']
+    assert metrics['accuracy'] == pytest.approx(np.mean(accuracies))
+    assert metrics['accuracy_std'] == pytest.approx(np.std(accuracies))
+    assert metrics['auc'] == pytest.approx(np.mean(aucs))
+
+
+def test_metrics_are_stored_per_model_version(dataset, tmp_path):
+    X, y = dataset
+    dataset_path = tmp_path / 'heart.csv'
+    pd.DataFrame(X).assign(target=y).to_csv(dataset_path, index=False)
+    cache = CrossValidationCache(str(tmp_path / 'cache'), str(dataset_path), n_folds=2, workers=1,
+                                 dataset_cache_dir=str(tmp_path))
+
+    cache.refresh(SimpleNamespace(version='v1', predictors={'random_forest': None}))
+    cache.wait()
+    computed = cache.get('v1')
+    assert computed['folds'] == 2
+    assert set(computed['models']) == {'random_forest', 'logistic_regression', 'svm', 'neural_network'}
+    assert CrossValidationCache(str(tmp_path / 'cache'), str(dataset_path),
+                                dataset_cache_dir=str(tmp_path)).get('v1') == computed
+
+    # Editing the dataset invalidates the metrics of the same model version
+    pd.DataFrame(X[:-1]).assign(target=y[:-1]).to_csv(dataset_path, index=False)
+    assert cache.get('v1') is None
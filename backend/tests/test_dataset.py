@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.dataset import compact_dtype, load_dataset
+from backend.train_models import clean_dataset
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'cohort.csv'
+    path.write_text('age,chol,oldpeak,ratio,target\n52,212,1.0,0.5,0\n63,564,2.3,0.25,1\n41,126,0.0,-1.5,1\n')
+    return str(path)
+
+
+def test_dataset_matches_the_csv_with_compact_dtypes(tmp_path):
+    dataset = load_dataset(DATASET_PATH, cache_dir=str(tmp_path))
+    expected = pd.read_csv(DATASET_PATH)
+
+    assert dataset.names == list(expected.columns)
+    assert isinstance(dataset['age'], np.memmap)
+    assert dataset['cp'].dtype == np.uint8 and dataset['target'].dtype == np.uint8
+    assert dataset['chol'].dtype == np.uint16
+    # 2.3 has no exact float32 value, so oldpeak keeps every digit
+    assert dataset['oldpeak'].dtype == np.float64
+    np.testing.assert_array_equal(dataset.matrix(), expected.to_numpy(dtype=np.float64))
+
+    X, y, feature_names = dataset.features()
+    assert X.dtype == np.float64 and X.flags['C_CONTIGUOUS']
+    assert feature_names == [name for name in expected.columns if name != 'target']
+    np.testing.assert_array_equal(y, expected['target'].to_numpy())
+
+
+def test_compact_dtype():
+    assert compact_dtype(np.array([0.0, 3.0])) == np.uint8
+    assert compact_dtype(np.array([-1.0, 3.0])) == np.int8
+    assert compact_dtype(np.array([0.0, 564.0])) == np.uint16
+    assert compact_dtype(np.array([0.5, -1.25, np.nan])) == np.float32
+    assert compact_dtype(np.array([2.3])) == np.float64
+
+
+def test_later_loads_reuse_the_converted_columns(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = load_dataset(csv_path, cache_dir=cache_dir)
+    directory = os.path.dirname(first['age'].filename)
+    written = os.path.getmtime(os.path.join(directory, 'columns.json'))
+
+    second = load_dataset(csv_path, cache_dir=cache_dir)
+
+    assert os.path.dirname(second['age'].filename) == directory
+    assert os.path.getmtime(os.path.join(directory, 'columns.json')) == written
+    assert second['ratio'].dtype == np.float32
+    np.testing.assert_array_equal(second['ratio'], [0.5, 0.25, -1.5])
+
+
+def test_editing_the_csv_invalidates_the_cache(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    first = load_dataset(csv_path, cache_dir=cache_dir)
+    old_directory = os.path.dirname(first['age'].filename)
+
+    with open(csv_path, 'a') as f:
+        f.write('70,300,4.2,1.0,1\n')
+    dataset = load_dataset(csv_path, cache_dir=cache_dir)
+
+    assert len(dataset) == 4
+    np.testing.assert_array_equal(dataset['age'], [52, 63, 41, 70])
+    assert os.path.dirname(dataset['age'].filename) != old_directory
+    # The copy of the previous version is removed
+    assert not os.path.exists(old_directory)
+
+
+def test_concurrent_first_loads_convert_once(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        datasets = list(pool.map(lambda _: load_dataset(csv_path, cache_dir=cache_dir), range(4)))
+
+    assert len({os.path.dirname(dataset['age'].filename) for dataset in datasets}) == 1
+    # No temporary directories are left behind
+    assert not [entry for entry in os.listdir(cache_dir) if entry.endswith('.tmp')]
+
+
+def test_files_with_the_same_name_keep_separate_caches(csv_path, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    other_path = tmp_path / 'other' / 'cohort.csv'
+    other_path.parent.mkdir()
+    other_path.write_text('age,target\n70,1\n')
+
+    first = load_dataset(csv_path, cache_dir=cache_dir)
+    other = load_dataset(str(other_path), cache_dir=cache_dir)
+
+    assert os.path.exists(first['age'].filename)
+    assert len(load_dataset(csv_path, cache_dir=cache_dir)) == 3
+    np.testing.assert_array_equal(other['age'], [70])
+
+
+def test_blank_cells_are_read_as_missing(tmp_path):
+    path = tmp_path / 'cohort.csv'
+    path.write_text('age,chol,oldpeak,target\n52,212,1.0,0\n63,,2.3,1\n41,126,NA,1\n')
+    dataset = load_dataset(str(path), cache_dir=str(tmp_path / 'cache'))
+
+    np.testing.assert_array_equal(dataset['chol'], [212, np.nan, 126])
+    np.testing.assert_array_equal(dataset['oldpeak'], [1.0, 2.3, np.nan])
+    assert dataset['age'].dtype == np.uint8
+    # The training code can now drop the incomplete rows
+    assert clean_dataset(dataset.to_frame())['age'].tolist() == [52]
+
+
+def test_non_numeric_cells_are_rejected(tmp_path):
+    path = tmp_path / 'cohort.csv'
+    path.write_text('age,sex,target\n52,1,0\n63,male,1\n')
+
+    with pytest.raises(ValueError, match="line 3: column 'sex' is not numeric"):
+        load_dataset(str(path), cache_dir=str(tmp_path / 'cache'))
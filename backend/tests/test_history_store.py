@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from backend.history_store import HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / 'history.db'))
+
+
+def make_record(day, probability=0.5, risk_level='High Risk'):
+    return {
+        'date': f'2024-03-{day:02d}T10:00:00Z',
+        'prediction': int(probability > 0.5),
+        'probability': probability,
+        'risk_level': risk_level,
+        'inputs': {'age': 50 + day},
+    }
+
+
+def test_cursor_pagination_walks_every_record_newest_first(store):
+    store.add_many([make_record(day) for day in range(1, 11)])
+
+    dates, cursor = [], None
+    while True:
+        records, cursor = store.list(limit=3, cursor=cursor)
+        dates.extend(record['date'] for record in records)
+        if cursor is None:
+            break
+
+    assert dates == [make_record(day)['date'] for day in range(10, 0, -1)]
+
+
+def test_time_range_and_risk_level_filters(store):
+    store.add_many([make_record(day, risk_level='Low Risk' if day % 2 else 'High Risk')
+                    for day in range(1, 11)])
+
+    records, _ = store.list(start='2024-03-03T00:00:00Z', end='2024-03-06T23:59:59Z',
+                            risk_level='High Risk')
+
+    assert [record['date'][:10] for record in records] == ['2024-03-06', '2024-03-04']
+
+
+def test_concurrent_saves_are_all_stored(store):
+    def save():
+        for _ in range(25):
+            store.add(make_record(1))
+
+    threads = [threading.Thread(target=save) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.count() == 100
+
+
+def test_get_and_delete(store):
+    record_id = store.add(make_record(1))
+
+    assert store.get(int(record_id))['inputs'] == {'age': 51}
+    assert store.delete(int(record_id))
+    assert store.get(int(record_id)) is None
+    assert not store.delete(int(record_id))
+
+
+def test_invalid_records_are_rejected_without_writing(store):
+    for records in ([make_record(1), 'not a record'], [make_record(1), {**make_record(2), 'date': 'yesterday'}],
+                    [{**make_record(1), 'date': [2024]}], [{**make_record(1), 'probability': 'high'}]):
+        with pytest.raises(ValueError):
+            store.add_many(records)
+
+    assert store.count() == 0
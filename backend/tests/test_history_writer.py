@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+
+import pytest
+
+from backend.history_store import HistoryStore
+from backend.history_writer import HistoryWriter
+
+
+class GatedStore:
+    """
+    Store whose writes wait until the test opens the gate
+    """
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.records = []
+
+    def add_many(self, records):
+        self.gate.wait(5)
+        self.records.extend(records)
+        return [str(len(self.records))] * len(records)
+
+
+def test_records_are_written_in_batches(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    writer = HistoryWriter(store, batch_size=10, flush_interval=0.05)
+
+    for i in range(25):
+        assert writer.submit({'prediction': 1, 'probability': i / 25})
+    assert writer.flush(timeout=5)
+
+    assert store.count() == 25
+    assert writer.stats()['written'] == 25
+    writer.close()
+
+
+def test_drop_oldest_keeps_newest_records():
+    store = GatedStore()
+    writer = HistoryWriter(store, max_size=3, batch_size=1, flush_interval=0.01, policy='drop_oldest')
+
+    # The first record is taken by the writer thread, which then blocks on the gate
+    writer.submit({'n': 0})
+    while writer.stats()['in_flight'] == 0:
+        pass
+    for n in range(1, 6):
+        writer.submit({'n': n})
+    store.gate.set()
+    writer.close()
+
+    assert [record['n'] for record in store.records] == [0, 3, 4, 5]
+    assert writer.stats()['dropped'] == 2
+
+
+def test_spilled_records_are_reingested(tmp_path):
+    store = GatedStore()
+    spill_path = str(tmp_path / 'spill.ndjson')
+    writer = HistoryWriter(store, max_size=2, batch_size=1, flush_interval=0.01,
+                           policy='spill', spill_path=spill_path)
+
+    writer.submit({'n': 0})
+    while writer.stats()['in_flight'] == 0:
+        pass
+    for n in range(1, 6):
+        writer.submit({'n': n})
+    store.gate.set()
+    writer.close()
+
+    assert sorted(record['n'] for record in store.records) == list(range(6))
+    assert writer.stats()['spilled'] == 3
+
+
+def test_spill_drain_skips_torn_lines_and_adopts_exited_workers_files(tmp_path):
+    store = GatedStore()
+    store.gate.set()
+    spill_path = str(tmp_path / 'spill.ndjson')
+    # A file left by a worker that exited mid-write, with a torn last line
+    with open(str(tmp_path / 'spill.999999999.ndjson'), 'w') as f:
+        f.write(json.dumps({'n': 0}) + '\n' + json.dumps({'n': 1}) + '\n{"n": ')
+    writer = HistoryWriter(store, batch_size=10, flush_interval=0.01, policy='spill', spill_path=spill_path)
+
+    writer.submit({'n': 2})
+    writer.close()
+
+    assert sorted(record['n'] for record in store.records) == [0, 1, 2]
+    assert writer.stats()['failed'] == 1
+    assert os.listdir(str(tmp_path)) == ['spill.ndjson.rejected']
+
+
+def test_writer_thread_survives_errors(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    writer = HistoryWriter(store, batch_size=1, flush_interval=0.01, policy='spill',
+                           spill_path=str(tmp_path / 'spill.ndjson'))
+    failures = []
+
+    def failing_drain():
+        failures.append(1)
+        raise OSError('disk unavailable')
+
+    writer._drain_spill_file = failing_drain
+    writer.submit({'prediction': 1, 'probability': 0.5})
+    while not failures:
+        pass
+    del writer._drain_spill_file
+    writer.submit({'prediction': 0, 'probability': 0.1})
+    assert writer.flush(timeout=5)
+
+    assert writer._thread.is_alive()
+    assert store.count() == 2
+    writer.close()
+
+
+def test_block_policy_drops_after_timeout():
+    store = GatedStore()
+    writer = HistoryWriter(store, max_size=1, batch_size=1, flush_interval=0.01,
+                           policy='block', block_timeout=0.05)
+
+    writer.submit({'n': 0})
+    while writer.stats()['in_flight'] == 0:
+        pass
+    assert writer.submit({'n': 1})
+    assert not writer.submit({'n': 2})
+    store.gate.set()
+    writer.close()
+
+    assert [record['n'] for record in store.records] == [0, 1]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        HistoryWriter(GatedStore(), policy='ignore')
+
+
+class FailingStore:
+    def add_many(self, records):
+        raise OSError('database is locked')
+
+
+def test_failed_writes_are_spilled_only_under_the_spill_policy(tmp_path):
+    spill_path = str(tmp_path / 'spill.ndjson')
+    writer = HistoryWriter(FailingStore(), batch_size=1, flush_interval=0.01, spill_path=spill_path)
+
+    writer.submit({'n': 0})
+    assert writer.flush(timeout=5)
+
+    assert writer.stats()['failed'] == 1 and writer.stats()['spilled'] == 0
+    assert os.listdir(str(tmp_path)) == []
+    writer.close()
+
+
+def test_spill_file_is_written_off_the_request_thread(tmp_path):
+    store = GatedStore()
+    writer = HistoryWriter(store, max_size=1, batch_size=1, flush_interval=0.01,
+                           policy='spill', spill_path=str(tmp_path / 'spill.ndjson'))
+    spilling_threads = []
+    spill = writer._spill
+
+    def recording_spill(records):
+        spilling_threads.append(threading.current_thread().name)
+        spill(records)
+
+    writer._spill = recording_spill
+    writer.submit({'n': 0})
+    while writer.stats()['in_flight'] == 0:
+        pass
+    for n in range(1, 4):
+        assert writer.submit({'n': n})
+    # Spilled while the store is still blocked
+    while writer.stats()['spilled'] < 2:
+        pass
+    store.gate.set()
+    writer.close()
+
+    assert spilling_threads and set(spilling_threads) == {'history-spill'}
+    assert sorted(record['n'] for record in store.records) == list(range(4))
@@ -0,0 +1,123 @@
+import os
+import pickle
+import threading
+
+import joblib
+import numpy as np
+import pytest
+
+from backend.inference import Predictor, ensemble_risk_level, risk_level, risk_levels
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+class CountingModel:
+    """
+    Wraps a classifier and counts its predict_proba and predict calls
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.calls = {'predict_proba': 0, 'predict': 0}
+        self.inputs = []
+
+    def predict_proba(self, X):
+        self.calls['predict_proba'] += 1
+        self.inputs.append(X)
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        self.calls['predict'] += 1
+        return self.model.predict(X)
+
+
+@pytest.fixture(scope='module')
+def model():
+    return joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl'))
+
+
+@pytest.fixture(scope='module')
+def scaler():
+    return joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return np.loadtxt(DATASET_PATH, delimiter=',', skiprows=1)[:200, :-1]
+
+
+def test_single_rows_match_the_sklearn_pipeline(model, scaler, rows):
+    predictor = Predictor(model, scaler)
+
+    for values in rows[:50]:
+        expected = model.predict_proba(scaler.transform(values.reshape(1, -1)))[0]
+        result = predictor.predict_one(values)
+        assert result.probability == expected[1]
+        assert result.prediction == model.predict(scaler.transform(values.reshape(1, -1)))[0]
+        assert result.risk_level == risk_level(expected[1])
+
+
+def test_batches_match_the_sklearn_pipeline(model, scaler, rows):
+    predictions, positive, levels = Predictor(model, scaler).predict_batch(rows)
+
+    scaled = scaler.transform(rows)
+    np.testing.assert_allclose(positive, model.predict_proba(scaled)[:, 1], rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(predictions, model.predict(scaled))
+    np.testing.assert_array_equal(levels, [risk_level(probability) for probability in positive])
+
+
+def test_each_request_evaluates_the_model_once(model, scaler, rows):
+    counting = CountingModel(model)
+    predictor = Predictor(counting, scaler)
+
+    predictor.predict_one(rows[0])
+    predictor.predict_batch(rows)
+
+    assert counting.calls == {'predict_proba': 2, 'predict': 0}
+
+
+def test_row_buffer_is_reused_per_thread(model, scaler, rows):
+    counting = CountingModel(model)
+    predictor = Predictor(counting, scaler)
+
+    first = predictor.predict_one(rows[0])
+    second = predictor.predict_one(rows[1])
+    # Both calls scaled into the same buffer; the first result is unaffected by the second row
+    assert counting.inputs[0] is counting.inputs[1]
+    assert first == predictor.predict_one(rows[0]) and first != second
+
+    buffers = []
+    thread = threading.Thread(target=lambda: buffers.append(predictor._row_buffer()))
+    thread.start()
+    thread.join()
+    assert buffers[0] is not counting.inputs[0]
+
+
+def test_predictor_survives_pickling(model, scaler, rows):
+    predictor = pickle.loads(pickle.dumps(Predictor(model, scaler)))
+
+    assert predictor.predict_one(rows[0]) == Predictor(model, scaler).predict_one(rows[0])
+
+
+def test_raw_feature_models_take_no_scaler(model, scaler, rows):
+    class Scaled:
+        classes_ = model.classes_
+
+        def predict_proba(self, X):
+            return model.predict_proba(scaler.transform(X))
+
+    assert Predictor(Scaled(), None).predict_one(rows[0]) == Predictor(model, scaler).predict_one(rows[0])
+
+
+def test_risk_bands():
+    probabilities = np.array([0.0, 0.3, np.nextafter(0.3, 1), 0.7, np.nextafter(0.7, 1), 1.0])
+    expected = ['Low Risk', 'Low Risk', 'Moderate Risk', 'Moderate Risk', 'High Risk', 'High Risk']
+
+    assert [risk_level(probability) for probability in probabilities] == expected
+    assert risk_levels(probabilities).tolist() == expected
+
+    assert [ensemble_risk_level(probability) for probability in (0.0, 0.2, 0.4, 0.69, 0.7, 1.0)] == [
+        'Low Risk', 'Moderate Risk', 'High Risk', 'High Risk', 'Very High Risk', 'Very High Risk']
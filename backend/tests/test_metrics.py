@@ -0,0 +1,86 @@
+import threading
+
+from backend.metrics import REQUESTS, STAGE_DURATION, Metrics, mark
+
+
+def sample(text, prefix):
+    """
+    Value of the first sample line starting with prefix
+    """
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"No sample starting with {prefix}")
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics(buckets=(0.001, 0.01))
+    for seconds in (0.0005, 0.001, 0.005, 0.5):
+        metrics.observe(STAGE_DURATION, ('/predict', 'model'), seconds)
+
+    text = metrics.render()
+    labels = 'route="/predict",stage="model"'
+    assert sample(text, 'heart_api_stage_duration_seconds_bucket{worker=') == 2
+    assert f'{labels},le="0.01"}} 3' in text
+    assert f'{labels},le="+Inf"}} 4' in text
+    assert sample(text, 'heart_api_stage_duration_seconds_count') == 4
+    assert abs(sample(text, 'heart_api_stage_duration_seconds_sum') - 0.5065) < 1e-12
+
+
+def test_shards_of_all_threads_are_merged():
+    metrics = Metrics()
+
+    def serve(requests):
+        for _ in range(requests):
+            metrics.start_request('/predict', 'POST')
+            mark('parse')
+            mark('model')
+            metrics.finish_request(200)
+
+    threads = [threading.Thread(target=serve, args=(250,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = metrics.render()
+    assert sample(text, REQUESTS) == 1000
+    counts = [line for line in text.splitlines() if line.startswith('heart_api_stage_duration_seconds_count')]
+    assert len(counts) == 3  # parse, model, serialize
+    assert all(line.endswith(' 1000') for line in counts)
+
+
+def test_shards_of_exited_threads_are_folded_into_totals():
+    metrics = Metrics()
+
+    def serve():
+        metrics.start_request('/predict', 'POST')
+        mark('model')
+        metrics.finish_request(200)
+
+    # A thread per request, as with Werkzeug's threaded mode
+    for _ in range(200):
+        thread = threading.Thread(target=serve)
+        thread.start()
+        thread.join()
+
+    assert not metrics._shards
+    assert sample(metrics.render(), REQUESTS) == 200
+
+
+def test_mark_outside_a_request_records_nothing():
+    metrics = Metrics()
+    mark('model')
+    metrics.finish_request(200)
+
+    assert 'heart_api_stage_duration_seconds_bucket' not in metrics.render()
+
+
+def test_collectors_are_read_on_every_scrape():
+    metrics = Metrics()
+    version = ['v1']
+    metrics.add_collector(lambda: [('heart_api_model_info', 'gauge', 'Served version', [({'version': version[0]}, 1)])])
+
+    assert 'version="v1"} 1' in metrics.render()
+    version[0] = 'v2'
+    assert 'version="v2"} 1' in metrics.render()
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend import model_manager as model_manager_module
+from backend.model_manager import ModelManager, load_canary
+from backend.model_registry import RANDOM_FOREST, ModelRegistry
+
+ROW = [52, 1, 0, 125, 212, 0, 1, 168, 0, 1, 2, 2, 3]
+
+
+@pytest.fixture(scope='module')
+def loaded():
+    return ModelRegistry().load().current
+
+
+@pytest.fixture
+def registry(loaded):
+    registry = ModelRegistry()
+    registry.swap(loaded)
+    return registry
+
+
+def constant_predictor(label):
+    # Predicts one class for every row, so it fails the canary accuracy check
+    def predict_batch(X):
+        return np.full(len(X), label), np.full(len(X), float(label)), None
+    return SimpleNamespace(predict_batch=predict_batch)
+
+
+def manager_building(registry, models):
+    manager = ModelManager(registry, poll_interval=0)
+    registry.build = lambda: models
+    return manager
+
+
+def test_canary_is_spread_over_the_dataset():
+    X, y = load_canary(rows=64)
+
+    assert X.shape == (64, 13)
+    assert set(np.unique(y)) == {0, 1}
+
+
+def test_requests_in_flight_keep_their_models(registry, loaded):
+    models = registry.current
+    before = registry.predict(RANDOM_FOREST, ROW, models)
+
+    registry.swap(loaded._replace(predictors={}, version='next'))
+
+    assert registry.version == 'next'
+    assert registry.predict(RANDOM_FOREST, ROW, models) == before
+
+
+def test_reload_swaps_validated_models_and_notifies(registry, loaded):
+    retrained = loaded._replace(version='retrained')
+    manager = manager_building(registry, retrained)
+    notified = []
+    manager.add_listener(notified.append)
+
+    status = manager.reload()
+
+    assert status['status'] == 'reloaded'
+    assert (status['previous_version'], status['model_version']) == (loaded.version, 'retrained')
+    assert registry.current is retrained
+    assert notified == [retrained]
+
+
+def test_reload_of_same_artifacts_is_unchanged(registry, loaded):
+    manager = ModelManager(registry, poll_interval=0)
+
+    assert manager.reload()['status'] == 'unchanged'
+    assert registry.version == loaded.version
+
+
+def test_model_failing_the_canary_is_rejected(registry, loaded):
+    predictors = dict(loaded.predictors, **{RANDOM_FOREST: constant_predictor(0)})
+    manager = manager_building(registry, loaded._replace(predictors=predictors, version='broken'))
+    notified = []
+    manager.add_listener(notified.append)
+
+    status = manager.reload()
+
+    assert status['status'] == 'rejected'
+    assert 'random_forest canary accuracy' in status['errors'][0]
+    assert registry.current is loaded
+    assert notified == []
+
+
+def test_missing_model_is_rejected(registry, loaded):
+    predictors = {RANDOM_FOREST: loaded.predictors[RANDOM_FOREST]}
+    manager = manager_building(registry, loaded._replace(predictors=predictors, version='partial'))
+
+    status = manager.reload()
+
+    assert status['status'] == 'rejected'
+    assert status['errors'] == ['neural_network is served now but failed to load']
+    assert registry.current is loaded
+
+
+def test_check_waits_for_artifacts_to_settle(registry, monkeypatch):
+    manager = ModelManager(registry, poll_interval=0)
+    reloads = []
+    monkeypatch.setattr(manager, 'reload', lambda: reloads.append(True))
+
+    for signature in ('writing', 'written'):
+        monkeypatch.setattr(model_manager_module, 'artifact_signature', lambda: signature)
+        manager.check()
+    assert reloads == []
+
+    manager.check()
+    assert reloads == [True]
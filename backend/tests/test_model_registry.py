@@ -0,0 +1,87 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.inference import Prediction
+from backend.model_registry import NEURAL_NETWORK, RANDOM_FOREST, ModelRegistry, ModelSet
+from backend.prediction_cache import PredictionCache
+
+ROW = [52, 1, 0, 125, 212, 0, 1, 168, 0, 1, 2, 2, 3]
+
+
+def constant_predictor(probability):
+    return SimpleNamespace(predict_one=lambda values: Prediction(int(probability > 0.5), probability, None))
+
+
+def model_set(version, rf_probability, nn_probability):
+    predictors = {RANDOM_FOREST: constant_predictor(rf_probability), NEURAL_NETWORK: constant_predictor(nn_probability)}
+    return ModelSet(predictors, {}, version)
+
+
+@pytest.fixture(scope='module')
+def loaded():
+    return ModelRegistry().load().current
+
+
+def test_ensemble_is_the_weighted_average_of_its_members(loaded):
+    registry = ModelRegistry(weights={RANDOM_FOREST: 0.6, NEURAL_NETWORK: 0.4})
+    registry.swap(loaded)
+
+    results = registry.predict_all(ROW)
+
+    assert set(results) == {RANDOM_FOREST, NEURAL_NETWORK}
+    for name, result in results.items():
+        assert result == loaded.predictors[name].predict_one(ROW)
+    expected = 0.6 * results[RANDOM_FOREST].probability + 0.4 * results[NEURAL_NETWORK].probability
+    assert registry.ensemble_probability(results) == pytest.approx(expected)
+
+
+def test_ensemble_weights_are_renormalized_over_loaded_models():
+    registry = ModelRegistry(weights={RANDOM_FOREST: 0.6, NEURAL_NETWORK: 0.4})
+    rf, nn = Prediction(1, 0.8, None), Prediction(0, 0.3, None)
+
+    assert registry.ensemble_probability({RANDOM_FOREST: rf, NEURAL_NETWORK: nn}) == pytest.approx(0.6)
+    assert registry.ensemble_probability({NEURAL_NETWORK: nn}) == pytest.approx(0.3)
+    # Without positive weights the members count equally
+    unweighted = ModelRegistry(weights={RANDOM_FOREST: 0.0, NEURAL_NETWORK: 0.0})
+    assert unweighted.ensemble_probability({RANDOM_FOREST: rf, NEURAL_NETWORK: nn}) == pytest.approx(0.55)
+
+
+def test_readers_never_see_a_half_swapped_model_set():
+    sets = [model_set('a', 0.1, 0.2), model_set('b', 0.8, 0.9)]
+    expected = {0.1: 0.2, 0.8: 0.9}
+    # Uncached, so every read scores the set being served
+    registry = ModelRegistry(cache=PredictionCache(max_size=0))
+    registry.swap(sets[0])
+    stop = threading.Event()
+    mismatches, reads = [], []
+
+    def read():
+        try:
+            while not stop.is_set():
+                results = registry.predict_all(ROW)
+                rf, nn = results[RANDOM_FOREST].probability, results[NEURAL_NETWORK].probability
+                if expected[rf] != nn:
+                    mismatches.append((rf, nn))
+                reads.append(rf)
+        except Exception as e:
+            mismatches.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    # Keep swapping until the readers have been served both sets many times
+    deadline = time.monotonic() + 10
+    swaps = 0
+    while (len(reads) < 5000 or len(set(reads)) < 2) and time.monotonic() < deadline:
+        swaps += 1
+        registry.swap(sets[swaps % 2])
+        time.sleep(0)
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert mismatches == []
+    assert set(reads) == {0.1, 0.8}
@@ -0,0 +1,79 @@
+import os
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.inference import Predictor
+from backend.partial_dependence import PartialDependenceCache, compute_partial_dependence
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    return Predictor(joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl')),
+                     joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl')))
+
+
+@pytest.fixture(scope='module')
+def features():
+    return pd.read_csv(DATASET_PATH).drop(columns=['target']).iloc[:100]
+
+
+def registry_for(predictor, version):
+    return SimpleNamespace(version=version, predictors={'random_forest': predictor})
+
+
+def test_curves_match_rescoring_each_grid_value(predictor, features):
+    data = features.to_numpy(dtype=np.float64)
+    tables = compute_partial_dependence(predictor, data, list(features.columns), grid_size=5)
+
+    column = list(features.columns).index('chol')
+    grid, average, ice = tables['chol']
+    assert len(grid) == 5 and ice.shape == (len(data), 5)
+    for point, value in enumerate(grid):
+        modified = data.copy()
+        modified[:, column] = value
+        _, expected, _ = predictor.predict_batch(modified)
+        np.testing.assert_allclose(ice[:, point], expected, rtol=0, atol=1e-6)
+        assert average[point] == pytest.approx(expected.mean())
+
+    # Categorical features use their distinct values as the grid
+    np.testing.assert_array_equal(tables['cp'][0], np.unique(features['cp']))
+
+
+def test_cache_is_written_per_model_version(predictor, features, tmp_path):
+    dataset_path = tmp_path / 'heart.csv'
+    features.assign(target=0).to_csv(dataset_path, index=False)
+    cache = PartialDependenceCache(str(tmp_path / 'cache'), str(dataset_path), grid_size=5,
+                                   dataset_cache_dir=str(tmp_path))
+
+    assert cache.get('v1') is None
+    cache.refresh(registry_for(predictor, 'v1'))
+    cache.wait()
+    computed = cache.get('v1')
+    assert os.path.exists(cache.path('v1'))
+
+    # Cached on disk: a fresh cache loads it and no job is started
+    reloaded = PartialDependenceCache(str(tmp_path / 'cache'), str(dataset_path), grid_size=5,
+                                      dataset_cache_dir=str(tmp_path))
+    assert reloaded.refresh(registry_for(predictor, 'v1')) is None
+    for feature, (grid, average, ice) in computed.items():
+        np.testing.assert_array_equal(reloaded.get('v1')[feature][2], ice)
+
+    # A new model version recomputes and removes the stale table
+    cache.refresh(registry_for(predictor, 'v2'))
+    cache.wait()
+    assert os.path.exists(cache.path('v2')) and not os.path.exists(cache.path('v1'))
+
+    # So does an edited dataset under the same model version
+    features.iloc[:-1].assign(target=0).to_csv(dataset_path, index=False)
+    assert cache.get('v2') is None
+    cache.refresh(registry_for(predictor, 'v2'))
+    cache.wait()
+    assert len(cache.get('v2')['cp'][2]) == len(features) - 1
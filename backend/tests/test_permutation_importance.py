@@ -0,0 +1,71 @@
+import os
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from backend.inference import Predictor
+from backend.permutation_importance import PermutationImportanceCache, compute_permutation_importance
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def predictors():
+    return {
+        'random_forest': Predictor(joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl')),
+                                   joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))),
+        'neural_network': Predictor(joblib.load(os.path.join(MODEL_DIR, 'nn_model.pkl')),
+                                    joblib.load(os.path.join(MODEL_DIR, 'scaler_nn.pkl'))),
+    }
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    data = pd.read_csv(DATASET_PATH).sample(200, random_state=0)
+    return data.drop(columns=['target']), data['target'].to_numpy()
+
+
+def test_importances_match_shuffling_a_copy(predictors, dataset):
+    features, y = dataset
+    X = features.to_numpy(dtype=np.float64)
+    results = compute_permutation_importance(predictors, X, y, list(features.columns),
+                                             repeats=2, workers=2, seed=7)
+
+    column = list(features.columns).index('cp')
+    for name, predictor in predictors.items():
+        baseline = roc_auc_score(y, predictor.predict_batch(X)[1])
+        drops = []
+        for repeat in range(2):
+            shuffled = X.copy()
+            shuffled[:, column] = X[np.random.default_rng([7, column, repeat]).permutation(len(X)), column]
+            drops.append(baseline - roc_auc_score(y, predictor.predict_batch(shuffled)[1]))
+        assert results[name]['baseline'] == pytest.approx(baseline)
+        assert results[name]['features']['cp']['mean'] == pytest.approx(np.mean(drops))
+        assert results[name]['features']['cp']['std'] == pytest.approx(np.std(drops))
+
+
+def test_cache_is_written_per_model_version(predictors, dataset, tmp_path):
+    features, y = dataset
+    dataset_path = tmp_path / 'heart.csv'
+    features.assign(target=y).to_csv(dataset_path, index=False)
+    cache = PermutationImportanceCache(str(tmp_path / 'cache'), str(dataset_path), repeats=1, workers=1,
+                                       dataset_cache_dir=str(tmp_path))
+
+    cache.refresh(SimpleNamespace(version='v1', predictors=predictors))
+    cache.wait()
+    computed = cache.get('v1')
+    assert set(computed['models']) == set(predictors) and computed['repeats'] == 1
+
+    reloaded = PermutationImportanceCache(str(tmp_path / 'cache'), str(dataset_path),
+                                          dataset_cache_dir=str(tmp_path))
+    assert reloaded.get('v1') == computed
+
+    # Editing the dataset invalidates the result of the same model version
+    features.iloc[:-1].assign(target=y[:-1]).to_csv(dataset_path, index=False)
+    assert reloaded.get('v1') is None
@@ -0,0 +1,40 @@
+from backend.prediction_cache import PredictionCache, canonical_features
+
+
+def test_canonical_features_merge_equivalent_inputs():
+    assert canonical_features([52, '1', 2.3000000001, -0.0]) == canonical_features([52.0, 1, 2.3, 0])
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_size=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('backend.prediction_cache.time.monotonic', lambda: now[0])
+    cache = PredictionCache(max_size=10, ttl=5)
+    cache.put('a', 1)
+
+    now[0] += 6
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1
+    assert stats['size'] == 0
+
+
+def test_clear_drops_entries():
+    cache = PredictionCache(max_size=10, ttl=60)
+    cache.put('a', 1)
+    cache.clear()
+
+    assert cache.get('a') is None
+    assert cache.stats()['invalidations'] == 1
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from backend.profiler import SamplingProfiler
+
+
+def busy_handler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_the_stack_of_a_profiled_request():
+    profiler = SamplingProfiler(sample_rate=1.0, interval=0.001)
+    started, stop = threading.Event(), threading.Event()
+
+    def serve():
+        assert profiler.begin('/predict/explain')
+        started.set()
+        busy_handler(stop)
+        profiler.end()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    started.wait()
+    try:
+        for _ in range(5):
+            assert profiler.sample() == 1
+            time.sleep(0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    lines = profiler.collapsed().splitlines()
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == 5
+    assert all(line.startswith('/predict/explain;') for line in lines)
+    assert any(';busy_handler (test_profiler.py:' in line for line in lines)
+    assert profiler.status()['profiled_requests'] == 1
+
+
+def test_unprofiled_threads_are_not_sampled():
+    profiler = SamplingProfiler(sample_rate=0.0)
+
+    assert not profiler.begin('/predict')
+    assert profiler.sample() == 0
+    assert profiler.collapsed() == ''
+
+
+def test_sampler_thread_stops_when_disabled():
+    profiler = SamplingProfiler(sample_rate=1.0, interval=0.001, enabled=True)
+    profiler.begin('/predict')
+    profiler.end()
+
+    profiler.configure(enabled=False)
+    profiler._thread.join(timeout=2)
+    assert not profiler._thread.is_alive()
@@ -0,0 +1,61 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.raw_models import _fold_thresholds, fold_scaler_into_forest, fold_scaler_into_mlp
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def raw_features():
+    data = pd.read_csv(DATASET_PATH).drop(columns=['target'])
+    rng = np.random.default_rng(0)
+    # Dataset rows plus perturbed rows with one-decimal values, as sent by the form
+    perturbed = np.round(data.values + rng.normal(scale=data.values.std(axis=0) / 4, size=data.shape), 1)
+    return pd.DataFrame(np.vstack([data.values, perturbed]), columns=data.columns)
+
+
+def test_folded_forest_matches_scaled_pipeline(raw_features):
+    forest = joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+    folded = fold_scaler_into_forest(forest, scaler)
+
+    np.testing.assert_array_equal(folded.predict_proba(raw_features.values),
+                                  forest.predict_proba(scaler.transform(raw_features)))
+
+
+def test_folded_mlp_matches_scaled_pipeline(raw_features):
+    mlp = joblib.load(os.path.join(MODEL_DIR, 'nn_model.pkl'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler_nn.pkl'))
+    folded = fold_scaler_into_mlp(mlp, scaler)
+
+    np.testing.assert_allclose(folded.predict_proba(raw_features.values),
+                               mlp.predict_proba(scaler.transform(raw_features)), rtol=0, atol=1e-12)
+
+
+def test_memory_mapped_export_matches_in_memory_model(raw_features, tmp_path):
+    forest = joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl'))
+    scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+    folded = fold_scaler_into_forest(forest, scaler)
+    path = tmp_path / 'heart_model_raw.pkl'
+    joblib.dump(folded, path, compress=0)
+
+    mapped = joblib.load(path, mmap_mode='r')
+
+    assert isinstance(mapped.threshold, np.memmap)
+    assert not mapped.threshold.flags.writeable
+    np.testing.assert_array_equal(mapped.predict_proba(raw_features.values),
+                                  folded.predict_proba(raw_features.values))
+
+
+def test_thresholds_that_cannot_be_folded_are_rejected():
+    thresholds = np.array([0.5, np.nan], dtype=np.float32)
+
+    with pytest.raises(ValueError, match=r'Cannot fold 1 split threshold\(s\) into raw units \(features \[3\]\)'):
+        _fold_thresholds(thresholds, np.array([0, 3]), np.ones(4), np.full(4, 2.0))
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend.utils.data_processing import parse_sweep_axes, sweep_matrix
+from backend.utils.schema import HEART_SCHEMA
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    with open(DATASET_PATH) as f:
+        columns = f.readline().strip().split(',')
+    data = np.loadtxt(DATASET_PATH, delimiter=',', skiprows=1)
+    return data[:, [columns.index(name) for name in HEART_SCHEMA.names]]
+
+
+@pytest.fixture(scope='module')
+def records(dataset):
+    return [dict(zip(HEART_SCHEMA.names, row)) for row in dataset.tolist()]
+
+
+def test_dataset_decodes_in_feature_order(dataset, records):
+    matrix, row_indices, errors = HEART_SCHEMA.decode_many(records)
+
+    assert errors == []
+    assert row_indices == list(range(len(records)))
+    assert matrix.flags['C_CONTIGUOUS'] and matrix.dtype == np.float64
+    np.testing.assert_array_equal(matrix, dataset)
+    np.testing.assert_array_equal(HEART_SCHEMA.decode(records[0]), dataset[0])
+
+
+def test_numeric_strings_decode_like_numbers(dataset, records):
+    # CSV batches arrive as strings
+    as_strings = [{name: str(value) for name, value in record.items()} for record in records[:50]]
+
+    matrix, _, errors = HEART_SCHEMA.decode_many(as_strings)
+
+    assert errors == []
+    np.testing.assert_array_equal(matrix, dataset[:50])
+
+
+def test_invalid_records_are_reported_by_index(records):
+    missing = dict(records[1])
+    del missing['age']
+    batch = [
+        records[0],
+        missing,
+        dict(records[2], chol=None),
+        dict(records[3], cp=7),
+        dict(records[4], ca=1.5),
+        dict(records[5], oldpeak=float('inf')),
+        dict(records[6], thal='abc'),
+        'Invalid JSON on line 8',
+        [1, 2, 3],
+        records[9],
+    ]
+
+    matrix, row_indices, errors = HEART_SCHEMA.decode_many(batch)
+
+    assert row_indices == [0, 9]
+    assert len(matrix) == 2
+    assert errors == [
+        {'index': 1, 'error': 'Missing required field(s): age'},
+        {'index': 2, 'error': 'Missing required field(s): chol'},
+        {'index': 3, 'error': 'cp must be between 0 and 3, got 7'},
+        {'index': 4, 'error': 'ca must be one of 0, 1, 2, 3, 4, got 1.5'},
+        {'index': 5, 'error': 'Values must be finite numbers: oldpeak'},
+        {'index': 6, 'error': "Invalid value for thal: 'abc'"},
+        {'index': 7, 'error': 'Invalid JSON on line 8'},
+        {'index': 8, 'error': 'Record must be an object'},
+    ]
+
+
+def test_all_problems_of_a_row_are_listed(records):
+    record = dict(records[0], age=500, sex=None, thal=9)
+
+    with pytest.raises(ValueError) as error:
+        HEART_SCHEMA.decode(record)
+
+    assert str(error.value) == ('Missing required field(s): sex; age must be between 1 and 120, got 500; '
+                                'thal must be between 0 and 3, got 9')
+
+
+def test_missing_fields_are_errors_not_zeros():
+    with pytest.raises(ValueError, match='Missing required field'):
+        HEART_SCHEMA.decode({'age': 52})
+    with pytest.raises(ValueError, match='Record must be an object'):
+        HEART_SCHEMA.decode(None)
+
+
+def test_sweep_axes_are_checked_against_the_schema():
+    (column, values), = parse_sweep_axes([{'feature': 'age', 'min': 20, 'max': 80, 'steps': 61}], HEART_SCHEMA)
+    assert HEART_SCHEMA.names[column] == 'age' and values.size == 61
+
+    # A range over a coded feature sweeps its codes
+    (_, values), = parse_sweep_axes([{'feature': 'cp', 'min': -50, 'max': 50, 'steps': 7}], HEART_SCHEMA)
+    np.testing.assert_array_equal(values, [0, 1, 2, 3])
+
+    for axis in ({'feature': 'age', 'values': [1000, -3]},
+                 {'feature': 'chol', 'min': 0, 'max': 400},
+                 {'feature': 'cp', 'values': [1.5]},
+                 {'feature': 'cp', 'min': 3.5, 'max': 9}):
+        with pytest.raises(ValueError):
+            parse_sweep_axes([axis], HEART_SCHEMA)
+
+
+def test_sweep_matrix_varies_the_first_axis_slowest(dataset):
+    base = dataset[0]
+    axes = parse_sweep_axes([{'feature': 'age', 'values': [40, 50, 60]}, {'feature': 'sex', 'values': [0, 1]}],
+                            HEART_SCHEMA)
+
+    matrix = sweep_matrix(base, axes)
+
+    assert matrix.shape == (6, len(HEART_SCHEMA.names))
+    age, sex = HEART_SCHEMA.names.index('age'), HEART_SCHEMA.names.index('sex')
+    np.testing.assert_array_equal(matrix[:, age], [40, 40, 50, 50, 60, 60])
+    np.testing.assert_array_equal(matrix[:, sex], [0, 1, 0, 1, 0, 1])
+    # Every other column keeps the base patient's value
+    others = [column for column in range(len(base)) if column not in (age, sex)]
+    np.testing.assert_array_equal(matrix[:, others], np.tile(base[others], (6, 1)))
@@ -0,0 +1,45 @@
+import gc
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend import serve
+
+
+@pytest.fixture
+def api():
+    from backend import app as api
+
+    yield api
+    api.model_manager.stop()
+
+
+def test_master_is_quiesced_and_frozen_before_forking(api):
+    api.model_manager.start()
+    try:
+        serve.when_ready(SimpleNamespace(cfg=SimpleNamespace(workers=2)))
+
+        # Nothing runs in the master at fork time, and the preloaded heap is out of the GC's generations
+        assert 'model-watcher' not in [thread.name for thread in threading.enumerate()]
+        assert not api.model_manager.status()['watching']
+        assert gc.get_freeze_count() > 0
+    finally:
+        gc.unfreeze()
+
+
+def test_workers_restart_the_model_watcher(api):
+    api.model_manager.stop()
+
+    serve.post_fork(None, SimpleNamespace(pid=1234))
+
+    assert api.model_manager.status()['watching'] == (api.model_manager.poll_interval > 0)
+
+
+def test_server_preloads_the_app_with_the_fork_hooks():
+    options = serve.server_options(workers=3, threads=1, bind='127.0.0.1:0')
+
+    assert options['preload_app'] is True
+    assert options['when_ready'] is serve.when_ready and options['post_fork'] is serve.post_fork
+    assert (options['workers'], options['worker_class']) == (3, 'sync')
+    assert serve.server_options(threads=4)['worker_class'] == 'gthread'
@@ -0,0 +1,136 @@
+import functools
+import json
+import math
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.neural_network import MLPClassifier
+
+from backend import train_models
+from backend.dataset import load_dataset, source_sha256
+from backend.train_models import tune_model, tuning_summary
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    data = pd.read_csv(DATASET_PATH)
+    return data.drop(columns=['target']).to_numpy(dtype=np.float64), data['target'].to_numpy()
+
+
+def test_successive_halving_keeps_the_best_candidates(dataset):
+    X, y = dataset
+    grid = {'C': [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]}
+    model, search = tune_model(LogisticRegression(max_iter=2000), grid, X, y, n_jobs=2)
+
+    summary = tuning_summary(search)
+    # Each round keeps a third of the candidates on three times the samples
+    assert summary['candidates_per_round'] == [6, 2]
+    assert summary['samples_per_round'][1] == 3 * summary['samples_per_round'][0]
+    assert summary['best_params']['C'] in grid['C']
+
+    # The returned model is refitted on plain arrays, not the temporary memory map
+    assert model.C == summary['best_params']['C']
+    assert type(model.coef_) is np.ndarray
+    assert model.predict(X[:5]).shape == (5,)
+
+
+class CountingForest(RandomForestClassifier):
+    def fit(self, X, y, sample_weight=None):
+        FITTED.append('random_forest')
+        return super().fit(X, y, sample_weight)
+
+
+class CountingMLP(MLPClassifier):
+    def fit(self, X, y):
+        FITTED.append('neural_network')
+        return super().fit(X, y)
+
+
+# Models fitted by the pipeline, i.e. the fit_model calls that missed the cache
+FITTED = []
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """
+    train_models writing to tmp_path, with its memoized stages cached there
+    """
+    memory = joblib.Memory(str(tmp_path / 'training_cache'), verbose=0)
+    for stage in ('clean_dataset', 'split_dataset', 'fit_scaler', 'fit_model'):
+        memorized = getattr(train_models, stage)
+        monkeypatch.setattr(train_models, stage, memory.cache(memorized.func, ignore=memorized.ignore))
+    dataset_cache = str(tmp_path / 'dataset_cache')
+    monkeypatch.setattr(train_models, 'load_dataset', functools.partial(load_dataset, cache_dir=dataset_cache))
+    monkeypatch.setattr(train_models, 'source_sha256', functools.partial(source_sha256, cache_dir=dataset_cache))
+
+    model_dir = tmp_path / 'model'
+    monkeypatch.setattr(train_models, 'MODEL_DIR', str(model_dir))
+    monkeypatch.setattr(train_models, 'MANIFEST_PATH', str(model_dir / 'training_manifest.json'))
+    monkeypatch.setattr(train_models, 'NN_COMPILED_PATH', str(model_dir / 'nn_model.npz'))
+    monkeypatch.setattr(train_models, 'MODELS', {
+        'random_forest': ('RandomForest', lambda: CountingForest(n_estimators=10, random_state=42),
+                          train_models.RF_PARAM_GRID, str(model_dir / 'rf.pkl'), str(model_dir / 'rf_scaler.pkl')),
+        'neural_network': ('Neural Network', lambda: CountingMLP((8,), max_iter=300, random_state=42),
+                           train_models.NN_PARAM_GRID, str(model_dir / 'nn.pkl'), str(model_dir / 'nn_scaler.pkl')),
+    })
+    FITTED.clear()
+
+    dataset_path = tmp_path / 'heart.csv'
+    pd.read_csv(DATASET_PATH).to_csv(dataset_path, index=False)
+    return str(dataset_path)
+
+
+def test_unchanged_inputs_reuse_every_memoized_stage(pipeline):
+    first = train_models.train_models(dataset_path=pipeline)
+    assert sorted(FITTED) == ['neural_network', 'random_forest']
+    with open(first['manifest_path']) as f:
+        manifest = json.load(f)
+
+    FITTED.clear()
+    second = train_models.train_models(dataset_path=pipeline)
+
+    assert FITTED == []
+    with open(second['manifest_path']) as f:
+        rerun = json.load(f)
+    for name in ('random_forest', 'neural_network'):
+        assert rerun['models'][name]['test_roc_auc'] == manifest['models'][name]['test_roc_auc']
+    # The exports load and score
+    model = joblib.load(second['random_forest_model_path'])
+    scaler = joblib.load(second['random_forest_scaler_path'])
+    assert model.predict_proba(scaler.transform(np.zeros((1, 13)))).shape == (1, 2)
+
+
+def test_changed_data_invalidates_the_cache(pipeline):
+    train_models.train_models(dataset_path=pipeline)
+    data = pd.read_csv(pipeline)
+    data.iloc[:-10].to_csv(pipeline, index=False)
+
+    FITTED.clear()
+    manifest_path = train_models.train_models(dataset_path=pipeline)['manifest_path']
+
+    assert sorted(FITTED) == ['neural_network', 'random_forest']
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    assert manifest['test_size'] == math.ceil(0.2 * (len(data) - 10))
+
+
+def test_changing_one_model_refits_only_that_model(pipeline, monkeypatch):
+    train_models.train_models(dataset_path=pipeline)
+    models = dict(train_models.MODELS)
+    description, _, grid, model_path, scaler_path = models['neural_network']
+    models['neural_network'] = (description, lambda: CountingMLP((8,), alpha=0.01, max_iter=300, random_state=42),
+                                grid, model_path, scaler_path)
+    monkeypatch.setattr(train_models, 'MODELS', models)
+
+    FITTED.clear()
+    train_models.train_models(dataset_path=pipeline)
+
+    assert FITTED == ['neural_network']
@@ -0,0 +1,110 @@
+import os
+from itertools import combinations
+from math import factorial
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from backend.raw_models import fold_scaler_into_forest
+from backend.tree_shap import TreeExplainer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
+DATASET_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset', 'heart.csv')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    data = pd.read_csv(DATASET_PATH)
+    return data.drop(columns=['target']), data['target'].values
+
+
+@pytest.fixture(scope='module')
+def forest():
+    return joblib.load(os.path.join(MODEL_DIR, 'heart_model.pkl'))
+
+
+@pytest.fixture(scope='module')
+def scaler():
+    return joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+
+
+def expected_output(tree, x, known, node=0):
+    """
+    Path-dependent expectation of one tree given only the features in known
+    """
+    if tree.children_left[node] == -1:
+        value = tree.value[node, 0]
+        return value[1] / value.sum()
+    left, right = tree.children_left[node], tree.children_right[node]
+    if tree.feature[node] in known:
+        goes_left = np.float32(x[tree.feature[node]]) <= tree.threshold[node]
+        return expected_output(tree, x, known, left if goes_left else right)
+    weight = tree.weighted_n_node_samples
+    return (weight[left] * expected_output(tree, x, known, left)
+            + weight[right] * expected_output(tree, x, known, right)) / weight[node]
+
+
+def brute_force_shap(model, x):
+    """
+    Shapley values by enumerating every subset of the features the forest uses
+    """
+    used = sorted({f for e in model.estimators_ for f in e.tree_.feature if f >= 0})
+    n = len(used)
+
+    def value(subset):
+        return np.mean([expected_output(e.tree_, x, set(subset)) for e in model.estimators_])
+
+    phi = np.zeros(len(x))
+    for j in used:
+        others = [f for f in used if f != j]
+        for size in range(n):
+            weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+            for subset in combinations(others, size):
+                phi[j] += weight * (value(subset + (j,)) - value(subset))
+    return phi, value(())
+
+
+def test_matches_brute_force_shapley_values(dataset):
+    X, y = dataset
+    model = RandomForestClassifier(n_estimators=3, max_depth=3, max_features=4, random_state=0).fit(X.values, y)
+    explainer = TreeExplainer(model)
+
+    for x in X.values[:2]:
+        phi, expected = brute_force_shap(model, x)
+        np.testing.assert_allclose(explainer.shap_values(x)[0], phi, rtol=0, atol=1e-12)
+        assert explainer.expected_value == pytest.approx(expected, abs=1e-12)
+
+
+def test_contributions_sum_to_prediction(dataset, forest, scaler):
+    X, _ = dataset
+    scaled = scaler.transform(X.iloc[:50])
+    explainer = TreeExplainer(forest)
+
+    contributions = explainer.shap_values(scaled)
+
+    np.testing.assert_allclose(explainer.expected_value + contributions.sum(axis=1),
+                               forest.predict_proba(scaled)[:, 1], rtol=0, atol=1e-12)
+
+
+def test_batched_rows_match_single_rows(dataset, forest, scaler):
+    X, _ = dataset
+    scaled = scaler.transform(X.iloc[:5])
+    explainer = TreeExplainer(forest)
+
+    batched = explainer.shap_values(scaled)
+
+    for row, expected in zip(scaled, batched):
+        np.testing.assert_allclose(explainer.shap_values(row)[0], expected, rtol=0, atol=1e-15)
+
+
+def test_raw_feature_forest_gives_the_same_explanations(dataset, forest, scaler):
+    X = dataset[0].iloc[:50]
+    raw_explainer = TreeExplainer(fold_scaler_into_forest(forest, scaler))
+    explainer = TreeExplainer(forest)
+
+    np.testing.assert_allclose(raw_explainer.shap_values(X.values),
+                               explainer.shap_values(scaler.transform(X)), rtol=0, atol=1e-12)
@@ -1,124 +1,273 @@
-import pandas as pd
-import numpy as np
-import joblib
+"""
+Training pipeline for the serving models.
+
+    load -> clean -> split -> scale -> fit -> evaluate -> export
+
+The CSV is read through the columnar dataset cache (dataset.py), which is
+keyed by its SHA-256. Every later stage except export is memoized on disk
+with joblib.Memory under TRAINING_CACHE_DIR, keyed by a hash of its inputs.
+Re-running after changing only the MLP's parameters
+therefore reloads the cleaned split, the scaler and the fitted Random Forest
+from the cache and fits only the MLP.
+
+Both models are trained on the same split, so they share one StandardScaler,
+which is written to both scaler paths the registry reads.
+
+Run from the project root:
+    python -m backend.train_models [--tune] [--cap-outliers]
+"""
+import argparse
+import json
 import os
-from sklearn.model_selection import train_test_split
+import tempfile
+from datetime import datetime
+
+import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables HalvingGridSearchCV)
+from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold, train_test_split
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import accuracy_score, classification_report
 
+from backend.compiled_mlp import CompiledMLP
+from backend.config import (
+    DATASET_PATH, MODEL_DIR, NN_COMPILED_PATH, NN_MODEL_PATH, RF_MODEL_PATH, SCALER_NN_PATH, SCALER_PATH,
+    TRAINING_CACHE_DIR, TUNING_WORKERS,
+)
+from backend.dataset import load_dataset, source_sha256
+from backend.utils.files import atomic_path
+from backend.utils.hashing import file_sha256
 from backend.utils.logger import get_logger
 
 logger = get_logger()
 
-def train_models():
+memory = joblib.Memory(TRAINING_CACHE_DIR, verbose=0)
+
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'training_manifest.json')
+
+# Search spaces for --tune
+RF_PARAM_GRID = {
+    'n_estimators': [50, 100, 200, 400],
+    'max_depth': [None, 4, 8, 16],
+    'min_samples_leaf': [1, 2, 4],
+}
+NN_PARAM_GRID = {
+    'hidden_layer_sizes': [(32,), (64, 32), (64, 32, 16), (128, 64, 32)],
+    'alpha': [0.0001, 0.001, 0.01, 0.1],
+}
+
+
+def random_forest():
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+
+def neural_network():
+    return MLPClassifier(
+        hidden_layer_sizes=(64, 32, 16),
+        activation='relu',
+        solver='adam',
+        alpha=0.0001,
+        batch_size=32,
+        learning_rate='adaptive',
+        max_iter=1000,
+        random_state=42
+    )
+
+
+# name -> (display name, estimator factory, search space, model path, scaler path)
+MODELS = {
+    'random_forest': ('RandomForest', random_forest, RF_PARAM_GRID, RF_MODEL_PATH, SCALER_PATH),
+    'neural_network': ('Neural Network', neural_network, NN_PARAM_GRID, NN_MODEL_PATH, SCALER_NN_PATH),
+}
+
+
+def cap_outliers(column):
     """
-    Train both RandomForest and Neural Network models
+    Clip a column to the 1.5 * IQR fences
     """
-    try:
-        # Define model directory within the backend folder
-        BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
-        MODEL_DIR = os.path.join(BACKEND_DIR, 'model')
-        
-        # Define model paths
-        RF_MODEL_PATH = os.path.join(MODEL_DIR, 'heart_model.pkl')
-        NN_MODEL_PATH = os.path.join(MODEL_DIR, 'nn_model.pkl')
-        SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
-        SCALER_NN_PATH = os.path.join(MODEL_DIR, 'scaler_nn.pkl')
-        
-        # Define dataset path
-        DATASET_DIR = os.path.join(os.path.dirname(BACKEND_DIR), 'dataset')
-        DATASET_PATH = os.path.join(DATASET_DIR, 'heart.csv')
-        
-        # Create model directory if it doesn't exist
-        os.makedirs(MODEL_DIR, exist_ok=True)
-        
-        # Load the dataset
-        logger.info(f"Loading dataset from {DATASET_PATH}")
-        data = pd.read_csv(DATASET_PATH)
-        
-        # Split features and target
-        X = data.drop('target', axis=1)
-        y = data['target']
-        
-        # Split the data into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Train RandomForest model
-        logger.info("Training RandomForest model")
-        
-        # Scale the features for RandomForest
-        rf_scaler = StandardScaler()
-        X_train_rf_scaled = rf_scaler.fit_transform(X_train)
-        X_test_rf_scaled = rf_scaler.transform(X_test)
-        
-        rf_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        rf_model.fit(X_train_rf_scaled, y_train)
-        
-        # Evaluate RandomForest model
-        rf_pred = rf_model.predict(X_test_rf_scaled)
-        rf_accuracy = accuracy_score(y_test, rf_pred)
-        logger.info(f"RandomForest accuracy: {rf_accuracy:.4f}")
-        logger.info(f"RandomForest classification report:\n{classification_report(y_test, rf_pred)}")
-        
-        # Save RandomForest model and scaler
-        logger.info(f"Saving RandomForest model to {RF_MODEL_PATH}")
-        joblib.dump(rf_model, RF_MODEL_PATH)
-        
-        logger.info(f"Saving RandomForest scaler to {SCALER_PATH}")
-        joblib.dump(rf_scaler, SCALER_PATH)
-        
-        # Train Neural Network model
-        logger.info("Training Neural Network model")
-        
-        # Scale the features for Neural Network
-        nn_scaler = StandardScaler()
-        X_train_nn_scaled = nn_scaler.fit_transform(X_train)
-        X_test_nn_scaled = nn_scaler.transform(X_test)
-        
-        nn_model = MLPClassifier(
-            hidden_layer_sizes=(64, 32, 16),
-            activation='relu',
-            solver='adam',
-            alpha=0.0001,
-            batch_size=32,
-            learning_rate='adaptive',
-            max_iter=1000,
+    q1, q3 = column.quantile(0.25), column.quantile(0.75)
+    iqr = q3 - q1
+    return column.clip(lower=q1 - 1.5 * iqr, upper=q3 + 1.5 * iqr)
+
+
+@memory.cache
+def clean_dataset(data, cap=False):
+    """
+    Drop rows with missing values and optionally cap outliers of the features
+    """
+    data = data.dropna()
+    if cap:
+        features = [column for column in data.columns if column != 'target']
+        data = data.assign(**{column: cap_outliers(data[column]) for column in features})
+    return data
+
+
+@memory.cache
+def split_dataset(data, test_size=0.2, random_state=42):
+    """
+    Return (X_train, X_test, y_train, y_test) as arrays
+    """
+    X = data.drop(columns=['target']).to_numpy(dtype=np.float64)
+    y = data['target'].to_numpy()
+    return train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+
+@memory.cache
+def fit_scaler(X_train):
+    return StandardScaler().fit(X_train)
+
+
+def tune_model(estimator, param_grid, X_train, y_train, n_jobs=TUNING_WORKERS):
+    """
+    Search param_grid with successive halving: every configuration is scored
+    by cross-validation on a small sample of the training data, and only the
+    best third moves on to three times as many samples.
+
+    The training data is dumped once and memory-mapped, so the worker
+    processes receive a reference to the file instead of a pickled copy per
+    trial.
+    """
+    with tempfile.TemporaryDirectory(prefix='tuning_') as tmp_dir:
+        data_path = os.path.join(tmp_dir, 'train.joblib')
+        joblib.dump((np.asarray(X_train, dtype=np.float64), np.asarray(y_train)), data_path)
+        X_shared, y_shared = joblib.load(data_path, mmap_mode='r')
+
+        search = HalvingGridSearchCV(
+            estimator,
+            param_grid,
+            factor=3,
+            scoring='roc_auc',
+            cv=StratifiedKFold(n_splits=5, shuffle=True, random_state=42),
+            n_jobs=n_jobs,
             random_state=42
         )
-        
-        nn_model.fit(X_train_nn_scaled, y_train)
-        
-        # Evaluate Neural Network model
-        nn_pred = nn_model.predict(X_test_nn_scaled)
-        nn_accuracy = accuracy_score(y_test, nn_pred)
-        logger.info(f"Neural Network accuracy: {nn_accuracy:.4f}")
-        logger.info(f"Neural Network classification report:\n{classification_report(y_test, nn_pred)}")
-        
-        # Save Neural Network model and scaler
-        logger.info(f"Saving Neural Network model to {NN_MODEL_PATH}")
-        joblib.dump(nn_model, NN_MODEL_PATH)
-        
-        logger.info(f"Saving Neural Network scaler to {SCALER_NN_PATH}")
-        joblib.dump(nn_scaler, SCALER_NN_PATH)
-        
-        logger.info("All models trained successfully")
-        
-        # Return the paths for reference
-        return {
-            'rf_model_path': RF_MODEL_PATH,
-            'nn_model_path': NN_MODEL_PATH,
-            'rf_scaler_path': SCALER_PATH,
-            'nn_scaler_path': SCALER_NN_PATH
+        search.fit(X_shared, y_shared)
+        # Refit on a regular array so the saved model holds no references to the temporary file
+        model = search.best_estimator_
+        model.fit(np.array(X_shared), np.array(y_shared))
+    return model, search
+
+
+def tuning_summary(search):
+    """
+    Best parameters, their CV score and the candidates kept at each halving round
+    """
+    return {
+        'best_params': {key: list(value) if isinstance(value, tuple) else value
+                        for key, value in search.best_params_.items()},
+        'cv_roc_auc': float(search.best_score_),
+        'candidates_per_round': [int(n) for n in search.n_candidates_],
+        'samples_per_round': [int(n) for n in search.n_resources_],
+    }
+
+
+@memory.cache(ignore=['n_jobs'])
+def fit_model(estimator, X_train, y_train, param_grid=None, n_jobs=TUNING_WORKERS):
+    """
+    Fit the estimator, or tune it over param_grid first. Returns (model, tuning summary or None)
+    """
+    if param_grid is None:
+        return estimator.fit(X_train, y_train), None
+    model, search = tune_model(estimator, param_grid, X_train, y_train, n_jobs)
+    return model, tuning_summary(search)
+
+
+def evaluate_model(model, X_test, y_test):
+    predicted = model.predict(X_test)
+    return {
+        'test_accuracy': float(accuracy_score(y_test, predicted)),
+        'test_roc_auc': float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        'report': classification_report(y_test, predicted),
+    }
+
+
+def train_models(tune=False, n_jobs=TUNING_WORKERS, cap=False, dataset_path=DATASET_PATH):
+    """
+    Run the pipeline for both models and export them, their scaler and a
+    manifest to the model directory
+    """
+    try:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+
+        dataset_sha256 = source_sha256(dataset_path)
+        logger.info(f"Loading dataset from {dataset_path}")
+        data = clean_dataset(load_dataset(dataset_path).to_frame(), cap)
+        X_train, X_test, y_train, y_test = split_dataset(data)
+
+        # One scaler for both models, fitted on the training split
+        scaler = fit_scaler(X_train)
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+
+        manifest = {
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'dataset_sha256': dataset_sha256,
+            'capped_outliers': cap,
+            'tuned': tune,
+            'test_size': len(y_test),
+            'models': {}
         }
-        
+        paths = {}
+        for name, (description, factory, param_grid, model_path, scaler_path) in MODELS.items():
+            logger.info(f"Training {description} model")
+            model, tuning = fit_model(factory(), X_train_scaled, y_train, param_grid if tune else None, n_jobs)
+            if tuning is not None:
+                logger.info(f"{description} best parameters: {tuning['best_params']} "
+                            f"(CV ROC AUC {tuning['cv_roc_auc']:.4f})")
+
+            metrics = evaluate_model(model, X_test_scaled, y_test)
+            logger.info(f"{description} accuracy: {metrics['test_accuracy']:.4f}")
+            logger.info(f"{description} classification report:\n{metrics.pop('report')}")
+
+            logger.info(f"Saving {description} model to {model_path} and scaler to {scaler_path}")
+            # Replaced rather than overwritten, so a server can keep serving the old files until it reloads
+            for artifact, path in ((model, model_path), (scaler, scaler_path)):
+                with atomic_path(path) as temporary_path:
+                    joblib.dump(artifact, temporary_path)
+            exported = [model_path, scaler_path]
+            if name == 'neural_network':
+                # Weights for the NumPy runtime, with the scaler folded in
+                CompiledMLP.from_sklearn(model, scaler).save(NN_COMPILED_PATH)
+                exported.append(NN_COMPILED_PATH)
+
+            manifest['models'][name] = {
+                'params': {key: model.get_params()[key] for key in param_grid},
+                **metrics,
+                'tuning': tuning,
+                'artifacts': {os.path.basename(path): file_sha256(path) for path in exported}
+            }
+            paths[f'{name}_model_path'] = model_path
+            paths[f'{name}_scaler_path'] = scaler_path
+
+        # Record how the artifacts were produced and how they score on the test split
+        with open(MANIFEST_PATH, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Saved training manifest to {MANIFEST_PATH}")
+
+        logger.info("All models trained successfully")
+        paths['manifest_path'] = MANIFEST_PATH
+        return paths
+
     except Exception as e:
         logger.error(f"Error training models: {e}")
         raise
 
+
 if __name__ == "__main__":
-    paths = train_models()
+    parser = argparse.ArgumentParser(description="Train the Random Forest and Neural Network models")
+    parser.add_argument('--tune', action='store_true',
+                        help='search RF depth/estimators and MLP architecture/alpha by successive halving')
+    parser.add_argument('--workers', type=int, default=TUNING_WORKERS,
+                        help='processes running trials concurrently (-1 for all cores)')
+    parser.add_argument('--cap-outliers', action='store_true',
+                        help='clip features to their 1.5 * IQR fences before splitting')
+    parser.add_argument('--clear-cache', action='store_true', help='discard memoized pipeline stages first')
+    args = parser.parse_args()
+    if args.clear_cache:
+        memory.clear(warn=False)
+    paths = train_models(tune=args.tune, n_jobs=args.workers, cap=args.cap_outliers)
     print("Models saved at:")
     for key, path in paths.items():
         print(f"{key}: {path}")
@@ -1,36 +1,103 @@
+import csv
+import io
+import json
+
 import numpy as np
-from backend.utils.logger import get_logger
 
-logger = get_logger()
 
-def prepare_input_data(input_data):
+def parse_batch_records(body, content_type):
+    """
+    Parse a batch request body into a list of patient records.
+
+    Supports a JSON array (or an object with a "records" array), CSV with a
+    header row, and newline-delimited JSON. Lines that cannot be decoded are
+    returned as error strings in place of a record so that the caller can
+    report them per row.
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+
+    if content_type in ('text/csv', 'application/csv'):
+        reader = csv.DictReader(io.StringIO(text))
+        return [dict(row) for row in reader]
+
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        records = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError as e:
+                records.append(f"Invalid JSON on line {line_number}: {e}")
+        return records
+
+    payload = json.loads(text)
+    if isinstance(payload, dict):
+        payload = payload.get('records')
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON array of patient records')
+    return payload
+
+
+def parse_sweep_axes(axes, schema):
+    """
+    Validate the swept features of a /predict/sweep request against a FeatureSchema.
+
+    Each axis is {"feature": name, "values": [...]} or
+    {"feature": name, "min": a, "max": b, "steps": n} (n evenly spaced values,
+    both ends included). Every value must lie within the feature's bounds and,
+    for a coded feature, be one of its codes; a min/max range over a coded
+    feature sweeps the codes between min and max and ignores steps. Returns a
+    list of (column index, values array).
+    """
+    if not isinstance(axes, list) or not 1 <= len(axes) <= 2:
+        raise ValueError('"axes" must be a list of one or two swept features')
+
+    parsed = []
+    for axis in axes:
+        if not isinstance(axis, dict) or axis.get('feature') not in schema.names:
+            raise ValueError(f"Each axis needs a \"feature\" from: {', '.join(schema.names)}")
+        column = schema.names.index(axis['feature'])
+        feature = schema.features[column]
+        try:
+            if 'values' in axis:
+                values = np.asarray(axis['values'], dtype=np.float64)
+            else:
+                low, high = float(axis['min']), float(axis['max'])
+                if feature.codes is not None:
+                    values = np.array([code for code in feature.codes if low <= code <= high], dtype=np.float64)
+                else:
+                    steps = int(axis.get('steps', 50))
+                    if steps < 2:
+                        raise ValueError('steps must be at least 2')
+                    values = np.linspace(low, high, steps)
+        except KeyError as e:
+            raise ValueError(f"Axis {feature.name} needs \"values\" or \"min\" and \"max\" (missing {e})")
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid range for {feature.name}: {e}")
+        if values.ndim != 1 or values.size == 0 or not np.isfinite(values).all():
+            raise ValueError(f"Values for {feature.name} must be a non-empty list of finite numbers")
+        if values.min() < feature.minimum or values.max() > feature.maximum:
+            raise ValueError(f"Values for {feature.name} must be between {feature.minimum:g} and {feature.maximum:g}")
+        if feature.codes is not None and not np.isin(values, feature.codes).all():
+            raise ValueError(f"Values for {feature.name} must be among "
+                             f"{', '.join(f'{code:g}' for code in feature.codes)}")
+        parsed.append((column, values))
+
+    if len(parsed) == 2 and parsed[0][0] == parsed[1][0]:
+        raise ValueError('The two axes must sweep different features')
+    return parsed
+
+
+def sweep_matrix(base_values, axes):
     """
-    Prepare input data for prediction
+    Build the (points, n_features) matrix for a sweep: every row is the base
+    patient with the swept columns set to one point of the grid, the first
+    axis varying slowest
     """
-    try:
-        # Convert input data to correct format
-        features = [
-            float(input_data['age']),
-            float(input_data['sex']),
-            float(input_data['cp']),
-            float(input_data['trestbps']),
-            float(input_data['chol']),
-            float(input_data['fbs']),
-            float(input_data['restecg']),
-            float(input_data['thalach']),
-            float(input_data['exang']),
-            float(input_data['oldpeak']),
-            float(input_data['slope']),
-            float(input_data['ca']),
-            float(input_data['thal'])
-        ]
-        return np.array(features).reshape(1, -1)
-    except KeyError as e:
-        logger.error(f"Missing key in input data: {e}")
-        raise ValueError(f"Missing required field: {e}")
-    except ValueError as e:
-        logger.error(f"Invalid value in input data: {e}")
-        raise ValueError(f"Invalid value: {e}")
-    except Exception as e:
-        logger.error(f"Error preparing input data: {e}")
-        raise
+    grids = np.meshgrid(*[values for _, values in axes], indexing='ij')
+    matrix = np.tile(np.asarray(base_values, dtype=np.float64), (grids[0].size, 1))
+    for (column, _), grid in zip(axes, grids):
+        matrix[:, column] = grid.ravel()
+    return matrix
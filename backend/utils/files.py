@@ -0,0 +1,19 @@
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path next to path and rename it over path once the
+    block succeeds. A running server may have the old file memory-mapped or
+    be about to reload it; replacing the file keeps the old inode intact for
+    the former and means the latter never reads a partial file.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
@@ -0,0 +1,22 @@
+import hashlib
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Return the hex SHA-256 digest of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def combined_sha256(paths):
+    """
+    Return a single digest covering several files, in the given order
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
@@ -0,0 +1,182 @@
+"""
+Compiled schema of the 13 patient features.
+
+Every route decodes patient records through HEART_SCHEMA instead of looking
+features up one at a time. The schema is compiled once into arrays: the
+feature order, the bounds of every feature and, for coded features, a
+lookup table of the allowed codes.
+
+Records are decoded in one pass. An itemgetter pulls all 13 values out of
+every record, and np.fromiter reads them straight into a contiguous float64
+matrix. Only a batch with a record that is not an object, lacks a feature or
+has a value that is not a number goes through a slower per-record path, and
+that path exists only to report those records. Then the whole matrix is
+checked at once: finite values, bounds, whole-number codes and allowed
+codes. Per-row error messages are built only for the rows that failed.
+
+Missing features are errors. A null or empty value counts as missing.
+"""
+from collections import namedtuple
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+Feature = namedtuple('Feature', ['name', 'description', 'minimum', 'maximum', 'codes'])
+
+
+def numeric(name, description, minimum, maximum):
+    return Feature(name, description, float(minimum), float(maximum), None)
+
+
+def coded(name, description, codes):
+    return Feature(name, description, float(min(codes)), float(max(codes)), tuple(codes))
+
+
+class FeatureSchema:
+    """
+    Decodes patient records into float64 rows in feature order and validates them
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.names = [feature.name for feature in self.features]
+        self.descriptions = {feature.name: feature.description for feature in self.features}
+        self.minimum = np.array([feature.minimum for feature in self.features])
+        self.maximum = np.array([feature.maximum for feature in self.features])
+        self._getter = itemgetter(*self.names)
+        self._rules = [(feature.minimum, feature.maximum, None if feature.codes is None else frozenset(feature.codes))
+                       for feature in self.features]
+
+        # Coded columns: allowed[k, code] says whether code is valid for the k-th coded column
+        self._coded_columns = np.array([column for column, feature in enumerate(self.features)
+                                        if feature.codes is not None], dtype=np.intp)
+        largest_code = max((int(self.maximum[column]) for column in self._coded_columns), default=0)
+        self._allowed = np.zeros((len(self._coded_columns), largest_code + 1), dtype=bool)
+        for k, column in enumerate(self._coded_columns):
+            self._allowed[k, [int(code) for code in self.features[column].codes]] = True
+        self._code_rows = np.arange(len(self._coded_columns))
+
+    def decode(self, record):
+        """
+        Return the (n_features,) float64 row of a single record; raises
+        ValueError listing every problem with it
+        """
+        if not isinstance(record, dict):
+            raise ValueError('Record must be an object')
+        try:
+            row = np.fromiter(self._getter(record), dtype=np.float64, count=len(self.names))
+        except (KeyError, TypeError, ValueError):
+            _, _, errors = self.decode_many([record])
+            raise ValueError(errors[0]['error'])
+        # Scalar comparisons beat the array checks on one row; those only describe its problems
+        for value, (minimum, maximum, codes) in zip(row.tolist(), self._rules):
+            if not minimum <= value <= maximum or (codes is not None and value not in codes):
+                raise ValueError(self.check(row.reshape(1, -1))[1][0][1])
+        return row
+
+    def decode_many(self, records):
+        """
+        Decode patient records into an (n, n_features) float64 matrix.
+
+        Records that are not valid are left out of the matrix and reported in
+        the returned errors list instead of failing the batch. Returns
+        (matrix, row_indices, errors) where row_indices maps each matrix row
+        back to its position in records.
+        """
+        try:
+            values = chain.from_iterable(map(self._getter, records))
+            matrix = np.fromiter(values, dtype=np.float64, count=len(records) * len(self.names))
+            matrix = matrix.reshape(len(records), len(self.names))
+            row_indices = np.arange(len(records))
+            errors = []
+        except (KeyError, TypeError, ValueError):
+            matrix, row_indices, errors = self._decode_each(records)
+
+        valid, problems = self.check(matrix)
+        if problems:
+            errors.extend({'index': int(row_indices[row]), 'error': message} for row, message in problems)
+            errors.sort(key=lambda error: error['index'])
+            matrix, row_indices = matrix[valid], row_indices[valid]
+        return np.ascontiguousarray(matrix), row_indices.tolist(), errors
+
+    def _decode_each(self, records):
+        matrix = np.empty((len(records), len(self.names)), dtype=np.float64)
+        row_indices = []
+        errors = []
+        for index, record in enumerate(records):
+            if isinstance(record, str):
+                # Parsers report records they could not decode as an error string
+                errors.append({'index': index, 'error': record})
+                continue
+            if not isinstance(record, dict):
+                errors.append({'index': index, 'error': 'Record must be an object'})
+                continue
+
+            missing = [name for name in self.names if record.get(name) in (None, '')]
+            if missing:
+                errors.append({'index': index, 'error': f"Missing required field(s): {', '.join(missing)}"})
+                continue
+
+            row = matrix[len(row_indices)]
+            try:
+                for column, name in enumerate(self.names):
+                    row[column] = float(record[name])
+            except (TypeError, ValueError):
+                errors.append({'index': index, 'error': f"Invalid value for {name}: {record[name]!r}"})
+                continue
+            row_indices.append(index)
+        return matrix[:len(row_indices)], np.array(row_indices, dtype=np.intp), errors
+
+    def check(self, matrix):
+        """
+        Validate decoded rows at once. Returns (valid row mask, [(row, message)]
+        for the invalid rows)
+        """
+        # NaN (a null value) and infinities fail the bounds as well
+        ok = (matrix >= self.minimum) & (matrix <= self.maximum)
+        # A coded value in range is a safe index into the table of allowed codes
+        codes = matrix[:, self._coded_columns]
+        indices = np.where(ok[:, self._coded_columns], codes, 0).astype(np.intp)
+        ok[:, self._coded_columns] &= (codes == indices) & self._allowed[self._code_rows, indices]
+        valid = ok.all(axis=1)
+        if valid.all():
+            return valid, []
+        return valid, [(int(row), self._describe(matrix[row], ok[row])) for row in np.flatnonzero(~valid)]
+
+    def _describe(self, values, ok):
+        missing, infinite, messages = [], [], []
+        for column in np.flatnonzero(~ok):
+            feature, value = self.features[column], values[column]
+            if np.isnan(value):
+                missing.append(feature.name)
+            elif np.isinf(value):
+                infinite.append(feature.name)
+            elif not feature.minimum <= value <= feature.maximum:
+                messages.append(f"{feature.name} must be between {feature.minimum:g} and {feature.maximum:g}, "
+                                f"got {value:g}")
+            else:
+                messages.append(f"{feature.name} must be one of {', '.join(f'{code:g}' for code in feature.codes)}, "
+                                f"got {value:g}")
+        if infinite:
+            messages.insert(0, f"Values must be finite numbers: {', '.join(infinite)}")
+        if missing:
+            messages.insert(0, f"Missing required field(s): {', '.join(missing)}")
+        return '; '.join(messages)
+
+
+HEART_SCHEMA = FeatureSchema([
+    numeric('age', 'Age in years', 1, 120),
+    coded('sex', 'Sex (1 = male, 0 = female)', (0, 1)),
+    coded('cp', 'Chest pain type (0-3)', (0, 1, 2, 3)),
+    numeric('trestbps', 'Resting blood pressure (mm Hg)', 50, 250),
+    numeric('chol', 'Serum cholesterol (mg/dl)', 50, 700),
+    coded('fbs', 'Fasting blood sugar > 120 mg/dl (1 = true, 0 = false)', (0, 1)),
+    coded('restecg', 'Resting electrocardiographic results (0-2)', (0, 1, 2)),
+    numeric('thalach', 'Maximum heart rate achieved', 40, 250),
+    coded('exang', 'Exercise induced angina (1 = yes, 0 = no)', (0, 1)),
+    numeric('oldpeak', 'ST depression induced by exercise relative to rest', -5, 10),
+    coded('slope', 'Slope of the peak exercise ST segment (0-2)', (0, 1, 2)),
+    coded('ca', 'Number of major vessels colored by fluoroscopy (0-4)', (0, 1, 2, 3, 4)),
+    coded('thal', 'Thalassemia (0-3)', (0, 1, 2, 3)),
+])
@@ -0,0 +1,150 @@
+"""
+Base class for model analyses that are computed once per model version.
+
+The result for a registry version is computed in a background thread while
+the API keeps serving, written to disk under a name that includes the
+version, and loaded from there by every other process. An analysis of a
+dataset also names its results after the SHA-256 of the dataset file. A table
+is therefore recomputed only when the served artifacts or the dataset change,
+and results for previous versions are deleted once the new one is saved.
+"""
+import glob
+import multiprocessing
+import os
+import threading
+
+from backend.config import DATASET_CACHE_DIR
+from backend.dataset import source_sha256
+from backend.utils.logger import get_logger
+
+logger = get_logger()
+
+
+class VersionedCache:
+    """
+    Subclasses set name and extension and implement compute, dump and load.
+    Those computed from a dataset pass its dataset_path.
+    """
+
+    name = None
+    extension = None
+
+    def __init__(self, cache_dir, dataset_path=None, dataset_cache_dir=DATASET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.dataset_path = dataset_path
+        self.dataset_cache_dir = dataset_cache_dir
+        self._results = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def key(self, version):
+        """
+        Name of the result for a model version: the version, and the hash of the dataset if there is one
+        """
+        if self.dataset_path is None:
+            return version
+        return f"{version}_{source_sha256(self.dataset_path, self.dataset_cache_dir)[:12]}"
+
+    def path(self, version):
+        """
+        Path of the result for a model version and the current dataset
+        """
+        return self._path(self.key(version))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{self.name}_{key}{self.extension}")
+
+    def compute(self, predictors):
+        """
+        Compute the result from a {model name: Predictor} snapshot of the registry
+        """
+        raise NotImplementedError
+
+    def dump(self, result, f):
+        raise NotImplementedError
+
+    def load(self, f):
+        raise NotImplementedError
+
+    def get(self, version):
+        """
+        Return the result for a model version, or None if it is not computed yet
+        """
+        key = self.key(version)
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'rb') as f:
+            result = self.load(f)
+        with self._lock:
+            self._results = {key: result}
+        return result
+
+    def is_computing(self, version):
+        with self._lock:
+            job = self._jobs.get(self.key(version))
+            return job is not None and job.is_alive()
+
+    def refresh(self, models):
+        """
+        Start computing the result for a ModelSet (or a registry's current
+        one) in a background thread unless it is cached or already being computed
+        """
+        # Spawned pool workers re-import the main module (e.g. backend.app) and
+        # are named before they do; only the serving process computes
+        if multiprocessing.current_process().name != 'MainProcess':
+            return None
+        # Snapshot the models so a reload cannot change them mid-computation
+        models = getattr(models, 'current', models)
+        version, predictors = models.version, dict(models.predictors)
+        if version is None or not predictors:
+            return None
+        key = self.key(version)
+        if os.path.exists(self._path(key)):
+            return None
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.is_alive():
+                return job
+            job = threading.Thread(target=self._run, args=(predictors, key), name=self.name, daemon=True)
+            self._jobs[key] = job
+            job.start()
+            return job
+
+    def wait(self, timeout=None):
+        """
+        Wait for running jobs, e.g. before forking worker processes
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.join(timeout)
+
+    def _run(self, predictors, key):
+        try:
+            logger.info(f"Computing {self.name} for {key}")
+            result = self.compute(predictors)
+            self._save(key, result)
+            with self._lock:
+                self._results = {key: result}
+            logger.info(f"Saved {self.name} for {key} to {self._path(key)}")
+        except Exception as e:
+            logger.error(f"Error computing {self.name} for {key}: {e}")
+
+    def _save(self, key, result):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # Write under a temporary name and rename so readers never see a partial file
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as f:
+            self.dump(result, f)
+        os.replace(temporary_path, path)
+
+        # Results for previous model versions or datasets can never be served again
+        for stale_path in glob.glob(os.path.join(self.cache_dir, f"{self.name}_*{self.extension}")):
+            if stale_path != path:
+                os.remove(stale_path)
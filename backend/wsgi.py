@@ -0,0 +1,5 @@
+"""
+WSGI entry point for production servers, e.g.
+    gunicorn -c backend/gunicorn.conf.py backend.wsgi:app
+"""
+from backend.app import app
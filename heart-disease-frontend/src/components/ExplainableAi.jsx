@@ -72,7 +72,8 @@ const ExplainableAi = ({ predictionData }) => {
                 <Heading size="md" mb={4}>Feature Contributions</Heading>
                 <Text mb={4}>
                     The chart below shows how each feature contributed to your prediction.
-                    Larger values indicate a stronger influence on the prediction result.
+                    Each bar is how far that feature moved the predicted risk away from the
+                    average patient's; larger values indicate a stronger influence.
                 </Text>
 
                 <VStack spacing={4} align="stretch" mt={6}>
@@ -31,6 +31,7 @@ const ModelComparison = () => {
     const [comparisonResult, setComparisonResult] = useState(null);
     const [error, setError] = useState(null);
     const [modelPerformance, setModelPerformance] = useState([]);
+    const [performanceFolds, setPerformanceFolds] = useState(null);
     const [loadingPerformance, setLoadingPerformance] = useState(true);
     const toast = useToast();
 
@@ -42,7 +43,13 @@ const ModelComparison = () => {
     const fetchModelPerformance = async () => {
         try {
             const response = await axios.get('http://127.0.0.1:5000/models/comparison');
-            setModelPerformance(response.data);
+            if (response.status === 202) {
+                // Cross-validation is still running on the server; check again shortly
+                setTimeout(fetchModelPerformance, 3000);
+                return;
+            }
+            setModelPerformance(response.data.models);
+            setPerformanceFolds(response.data.folds);
             setLoadingPerformance(false);
         } catch (error) {
             console.error('Error fetching model performance:', error);
@@ -148,6 +155,7 @@ const ModelComparison = () => {
                 <Heading size="md" mb={4}>Model Performance Metrics</Heading>
                 <Text mb={4}>
                     Compare the performance of different machine learning models used for heart disease prediction.
+                    {performanceFolds && ` Metrics are averaged over ${performanceFolds}-fold cross-validation on the training dataset.`}
                 </Text>
                 
                 <SimpleGrid columns={{ base: 1, md: 2, lg: 4 }} spacing={6}>
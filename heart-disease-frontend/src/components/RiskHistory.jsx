@@ -58,7 +58,7 @@ const RiskHistory = ({ currentPrediction }) => {
         }
 
         try {
-            await axios.post('http://127.0.0.1:5000/history', {
+            const response = await axios.post('http://127.0.0.1:5000/history', {
                 ...currentPrediction,
                 date: new Date().toISOString()
             });
@@ -71,8 +71,8 @@ const RiskHistory = ({ currentPrediction }) => {
                 isClosable: true,
             });
 
-            // Refresh history
-            fetchRiskHistory();
+            // Prepend the stored record instead of refetching the whole history
+            setHistory(prevHistory => [response.data.record, ...prevHistory]);
         } catch (err) {
             console.error('Error saving prediction:', err);
             toast({
@@ -97,8 +97,8 @@ const RiskHistory = ({ currentPrediction }) => {
                 isClosable: true,
             });
 
-            // Refresh history
-            fetchRiskHistory();
+            // Drop the deleted entry locally instead of refetching the whole history
+            setHistory(prevHistory => prevHistory.filter(item => item.id !== id));
         } catch (err) {
             console.error('Error deleting history item:', err);
             toast({
@@ -9,6 +9,19 @@ import {
 } from '@chakra-ui/react';
 import { InfoIcon, RepeatIcon } from '@chakra-ui/icons';
 import { motion } from 'framer-motion';
+import {
+    LineChart, Line, XAxis, YAxis, CartesianGrid,
+    Tooltip as ChartTooltip, ReferenceLine, ResponsiveContainer
+} from 'recharts';
+
+// Slider range (min, max, step) of each numeric feature; also the range of its risk curve
+const sliderRanges = {
+    chol: [100, 500, 1],
+    trestbps: [90, 200, 1],
+    thalach: [70, 220, 1],
+    age: [20, 80, 1],
+    oldpeak: [0, 6, 0.1]
+};
 
 const RiskSimulator = ({onPredictionUpdate}) => {
     const toast = useToast();
@@ -37,6 +50,8 @@ const RiskSimulator = ({onPredictionUpdate}) => {
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
     const [featureDescriptions, setFeatureDescriptions] = useState({});
+    const [curveFeature, setCurveFeature] = useState('chol');
+    const [riskCurve, setRiskCurve] = useState(null);
 
     // Feature descriptions for tooltips
     useEffect(() => {
@@ -60,8 +75,32 @@ const RiskSimulator = ({onPredictionUpdate}) => {
     // Get initial prediction on component mount
     useEffect(() => {
         getPrediction(values, true);
+        getRiskCurve(values, curveFeature);
     }, []);
 
+    // Fetch the risk across a feature's whole slider range in one /predict/sweep call
+    const getRiskCurve = async (data, feature) => {
+        const [min, max, step] = sliderRanges[feature];
+
+        try {
+            const response = await axios.post('http://127.0.0.1:5000/predict/sweep', {
+                base: data,
+                axes: [{ feature, min, max, steps: Math.round((max - min) / step) + 1 }]
+            });
+
+            setRiskCurve({
+                feature,
+                points: response.data.axes[0].values.map((value, index) => ({
+                    value,
+                    risk: response.data.probabilities[index] * 100
+                }))
+            });
+        } catch (err) {
+            console.error('Error getting risk curve:', err);
+            setRiskCurve(null);
+        }
+    };
+
     // Function to get prediction from API
     const getPrediction = async (data, isBaseline = false) => {
         setLoading(true);
@@ -102,6 +141,10 @@ const RiskSimulator = ({onPredictionUpdate}) => {
         const newValues = { ...values, [name]: value };
         setValues(newValues);
 
+        // Show the curve of the numeric feature being adjusted
+        const feature = sliderRanges[name] ? name : curveFeature;
+        setCurveFeature(feature);
+
         // Debounce the API call to avoid too many requests
         if (window.predictionTimeout) {
             clearTimeout(window.predictionTimeout);
@@ -109,6 +152,7 @@ const RiskSimulator = ({onPredictionUpdate}) => {
 
         window.predictionTimeout = setTimeout(() => {
             getPrediction(newValues);
+            getRiskCurve(newValues, feature);
         }, 500);
     };
 
@@ -116,6 +160,7 @@ const RiskSimulator = ({onPredictionUpdate}) => {
     const handleReset = () => {
         setValues(initialValues);
         getPrediction(initialValues);
+        getRiskCurve(initialValues, curveFeature);
 
         toast({
             title: 'Reset Complete',
@@ -216,6 +261,32 @@ const RiskSimulator = ({onPredictionUpdate}) => {
         );
     };
 
+    // Render the risk curve across the range of the last adjusted numeric feature
+    const renderRiskCurve = () => {
+        if (!riskCurve) return null;
+
+        return (
+            <Box p={6} borderWidth="1px" borderRadius="lg" bg="white" shadow="md" width="100%">
+                <Heading size="md" mb={2}>Risk Across {riskCurve.feature}</Heading>
+                <Text fontSize="sm" color="gray.600" mb={4}>
+                    Predicted risk for every {riskCurve.feature} value, with all other factors as currently set.
+                </Text>
+                <Box height="200px">
+                    <ResponsiveContainer width="100%" height="100%">
+                        <LineChart data={riskCurve.points} margin={{ top: 5, right: 20, left: 0, bottom: 5 }}>
+                            <CartesianGrid strokeDasharray="3 3" />
+                            <XAxis dataKey="value" type="number" domain={['dataMin', 'dataMax']} />
+                            <YAxis domain={[0, 100]} unit="%" />
+                            <ChartTooltip formatter={(risk) => `${risk.toFixed(1)}%`} />
+                            <ReferenceLine x={values[riskCurve.feature]} stroke="#E53E3E" strokeDasharray="4 4" />
+                            <Line type="stepAfter" dataKey="risk" stroke="#3182CE" dot={false} isAnimationActive={false} />
+                        </LineChart>
+                    </ResponsiveContainer>
+                </Box>
+            </Box>
+        );
+    };
+
     // Render a slider for a numeric feature
     const renderSlider = (name, min, max, step, isInteger = true) => {
         const value = values[name];
@@ -365,6 +436,9 @@ const RiskSimulator = ({onPredictionUpdate}) => {
                             {/* Risk prediction display */}
                             {renderRiskStats()}
 
+                            {/* Risk across the range of the last adjusted feature */}
+                            {renderRiskCurve()}
+
                             <Box bg="white" p={6} borderRadius="md" shadow="sm" width="100%">
                                 <Heading size="md" mb={6}>Other Factors</Heading>
 